@@ -0,0 +1,113 @@
+"""
+Fit the coefficients of the cost model used by the auto strategy.
+
+Runs each strategy on a grid of synthetic families, then fits time
+against the features of itaxotools.mafftpy.costs by least squares.
+Paste the printed table into COEFFICIENTS in costs.py. The measured peak
+memory is printed next to the prediction of itaxotools.mafftpy.memory,
+whose constants are set by hand.
+
+    python benchmarks/calibrate.py [--strategy fftns1 ginsi]
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from run import Case, measure
+from synthetic import DNA, PROTEIN, Family
+
+from itaxotools.mafftpy.costs import FEATURES, features
+from itaxotools.mafftpy.memory import peak_memory
+
+MiB = 2**20
+
+# Many short sequences, where the quadratic distance and tree terms of
+# FFT-NS take over, are needed to know when PartTree is faster
+MANY = [(n, m) for n in [1000, 2000, 4000] for m in [200, 800]]
+
+GRIDS = {
+    "parttree": [
+        (n, m) for n in [200, 600, 1500, 3000, 6000, 12000] for m in [200, 800]
+    ],
+    "fftns1": [(n, m) for n in [20, 60, 150, 300] for m in [200, 800, 2000]] + MANY,
+    "fftns2": [(n, m) for n in [20, 60, 150, 300] for m in [200, 800, 2000]] + MANY,
+    "fftnsi": [(n, m) for n in [20, 60, 150] for m in [200, 800, 2000]]
+    + [(n, 200) for n in [500, 1000, 2000]],
+    "ginsi": [(n, m) for n in [8, 20, 40] for m in [100, 300, 800]],
+}
+
+
+def solve(rows: list[list[float]], values: list[float]) -> list[float]:
+    """Least squares by the normal equations, clamping negative terms to zero"""
+    size = len(rows[0])
+    active = list(range(size))
+    while True:
+        matrix = [
+            [sum(row[i] * row[j] for row in rows) for j in active] for i in active
+        ]
+        vector = [
+            sum(row[i] * value for row, value in zip(rows, values)) for i in active
+        ]
+        count = len(active)
+        for col in range(count):
+            pivot = max(range(col, count), key=lambda r: abs(matrix[r][col]))
+            matrix[col], matrix[pivot] = matrix[pivot], matrix[col]
+            vector[col], vector[pivot] = vector[pivot], vector[col]
+            for row in range(count):
+                if row != col and matrix[col][col]:
+                    factor = matrix[row][col] / matrix[col][col]
+                    for k in range(col, count):
+                        matrix[row][k] -= factor * matrix[col][k]
+                    vector[row] -= factor * vector[col]
+        result = [vector[i] / matrix[i][i] if matrix[i][i] else 0 for i in range(count)]
+        negative = [active[i] for i, value in enumerate(result) if value < 0]
+        if not negative:
+            coefficients = [0.0] * size
+            for index, value in zip(active, result):
+                coefficients[index] = value
+            return coefficients
+        active = [index for index in active if index not in negative]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate the cost model")
+    parser.add_argument("--output", type=Path, help="write measurements as JSON")
+    parser.add_argument("--strategy", choices=GRIDS, nargs="+", default=list(GRIDS))
+    args = parser.parse_args()
+
+    table = {}
+    measurements = []
+    for strategy in args.strategy:
+        grid = GRIDS[strategy]
+        for alphabet, dorp in [(DNA, "d"), (PROTEIN, "p")]:
+            rows, times = [], []
+            for count, length in grid:
+                family = Family(
+                    f"{dorp}{count}x{length}", alphabet, count=count, length=length
+                )
+                result = measure(Case(family, strategy, None, 0), repeat=1)
+                stats = dict(nseq=count, nlenmax=length, nlenmin=length, dorp=dorp)
+                measurements.append(dict(result, **stats, strategy=strategy))
+                rows.append(features(strategy, stats))
+                times.append(result["wall"])
+                predicted = peak_memory(strategy, stats)
+                print(
+                    f"{strategy} {family.name:<12} {result['wall']:8.3f}s"
+                    f"  {result['rss'] / MiB:6.0f} MiB"
+                    f"  predicted {predicted / MiB:6.0f} MiB"
+                )
+            table[strategy, dorp] = solve(rows, times)
+
+    if args.output:
+        args.output.write_text(json.dumps(measurements, indent=2) + "\n")
+    print("COEFFICIENTS = {")
+    for (strategy, dorp), time in table.items():
+        names = FEATURES[strategy]
+        terms = ", ".join(f"{n!r}: {c:.4g}" for n, c in zip(names, time))
+        print(f"    ({strategy!r}, {dorp!r}): {{{terms}}},")
+    print("}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Compare cluster-then-merge against aligning everything at once.
+
+The input is a shuffled mixture of synthetic families. Each run reports
+wall time and the sum-of-pairs score of parttree.py.
+
+    python benchmarks/clusters.py --families 8 --count 250 --workers 8
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from parttree import sum_of_pairs
+from synthetic import DNA, PROTEIN, Family, generate
+
+from itaxotools.mafftpy import align, align_clusters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare clustering with a plain run")
+    parser.add_argument("--families", type=int, default=4)
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--length", type=int, default=650)
+    parser.add_argument("--protein", action="store_true")
+    parser.add_argument("--strategy", default="fftnsi")
+    parser.add_argument("--merge", default="fftns2")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    alphabet = PROTEIN if args.protein else DNA
+    records = []
+    for seed in range(args.families):
+        family = Family(
+            f"f{seed}", alphabet, count=args.count, length=args.length, seed=seed
+        )
+        records.extend(generate(family))
+    random.Random(0).shuffle(records)
+
+    runs = dict(
+        plain=lambda: align(records, args.strategy),
+        clusters=lambda: align_clusters(
+            records, args.strategy, args.merge, workers=args.workers
+        ),
+    )
+    for name, run in runs.items():
+        wall = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run()
+        wall = time.perf_counter() - wall
+        score = sum_of_pairs(result, 2000)
+        print(f"{name:<10} wall {wall:8.2f}s  score {score:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compare the FFT backends on long sequences, where anchoring takes most time.
+
+Each backend aligns the same synthetic family with FFT-NS-2. The report
+gives wall time, the sum-of-pairs score of parttree.py, and whether the
+alignment is the same as with the FFT of MAFFT.
+
+    python benchmarks/fft.py --count 50 --length 16000
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from parttree import sum_of_pairs
+from synthetic import DNA, PROTEIN, Family, generate
+
+from itaxotools.mafftpy import align
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the FFT backends")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--length", type=int, default=16000)
+    parser.add_argument("--protein", action="store_true")
+    parser.add_argument("--strategy", default="fftns2")
+    args = parser.parse_args()
+
+    alphabet = PROTEIN if args.protein else DNA
+    family = Family(
+        "f", alphabet, count=args.count, length=args.length, divergence=0.05
+    )
+    records = generate(family)
+
+    reference = None
+    for backend in ["mafft", "fast"]:
+        wall = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = align(records, args.strategy, fftbackend=backend)
+        wall = time.perf_counter() - wall
+        if reference is None:
+            reference = result
+        score = sum_of_pairs(result, 2000)
+        same = "same" if result == reference else "different"
+        print(f"{backend:<6} wall {wall:8.2f}s  score {score:.4f}  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Compare the predicted peak memory of FFT-NS with the measured one.
+
+The same synthetic family is aligned under each memory budget, which may
+select the memory-saving modes. The report gives the modes, the predicted
+and measured peak of the core stages, wall time and the sum-of-pairs score
+of parttree.py. A budget of 0 means no limit.
+
+    python benchmarks/memory.py --count 4000 --length 300 --budgets 0 100 60
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from parttree import sum_of_pairs
+from synthetic import DNA, PROTEIN, Family, generate
+
+from itaxotools.mafftpy import MultipleSequenceAlignment
+
+MiB = 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory estimates")
+    parser.add_argument("--count", type=int, default=4000)
+    parser.add_argument("--length", type=int, default=300)
+    parser.add_argument("--protein", action="store_true")
+    parser.add_argument("--strategy", default="fftns2")
+    parser.add_argument(
+        "--budgets", type=int, nargs="+", default=[0, 100, 60], help="in MiB"
+    )
+    args = parser.parse_args()
+
+    alphabet = PROTEIN if args.protein else DNA
+    family = Family("f", alphabet, count=args.count, length=args.length)
+    records = generate(family)
+
+    for budget in args.budgets:
+        msa = MultipleSequenceAlignment.from_records(
+            records, strategy=args.strategy, memorybudget=budget * MiB
+        )
+        wall = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            msa.start()
+        wall = time.perf_counter() - wall
+        plan = msa.memory
+        modes = [name for name in ("memsavetree", "memopt") if plan[name]]
+        measured = max(metric["rss"] or 0 for metric in msa.metrics)
+        score = sum_of_pairs(msa.get_records(), 2000)
+        print(
+            f"budget {budget:5d} MiB  {' '.join(modes) or 'default':<19}"
+            f"  predicted {plan['memory'] / MiB:6.0f} MiB"
+            f"  measured {measured / MiB:6.0f} MiB"
+            f"  wall {wall:7.2f}s  score {score:.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Compare PartTree against FFT-NS-1 on growing synthetic families.
+
+Each run reports wall time, peak memory and a sum-of-pairs score, which
+is the mean identity of a fixed random sample of aligned sequence pairs.
+FFT-NS-1 is skipped past --fftns1-limit sequences, where its quadratic
+distance matrix no longer fits comfortably in memory.
+
+    python benchmarks/parttree.py --counts 1000 5000 20000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import resource
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from run import environment, measure
+from synthetic import DNA, PROTEIN, Family, generate, to_fasta
+
+from itaxotools.mafftpy import MultipleSequenceAlignment
+
+STRATEGIES = ["fftns1", "parttree", "dpparttree"]
+
+
+@dataclass(frozen=True)
+class Run:
+    family: Family
+    strategy: str
+    partsize: int | None = None
+    groupsize: int | None = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.family.name}/{self.strategy}"
+
+
+def sum_of_pairs(records: list[tuple[str, str]], pairs: int, seed: int = 0) -> float:
+    """Mean fraction of identical residues over sampled pairs of sequences"""
+    rng = random.Random(seed)
+    sequences = [sequence.upper() for _, sequence in records]
+    total = 0.0
+    for _ in range(pairs):
+        a, b = rng.sample(sequences, 2)
+        matches = sum(x == y and x != "-" for x, y in zip(a, b))
+        shorter = min(len(a) - a.count("-"), len(b) - b.count("-"))
+        total += matches / max(shorter, 1)
+    return total / pairs
+
+
+def _measure(run: Run, connection):
+    """Align and score a single family inside a fresh process"""
+    data = to_fasta(generate(run.family))
+    a = MultipleSequenceAlignment.from_records(
+        data, strategy=run.strategy, partsize=run.partsize, groupsize=run.groupsize
+    )
+    with tempfile.TemporaryDirectory(prefix="mafft_") as target:
+        a.target = target
+        before = resource.getrusage(resource.RUSAGE_SELF)
+        wall = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            a.run()
+        wall = time.perf_counter() - wall
+        after = resource.getrusage(resource.RUSAGE_SELF)
+        records = a.get_records()
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    connection.send(
+        dict(
+            wall=wall,
+            cpu=cpu,
+            # Linux reports kilobytes
+            rss=after.ru_maxrss * 1024,
+            score=sum_of_pairs(records, 2000),
+            stages=a.metrics,
+        )
+    )
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PartTree with FFT-NS-1")
+    parser.add_argument("--counts", type=int, nargs="+", default=[500, 2000, 5000])
+    parser.add_argument("--length", type=int, default=650)
+    parser.add_argument("--protein", action="store_true")
+    parser.add_argument("--strategy", choices=STRATEGIES, nargs="+")
+    parser.add_argument("--partsize", type=int)
+    parser.add_argument("--groupsize", type=int)
+    parser.add_argument("--fftns1-limit", type=int, default=20000)
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    args = parser.parse_args()
+
+    alphabet = PROTEIN if args.protein else DNA
+    strategies = args.strategy or STRATEGIES
+    results = dict(environment=environment(), runs={})
+    for count in args.counts:
+        family = Family(f"n{count}", alphabet, count=count, length=args.length)
+        for strategy in strategies:
+            if strategy == "fftns1" and count > args.fftns1_limit:
+                continue
+            run = Run(family, strategy, args.partsize, args.groupsize)
+            result = measure(run, 1, _measure)
+            result["family"] = asdict(family)
+            results["runs"][run.name] = result
+            if "error" in result:
+                print(f"{run.name:<24} {result['error']}")
+                continue
+            print(
+                f"{run.name:<24} wall {result['wall']:8.2f}s"
+                f"  rss {result['rss'] / 2**20:8.1f}MiB  score {result['score']:.4f}"
+            )
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Benchmark the MAFFT core on synthetic data.
+
+Every case runs in a fresh process, which reports its own wall time,
+CPU time and peak resident memory. Results are written as JSON and can
+be compared against a baseline from an earlier run on the same machine:
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --baseline benchmarks/baseline.json
+    python benchmarks/run.py --save benchmarks/baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from synthetic import DNA, PROTEIN, Family, generate, to_fasta
+
+from itaxotools.mafftpy import MultipleSequenceAlignment
+from itaxotools.mafftpy.threads import available_cores
+
+SUITES = {
+    "quick": [
+        Family("dna_small", DNA, count=20, length=300, reversed=0.2),
+        Family("protein_small", PROTEIN, count=20, length=200, divergence=0.2),
+    ],
+    "full": [
+        Family("dna_small", DNA, count=20, length=300, reversed=0.2),
+        Family("protein_small", PROTEIN, count=20, length=200, divergence=0.2),
+        Family("dna_many", DNA, count=200, length=500, reversed=0.2),
+        Family("dna_long", DNA, count=30, length=5000, indels=0.02),
+        Family("protein_divergent", PROTEIN, count=60, length=400, divergence=0.4),
+    ],
+}
+
+STRATEGIES = ["parttree", "fftns1", "fftns2", "fftnsi", "ginsi", "auto"]
+DIRECTIONS = [None, "adjustdirection", "adjustdirectionaccurately"]
+
+
+@dataclass(frozen=True)
+class Case:
+    family: Family
+    strategy: str
+    direction: str | None
+    threads: int
+
+    @property
+    def name(self) -> str:
+        parts = [self.family.name, self.strategy]
+        if self.direction:
+            parts.append(self.direction)
+        parts.append(f"t{self.threads}")
+        return "/".join(parts)
+
+
+def cases(suite: str, threads: list[int]):
+    for family in SUITES[suite]:
+        directions = DIRECTIONS if family.alphabet == DNA else [None]
+        for strategy in STRATEGIES:
+            for direction in directions:
+                for count in threads:
+                    yield Case(family, strategy, direction, count)
+
+
+def _measure(case: Case, connection):
+    """Run a single case inside a fresh process"""
+    data = to_fasta(generate(case.family))
+    kwargs = dict(strategy=case.strategy, thread=case.threads)
+    if case.direction:
+        kwargs[case.direction] = True
+    a = MultipleSequenceAlignment.from_records(data, **kwargs)
+    with tempfile.TemporaryDirectory(prefix="mafft_") as target:
+        a.target = target
+        before = resource.getrusage(resource.RUSAGE_SELF)
+        wall = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            a.run()
+        wall = time.perf_counter() - wall
+        after = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    connection.send(
+        dict(
+            wall=wall,
+            cpu=cpu,
+            # Linux reports kilobytes
+            rss=after.ru_maxrss * 1024,
+            strategy=a.strategy,
+            stages=a.metrics,
+        )
+    )
+    connection.close()
+
+
+def measure(case, repeat: int, target=_measure) -> dict:
+    """Keep the fastest of several runs, along with its memory peak"""
+    context = multiprocessing.get_context("spawn")
+    best = None
+    for _ in range(repeat):
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=target, args=(case, sender))
+        process.start()
+        sender.close()
+        try:
+            result = receiver.recv()
+        except EOFError:
+            result = None
+        process.join()
+        if process.exitcode != 0 or result is None:
+            return dict(error=f"exit code {process.exitcode}")
+        if best is None or result["wall"] < best["wall"]:
+            best = result
+    return best
+
+
+def environment() -> dict:
+    return dict(
+        python=platform.python_version(),
+        platform=platform.platform(),
+        machine=platform.machine(),
+        cores=available_cores(),
+    )
+
+
+def compare(
+    results: dict, baseline: dict, time_threshold: float, rss_threshold: float
+) -> list[str]:
+    """
+    Return a description of every regression. Times below the slack
+    are too noisy to compare, so they are only checked past it.
+    """
+    slack = 0.05
+    regressions = []
+    for name, result in results["cases"].items():
+        base = baseline["cases"].get(name)
+        if base is None or "error" in base:
+            continue
+        if "error" in result:
+            regressions.append(f"{name}: {result['error']}")
+            continue
+        for key, threshold, extra in [
+            ("wall", time_threshold, slack),
+            ("cpu", time_threshold, slack),
+            ("rss", rss_threshold, 0),
+        ]:
+            limit = base[key] * (1 + threshold) + extra
+            if result[key] > limit:
+                ratio = result[key] / base[key] if base[key] else float("inf")
+                regressions.append(
+                    f"{name}: {key} {result[key]:.3f} > {base[key]:.3f} ({ratio:.2f}x)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the MAFFT core")
+    parser.add_argument("--suite", choices=SUITES, default="quick")
+    parser.add_argument("--threads", type=int, nargs="+", default=[0, 2])
+    parser.add_argument("--strategy", choices=STRATEGIES, nargs="+")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--save", type=Path, help="write results as a new baseline")
+    parser.add_argument("--baseline", type=Path, help="compare against this file")
+    parser.add_argument("--time-threshold", type=float, default=0.25)
+    parser.add_argument("--rss-threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = dict(suite=args.suite, environment=environment(), cases={})
+    for case in cases(args.suite, args.threads):
+        if args.strategy and case.strategy not in args.strategy:
+            continue
+        result = measure(case, args.repeat)
+        result["family"] = asdict(case.family)
+        results["cases"][case.name] = result
+        if "error" in result:
+            print(f"{case.name:<56} {result['error']}")
+            continue
+        print(
+            f"{case.name:<56} wall {result['wall']:8.3f}s"
+            f"  cpu {result['cpu']:8.3f}s  rss {result['rss'] / 2**20:7.1f}MiB"
+        )
+
+    for path in [args.output, args.save]:
+        if path is not None:
+            path.write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.baseline is None:
+        return
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("environment") != results["environment"]:
+        print("Warning: the baseline was recorded on a different environment")
+    regressions = compare(results, baseline, args.time_threshold, args.rss_threshold)
+    for line in regressions:
+        print("Regression:", line)
+    if regressions:
+        sys.exit(1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compare the vectorized dynamic programming kernels with the scalar loops.
+
+Each kernel is timed through the stage that spends most of its time in it:
+the G-INS-i pairwise stage for G__align11 and FFT-NS-2 for A__align. The
+scalar loops are selected with MAFFTPY_SIMD=0. Outputs must be identical.
+
+    python benchmarks/simd.py --count 40 --length 1000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+
+from synthetic import DNA, PROTEIN, Family, generate
+
+from itaxotools.mafftpy import align
+from itaxotools.mafftpy.pairtiles import pair_tile
+
+
+def timed(run, simd: bool, repeat: int):
+    os.environ["MAFFTPY_SIMD"] = "1" if simd else "0"
+    best = None
+    for _ in range(repeat):
+        wall = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run()
+        wall = time.perf_counter() - wall
+        best = wall if best is None else min(best, wall)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the DP kernels")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--length", type=int, default=600)
+    parser.add_argument("--protein", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    alphabet = PROTEIN if args.protein else DNA
+    family = Family("f", alphabet, count=args.count, length=args.length)
+    records = generate(family)
+
+    kernels = dict(
+        G__align11=lambda: pair_tile(records, 0, 1, thread=0),
+        A__align=lambda: align(records, "fftns2", thread=0),
+    )
+    for name, run in kernels.items():
+        scalar, scalar_wall = timed(run, False, args.repeat)
+        simd, simd_wall = timed(run, True, args.repeat)
+        same = "same" if scalar == simd else "DIFFERENT"
+        print(
+            f"{name:<12} scalar {scalar_wall:7.2f}s  simd {simd_wall:7.2f}s  "
+            f"speedup {scalar_wall / simd_wall:5.2f}x  {same}"
+        )
+
+
+if __name__ == "__main__":
+    main()
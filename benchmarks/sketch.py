@@ -0,0 +1,80 @@
+"""
+Compare sketch distances with the exact ktuple distances of FFT-NS.
+
+For each sketch size, the distance matrix of a synthetic family is timed and
+compared with the exact one, by Pearson correlation and mean absolute error.
+The family is then aligned with the resulting guide trees, and the report
+gives wall time and the sum-of-pairs score of parttree.py.
+
+    python benchmarks/sketch.py --count 1000 --length 1500 --sizes 256 1024
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy
+from parttree import sum_of_pairs
+from synthetic import DNA, PROTEIN, Family, generate
+
+from itaxotools.mafftpy import MultipleSequenceAlignment, align
+
+
+def timed(run):
+    wall = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = run()
+    return result, time.perf_counter() - wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sketch distances")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--length", type=int, default=1500)
+    parser.add_argument("--protein", action="store_true")
+    parser.add_argument("--divergence", type=float, default=0.2)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 1024, 4096])
+    parser.add_argument("--strategy", default="fftns2")
+    args = parser.parse_args()
+
+    alphabet = PROTEIN if args.protein else DNA
+    family = Family(
+        "f",
+        alphabet,
+        count=args.count,
+        length=args.length,
+        divergence=args.divergence,
+    )
+    records = generate(family)
+
+    def distances(**kwargs):
+        msa = MultipleSequenceAlignment.from_records(
+            records, strategy=args.strategy, **kwargs
+        )
+        return numpy.array(msa.distances())
+
+    exact, exact_wall = timed(distances)
+    result, wall = timed(lambda: align(records, args.strategy))
+    score = sum_of_pairs(result, 2000)
+    print(
+        f"{'ktuples':<12} distances {exact_wall:7.2f}s"
+        f"{'':<30} align {wall:7.2f}s  score {score:.4f}"
+    )
+
+    for size in args.sizes:
+        kwargs = dict(distance="sketch", sketchsize=size)
+        sketch, sketch_wall = timed(lambda: distances(**kwargs))
+        pearson = numpy.corrcoef(exact, sketch)[0, 1]
+        error = numpy.abs(exact - sketch).mean()
+        result, wall = timed(lambda: align(records, args.strategy, **kwargs))
+        score = sum_of_pairs(result, 2000)
+        print(
+            f"{'sketch ' + str(size):<12} distances {sketch_wall:7.2f}s"
+            f"  pearson {pearson:.4f}  error {error:.4f}"
+            f"  align {wall:7.2f}s  score {score:.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
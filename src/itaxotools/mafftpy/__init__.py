@@ -1,9 +1,36 @@
-from .core import MultipleSequenceAlignment, auto, fftns1, ginsi, quick
+from .cache import PairCache, ResultCache, get_cache, set_cache
+from .clusters import align_clusters
+from .core import (
+    MultipleSequenceAlignment,
+    align,
+    align_async,
+    auto,
+    fftns1,
+    fftns2,
+    fftnsi,
+    ginsi,
+    quick,
+)
+from .pairtiles import align_tiled
+from .pool import MafftPool
+from .progress import ProgressEvent
 
 __all__ = [
+    "MafftPool",
     "MultipleSequenceAlignment",
+    "PairCache",
+    "ProgressEvent",
+    "ResultCache",
+    "align",
+    "align_clusters",
+    "align_async",
+    "align_tiled",
     "auto",
     "fftns1",
+    "fftns2",
+    "fftnsi",
     "ginsi",
+    "get_cache",
     "quick",
+    "set_cache",
 ]
@@ -4,6 +4,16 @@ import argparse
 from pathlib import Path
 
 from . import core
+from .costs import ACCURACY
+
+
+def size(text: str) -> int:
+    """Parse a size in bytes, with an optional K, M or G suffix"""
+    units = dict(K=2**10, M=2**20, G=2**30)
+    unit = units.get(text[-1:].upper(), 1)
+    if unit > 1:
+        text = text[:-1]
+    return int(float(text) * unit)
 
 
 def parse_arguments(ask_strategy: bool = False):
@@ -12,10 +22,99 @@ def parse_arguments(ask_strategy: bool = False):
     parser.add_argument("input", type=Path)
     parser.add_argument("output", type=Path, nargs="?")
     if ask_strategy:
-        strategies = ["auto", "ginsi", "fftns1"]
+        strategies = [
+            "auto",
+            "ginsi",
+            "fftnsi",
+            "fftns2",
+            "fftns1",
+            "parttree",
+            "dpparttree",
+        ]
         parser.add_argument("--strategy", type=str, choices=strategies, default="auto")
     parser.add_argument("--adjustdirection", action="store_true")
     parser.add_argument("--adjustdirectionaccurately", action="store_true")
+    parser.add_argument(
+        "--thread", type=int, help="threads for the pair stage, -1 to detect cores"
+    )
+    parser.add_argument("--threadtb", type=int, help="threads for the tree stage")
+    parser.add_argument("--threadit", type=int, help="threads for the iteration stage")
+    parser.add_argument(
+        "--partsize", type=int, help="sequences picked at each PartTree split"
+    )
+    parser.add_argument(
+        "--groupsize", type=int, help="largest PartTree group to align, -1 for all"
+    )
+    add = parser.add_mutually_exclusive_group()
+    add.add_argument(
+        "--add", type=Path, help="add these sequences to the aligned input"
+    )
+    add.add_argument(
+        "--addfragments", type=Path, help="add these fragments to the aligned input"
+    )
+    add.add_argument(
+        "--addfull", type=Path, help="add these, possibly longer, sequences"
+    )
+    parser.add_argument(
+        "--keeplength",
+        action="store_true",
+        help="delete insertions of the added sequences",
+    )
+    parser.add_argument(
+        "--treein", type=Path, help="align along this Newick guide tree"
+    )
+    parser.add_argument(
+        "--treeout", type=Path, help="write the guide tree in Newick format"
+    )
+    parser.add_argument(
+        "--merge", type=Path, help="merge the subalignments listed in this table"
+    )
+    parser.add_argument(
+        "--dedup", action="store_true", help="align identical sequences only once"
+    )
+    parser.add_argument(
+        "--timebudget", type=float, help="seconds allowed to the auto strategy"
+    )
+    parser.add_argument(
+        "--memorybudget",
+        type=size,
+        help="memory allowed to the run, by default the cgroup limit",
+    )
+    parser.add_argument(
+        "--accuracy", choices=ACCURACY, help="least accurate strategy allowed"
+    )
+    parser.add_argument(
+        "--refinebudget", type=float, help="seconds allowed to iterative refinement"
+    )
+    parser.add_argument(
+        "--refinegain",
+        type=float,
+        help="stop refinement when an iteration improves the score by less",
+    )
+    parser.add_argument(
+        "--paircache", type=Path, help="reuse G-INS-i pairwise alignments from here"
+    )
+    parser.add_argument(
+        "--fftbackend",
+        choices=["mafft", "fast"],
+        help="FFT used to find anchors, 'fast' may change results by rounding",
+    )
+    parser.add_argument(
+        "--distance",
+        choices=["ktuples", "sketch"],
+        help="ktuple distances of FFT-NS, 'sketch' estimates them from MinHash sketches",
+    )
+    parser.add_argument(
+        "--sketchsize", type=int, help="bins per sketch, implies --distance sketch"
+    )
+    parser.add_argument(
+        "--estimate",
+        action="store_true",
+        help="print the predicted peak memory as JSON and exit",
+    )
+    parser.add_argument(
+        "--metrics", type=Path, help="write stage metrics as JSON, '-' for stdout"
+    )
     kwargs = vars(parser.parse_args())
     input = kwargs.pop("input")
     output = kwargs.pop("output")
@@ -37,6 +136,16 @@ def fftns1():
     core.fftns1(input, output, **kwargs)
 
 
+def fftns2():
+    input, output, kwargs = parse_arguments()
+    core.fftns2(input, output, **kwargs)
+
+
+def fftnsi():
+    input, output, kwargs = parse_arguments()
+    core.fftnsi(input, output, **kwargs)
+
+
 def main():
     input, output, kwargs = parse_arguments(ask_strategy=True)
     core.quick(input, output, **kwargs)
@@ -0,0 +1,320 @@
+# -----------------------------------------------------------------------------
+# MAFFTpy - Multiple sequence alignment with MAFFT
+# Copyright (C) 2021  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Content-addressed caches of alignment results and pairwise alignments"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+try:
+    _version = version("itaxotools-mafftpy")
+except PackageNotFoundError:
+    _version = "unknown"
+
+# Variables that do not affect the alignment
+_ignored_vars = {"progressfile", "infilename", "paircache", "paircachesize"}
+
+# Variables that do not affect the guide tree
+_tree_ignored_vars = _ignored_vars | {
+    "iterate",
+    "numthreadsit",
+    "refinebudget",
+    "refinegain",
+    "treeout",
+    "treein",
+    "treeinopt",
+    "guidetree",
+}
+
+
+class ResultCache:
+    """
+    Store aligned output on disk, keyed by the hash of the trimmed input
+    and the alignment variables. Guide trees are stored too, so that jobs
+    that only differ after the tree stage can skip building it.
+    Entries are written atomically, so that several processes can share
+    the same directory. When the total size
+    exceeds max_size bytes, the least recently used entries are removed.
+    """
+
+    def __init__(self, path: Path, max_size: int = 2**30):
+        self.path = Path(path)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.tree_hits = 0
+        self.tree_misses = 0
+        self._lock = threading.Lock()
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(data: bytes, vars, ignored: set[str] = _ignored_vars) -> str:
+        """Hash the input and every variable that may change the result"""
+        items = sorted(
+            (name, repr(value))
+            for name, value in vars.__dict__.items()
+            if name not in ignored
+        )
+        hash = hashlib.sha256()
+        hash.update(_version.encode())
+        hash.update(json.dumps(items).encode())
+        hash.update(data)
+        return hash.hexdigest()
+
+    @classmethod
+    def tree_key(cls, data: bytes, vars) -> str:
+        """Hash the input and every variable that may change the guide tree"""
+        return cls.key(b"tree\n" + data, vars, _tree_ignored_vars)
+
+    def _entry(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}.json"
+
+    def _read(self, key: str) -> dict | None:
+        entry = self._entry(key)
+        try:
+            state = json.loads(entry.read_text())
+            os.utime(entry)
+        except (OSError, ValueError):
+            state = None
+        return state
+
+    def get(self, key: str) -> dict | None:
+        """Return the stored state for the key, or None on a miss"""
+        state = self._read(key)
+        with self._lock:
+            if state is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return state
+
+    def get_tree(self, key: str) -> str | None:
+        """Return the stored Newick tree for the key, or None on a miss"""
+        state = self._read(key)
+        with self._lock:
+            if state is None:
+                self.tree_misses += 1
+            else:
+                self.tree_hits += 1
+        return None if state is None else state["tree"]
+
+    def put_tree(self, key: str, tree: str):
+        self.put(key, dict(tree=tree))
+
+    def put(self, key: str, state: dict):
+        """Atomically store the state, then evict old entries if needed"""
+        entry = self._entry(key)
+        entry.parent.mkdir(exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=entry.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as file:
+                json.dump(state, file)
+            os.replace(temp, entry)
+        except BaseException:
+            os.remove(temp)
+            raise
+        self.evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for directory in self.path.iterdir():
+            if not directory.is_dir():
+                continue
+            for entry in directory.glob("*.json"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry))
+        return entries
+
+    def size(self) -> int:
+        """Total size of all entries in bytes"""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Remove least recently used entries until under the size limit"""
+        _evict(self._entries(), self.max_size)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                tree_hits=self.tree_hits,
+                tree_misses=self.tree_misses,
+            )
+
+
+class PairCache:
+    """
+    Store the pairwise alignments and distances of G-INS-i on disk, keyed
+    by the hashes of both sequences and the options of the pair stage, so
+    that a changed dataset only aligns the pairs with new sequences. The
+    pairs of each first sequence are kept in one file that is only ever
+    appended to, so that several processes can share the same directory.
+    When the total size exceeds max_size bytes, the least recently used
+    files are removed.
+    """
+
+    def __init__(self, path: Path, max_size: int = 2**30):
+        self.path = Path(path)
+        self.max_size = max_size
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def namespace(options: dict, type: str) -> str:
+        """Hash the options that may change a pair, and the sequence type"""
+        items = sorted((name, repr(value)) for name, value in options.items())
+        hash = hashlib.sha256()
+        hash.update(_version.encode())
+        hash.update(json.dumps([type, items]).encode())
+        return hash.hexdigest()[:32]
+
+    @staticmethod
+    def sequence_key(sequence: str) -> str:
+        return hashlib.sha256(sequence.encode()).hexdigest()[:32]
+
+    def _entry(self, namespace: str, key: str) -> Path:
+        return self.path / namespace / key[:2] / f"{key}.pairs"
+
+    def _read(self, namespace: str, key: str) -> dict[str, str]:
+        """The stored pairs of a first sequence, by the key of the second"""
+        entry = self._entry(namespace, key)
+        try:
+            text = entry.read_text()
+            os.utime(entry)
+        except OSError:
+            return {}
+        pairs = {}
+        # The last line may still be written by another process
+        for line in text.split("\n")[:-1]:
+            partner, _, pair = line.partition(" ")
+            head, *entries = pair.split(";")
+            if head.split()[1:] == [str(len(entries))]:
+                pairs.setdefault(partner, pair)
+        return pairs
+
+    def load(self, namespace: str, keys: list[str], type: str) -> tuple[bytes, int]:
+        """
+        Return a pair tile for pairlocalalign with the stored pairs among
+        the sequences with the given keys, and the number of such pairs.
+        """
+        lines = [type + "\n"]
+        count = 0
+        stored = {}
+        for i, key in enumerate(keys):
+            if key not in stored:
+                stored[key] = self._read(namespace, key)
+            pairs = stored[key]
+            if not pairs:
+                continue
+            for j in range(i + 1, len(keys)):
+                pair = pairs.get(keys[j])
+                if pair is None:
+                    continue
+                head, *entries = pair.split(";")
+                lines.append(f"{i} {j} {head}\n")
+                lines.extend(entry + "\n" for entry in entries)
+                count += 1
+        return "".join(lines).encode(), count
+
+    def store(self, namespace: str, keys: list[str], tile: bytes) -> int:
+        """Append the pairs of a tile written by pairlocalalign, return their number"""
+        lines = tile.decode().splitlines()[1:]
+        pairs = {}
+        count = 0
+        position = 0
+        while position < len(lines):
+            i, j, dist, size = lines[position].split()
+            entries = lines[position + 1 : position + 1 + int(size)]
+            position += 1 + int(size)
+            line = " ".join([keys[int(j)], dist, size])
+            pairs.setdefault(keys[int(i)], []).append(";".join([line] + entries) + "\n")
+            count += 1
+        for key, records in pairs.items():
+            entry = self._entry(namespace, key)
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(entry, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, "".join(records).encode())
+            finally:
+                os.close(fd)
+        self.evict()
+        return count
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for entry in self.path.glob("*/*/*.pairs"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        return entries
+
+    def size(self) -> int:
+        """Total size of all entries in bytes"""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Remove least recently used entries until under the size limit"""
+        _evict(self._entries(), self.max_size)
+
+
+def _evict(entries: list[tuple[float, int, Path]], max_size: int):
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries):
+        if total <= max_size:
+            break
+        try:
+            entry.unlink()
+        except OSError:
+            continue
+        total -= size
+
+
+def sequence_type(sequences: list[str]) -> str:
+    """Predict the type that the core detects: "d" for nucleotides, "p" otherwise"""
+    nucleotides = 0
+    total = 0
+    for sequence in sequences:
+        if total >= 1000000:
+            break
+        sequence = sequence.lower()
+        nucleotides += sum(sequence.count(c) for c in "atgcun")
+        total += sum(c.isascii() and c.isalpha() for c in sequence)
+    return "d" if total and nucleotides / total > 0.75 else "p"
+
+
+_cache: ResultCache | None = None
+
+
+def set_cache(cache: ResultCache | None):
+    """Enable caching for every alignment, or disable it with None"""
+    global _cache
+    _cache = cache
+
+
+def get_cache() -> ResultCache | None:
+    return _cache
@@ -0,0 +1,146 @@
+# -----------------------------------------------------------------------------
+# MAFFTpy - Multiple sequence alignment with MAFFT
+# Copyright (C) 2021  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Align clusters of similar sequences in parallel, then merge them"""
+
+import math
+from collections import Counter, defaultdict
+
+from .core import (
+    MultipleSequenceAlignment,
+    Records,
+    Strategy,
+    records_from_text,
+    records_to_bytes,
+)
+from .pool import MafftPool
+from .threads import available_cores
+
+_gaps = str.maketrans("", "", "-. \t\r\n")
+
+
+def _kmers(sequence: str, k: int) -> set[str]:
+    return {sequence[i : i + k] for i in range(len(sequence) - k + 1)}
+
+
+def kmer_clusters(
+    records: Records,
+    threshold: float = 0.2,
+    size: int | None = None,
+    k: int | None = None,
+) -> list[list[int]]:
+    """
+    Greedy clustering by the fraction of shared k-mers. Starting from the
+    longest, each sequence joins the most similar cluster leader at or above
+    the threshold, or leads a new cluster. Clusters larger than size are
+    split. Return the positions in each cluster, ordered by their first one.
+    """
+    sequences = [sequence.translate(_gaps).upper() for _, sequence in records]
+    if k is None:
+        letters = Counter()
+        for sequence in sequences:
+            letters.update(sequence)
+        nucleotides = sum(letters[c] for c in "ACGTUN")
+        k = 6 if nucleotides >= 0.9 * sum(letters.values()) else 3
+    kmers = [_kmers(sequence, k) for sequence in sequences]
+    leaders = []
+    members = []
+    # Clusters whose leader contains each k-mer
+    index = defaultdict(list)
+    for position in sorted(range(len(sequences)), key=lambda i: -len(sequences[i])):
+        hits = Counter()
+        for kmer in kmers[position]:
+            hits.update(index.get(kmer, ()))
+        scores = [
+            (shared / max(1, min(len(kmers[position]), len(kmers[leaders[c]]))), -c)
+            for c, shared in hits.items()
+        ]
+        score, best = max(scores, default=(0.0, None))
+        if best is None or score < threshold:
+            for kmer in kmers[position]:
+                index[kmer].append(len(leaders))
+            leaders.append(position)
+            members.append([position])
+        else:
+            members[-best].append(position)
+    clusters = []
+    for cluster in members:
+        step = size or len(cluster)
+        for start in range(0, len(cluster), step):
+            clusters.append(sorted(cluster[start : start + step]))
+    return sorted(clusters)
+
+
+def align_clusters(
+    records: Records | bytes,
+    strategy: Strategy = "auto",
+    merge: Strategy = "fftns2",
+    workers: int | None = None,
+    threshold: float = 0.2,
+    size: int | None = None,
+    **kwargs,
+) -> list[tuple[str, str]]:
+    """
+    Divide the input with kmer_clusters(), align each cluster with the given
+    strategy in a pool of workers, then merge the subalignments, which are
+    kept fixed, together with any unclustered sequences. By default, clusters
+    are split so that every worker gets one. Return the pairs in input order.
+    """
+    if isinstance(records, (bytes, bytearray, memoryview)):
+        records = records_from_text(records_to_bytes(records).decode())
+    records = list(records)
+    if workers is None:
+        workers = available_cores()
+    if size is None:
+        size = max(2, math.ceil(len(records) / workers))
+    clusters = kmer_clusters(records, threshold, size)
+    groups = [cluster for cluster in clusters if len(cluster) > 1]
+
+    with MafftPool(workers) as pool:
+        jobs = [
+            MultipleSequenceAlignment.from_records(
+                [records[i] for i in cluster], strategy=strategy, **kwargs
+            )
+            for cluster in groups
+        ]
+        subalignments = [job.get_records() for job in pool.map(jobs)]
+    if len(groups) == 1 and len(clusters) == 1:
+        return subalignments[0]
+
+    # Subalignments first, then the unclustered sequences
+    order = []
+    input = []
+    table = []
+    for cluster, subalignment in zip(groups, subalignments):
+        table.append(" ".join(str(len(order) + i + 1) for i in range(len(cluster))))
+        order.extend(cluster)
+        input.extend(subalignment)
+    for cluster in clusters:
+        if len(cluster) == 1:
+            order.extend(cluster)
+            input.append(records[cluster[0]])
+    job = MultipleSequenceAlignment.from_records(input, strategy=merge, **kwargs)
+    if table:
+        job.vars.set_merge("".join(line + "\n" for line in table))
+    job.start()
+    merged = job.get_records()
+
+    result = [None] * len(records)
+    for position, record in zip(order, merged):
+        result[position] = record
+    return result
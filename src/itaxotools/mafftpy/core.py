@@ -17,19 +17,38 @@
 # -----------------------------------------------------------------------------
 
 
+import asyncio
+import copy
+import io
+import json
 import os
 import re
 import shutil
 import tempfile
 from contextlib import contextmanager
-from multiprocessing import Process
+from dataclasses import asdict
+from multiprocessing import Pipe, Process
 from pathlib import Path
-from typing import Literal
+from typing import Iterable, Literal
 
 from itaxotools import _mafft
-from itaxotools.common.io import redirect
 
-Strategy = Literal["auto", "ginsi", "fftns1"]
+from .cache import PairCache, get_cache, sequence_type
+from .costs import ACCURACY, DEFAULT_TIME_BUDGET, SKETCH_STRATEGIES, choose
+from .duplicates import Duplicates, collapse, expand, expand_tree, prune_tree
+from .memory import memory_limit, plan_memory
+from .metrics import measure
+from .progress import ProgressEvent, ProgressParser
+from .threads import resolve_threads
+from .tree import from_core, to_core
+
+Strategy = Literal[
+    "auto", "ginsi", "fftnsi", "fftns2", "fftns1", "parttree", "dpparttree"
+]
+Records = Iterable[tuple[str, str]]
+
+# Distance matrices at least this large are memory-mapped
+MMAP_THRESHOLD = 2**27
 
 
 @contextmanager
@@ -43,6 +62,88 @@ def pushd(target):
         os.chdir(re)
 
 
+@contextmanager
+def fft_backend(backend: Literal["mafft", "fast"]):
+    """Temporarily select the FFT of the MAFFT core, which reads MAFFTPY_FFT"""
+    previous = os.environ.get("MAFFTPY_FFT")
+    if backend == "fast":
+        os.environ["MAFFTPY_FFT"] = "fast"
+    else:
+        os.environ.pop("MAFFTPY_FFT", None)
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("MAFFTPY_FFT", None)
+        else:
+            os.environ["MAFFTPY_FFT"] = previous
+
+
+def records_to_bytes(records: Records | bytes) -> bytes:
+    """Convert (id, sequence) pairs into FASTA, trimming carriage returns"""
+    if isinstance(records, (bytes, bytearray, memoryview)):
+        return bytes(records).replace(b"\r", b"")
+    buffer = io.StringIO()
+    for id, sequence in records:
+        buffer.write(f">{id}\n{sequence}\n")
+    return buffer.getvalue().replace("\r", "").encode()
+
+
+def records_from_text(text: str) -> list[tuple[str, str]]:
+    """Parse FASTA text into (id, sequence) pairs"""
+    records = []
+    id = None
+    chunks = []
+    for line in text.splitlines():
+        if line.startswith(">"):
+            if id is not None:
+                records.append((id, "".join(chunks)))
+            id = line[1:].strip()
+            chunks = []
+        elif id is not None:
+            chunks.append(line.strip())
+    if id is not None:
+        records.append((id, "".join(chunks)))
+    return records
+
+
+@contextmanager
+def feed(module, stream="stdin", data: bytes | None = None):
+    """Temporarily replace a module's input stream with a bytes buffer"""
+    if data is None:
+        yield
+        return
+    original = getattr(module, stream)
+    setattr(module, stream, data)
+    try:
+        yield
+    finally:
+        setattr(module, stream, original)
+
+
+@contextmanager
+def sink(module, stream="stdout", dest=None, mode="w"):
+    """
+    Point a module stream to a native sink of the core, according to `dest`:
+    - If None: Discard output without formatting it
+    - If String or Path: Open file and write to its descriptor
+    - Else: Assume bytearray, file descriptor or IOWrapper, use as is
+    """
+    fd = None
+    if isinstance(dest, str) or isinstance(dest, Path):
+        flags = os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        flags |= os.O_APPEND if mode == "a" else os.O_TRUNC
+        fd = dest = os.open(dest, flags, 0o666)
+    original = getattr(module, stream)
+    setattr(module, stream, dest)
+    try:
+        yield dest
+    finally:
+        setattr(module, stream, original)
+        if fd is not None:
+            os.close(fd)
+
+
 class MafftVars:
     """Variables used by MAFFT core"""
 
@@ -144,6 +245,7 @@ class MafftVars:
         self.partsize = 50
         self.partdist = "ktuples"
         self.partorderopt = " -x "
+        self.splitopt = "  "
         self.treeout = 0
         self.nodeout = 0
         self.distout = 0
@@ -160,6 +262,10 @@ class MafftVars:
         self.scorematrix = "/dev/null"
         self.textmatrix = "/dev/null"
         self.treeinfile = "/dev/null"
+        self.guidetree = None
+        self.dedup = 0
+        self.refinebudget = 0.0
+        self.refinegain = 0.0
         self.codonposfile = "/dev/null"
         self.codonscorefile = "/dev/null"
         self.rnascoremtx = " "
@@ -173,6 +279,10 @@ class MafftVars:
         self.numthreads = 0
         self.numthreadsit = -1
         self.numthreadstb = -1
+        self.threadlimit = 0
+        self.timebudget = 0.0
+        self.memorybudget = 0
+        self.accuracy = None
         self.randomseed = 0
         self.addfile = "/dev/null"
         self.addarg0 = " "
@@ -184,7 +294,18 @@ class MafftVars:
         self.legacygapopt = " "
         self.oneiterationopt = " "
         self.mergetable = "/dev/null"
+        self.subalignments = None
         self.mergearg = " "
+        self.pairtile = None
+        self.pairtiles = None
+        self.pairtilearg = " "
+        self.paircache = None
+        self.paircachesize = 2**30
+        self.fftbackend = "mafft"
+        self.sketchsize = 0
+        self.sketcharg = " "
+        self.memsavetree = 0
+        self.estimateonly = 0
         self.seedoffset = 0
         self.outnum = " "
         self.last_e = 5000
@@ -225,6 +346,8 @@ class MafftVars:
 
     def update_from_arguments(self, **kwargs):
         for key, value in kwargs.items():
+            if value is None or value is False:
+                continue
             match key:
                 case "strategy":
                     self.set_strategy(value)
@@ -232,6 +355,44 @@ class MafftVars:
                     self.set_adjust_direction(1)
                 case "adjustdirectionaccurately":
                     self.set_adjust_direction(2)
+                case "thread":
+                    self.set_threads(thread=value)
+                case "threadtb":
+                    self.set_threads(threadtb=value)
+                case "threadit":
+                    self.set_threads(threadit=value)
+                case "timebudget" | "memorybudget" | "accuracy":
+                    self.set_budget(**{key: value})
+                case "refinebudget":
+                    self.set_refinement(budget=value)
+                case "refinegain":
+                    self.set_refinement(gain=value)
+                case "partsize" | "groupsize":
+                    self.set_partition(**{key: value})
+                case "add" | "addfragments" | "addfull":
+                    self.set_add(value, mode=key)
+                case "keeplength":
+                    self.set_keeplength()
+                case "tree":
+                    self.set_guide_tree(value)
+                case "treein":
+                    self.set_guide_tree(Path(value).read_text())
+                case "treeout":
+                    self.treeout = 1
+                case "dedup":
+                    self.dedup = 1
+                case "merge":
+                    self.set_merge(Path(value).read_text())
+                case "pairtiles":
+                    self.set_pair_tiles(value)
+                case "paircache":
+                    self.set_pair_cache(value)
+                case "fftbackend":
+                    self.set_fft_backend(value)
+                case "distance":
+                    self.set_ktuple_distance(value, self.sketchsize or 1024)
+                case "sketchsize":
+                    self.set_ktuple_distance("sketch", value)
 
     def set_strategy(self, value: Strategy):
         match value:
@@ -243,15 +404,216 @@ class MafftVars:
                 self.cycle = 1
                 self.iterate = 1000
                 self.distance = "global"
+            case "fftnsi":
+                self.auto = 0
+                self.fft = 1
+                self.cycle = 2
+                self.iterate = 1000
+                self.distance = "ktuples"
+            case "fftns2":
+                self.auto = 0
+                self.fft = 1
+                self.cycle = 2
+                self.iterate = 0
+                self.distance = "ktuples"
             case "fftns1":
                 self.auto = 0
                 self.fft = 1
                 self.cycle = 1
+                self.iterate = 0
                 self.distance = "ktuples"
+            case "parttree":
+                self.auto = 0
+                self.fft = 1
+                self.cycle = 2
+                self.iterate = 0
+                self.distance = "parttree"
+                self.partdist = "ktuples"
+            case "dpparttree":
+                self.auto = 0
+                self.fft = 1
+                self.cycle = 1
+                self.iterate = 0
+                self.distance = "parttree"
+                self.partdist = "localalign"
+
+    def get_strategy(self) -> Strategy:
+        """The strategy that the current distance and cycles amount to"""
+        if self.distance == "global":
+            return "ginsi"
+        if self.distance == "parttree":
+            return "parttree"
+        if self.iterate > 0:
+            return "fftnsi"
+        if self.cycle == 1:
+            return "fftns1"
+        return "fftns2"
 
     def set_adjust_direction(self, value: Literal[0, 1, 2]):
         self.adjustdirection = value
 
+    def set_budget(
+        self,
+        timebudget: float | None = None,
+        memorybudget: int | None = None,
+        accuracy: Strategy | None = None,
+    ):
+        """
+        Limits for the auto strategy: predicted seconds and bytes,
+        and the least accurate strategy that is acceptable. The memory
+        budget also selects the memory-saving modes of FFT-NS, in place
+        of the limit of the cgroup.
+        """
+        if timebudget is not None:
+            self.timebudget = timebudget
+        if memorybudget is not None:
+            self.memorybudget = memorybudget
+        if accuracy is not None:
+            self.accuracy = accuracy
+
+    def set_refinement(self, budget: float | None = None, gain: float | None = None):
+        """
+        Stop the iterative refinement after the given seconds, or after an
+        iteration that improved the sum-of-pairs score by less than the given
+        fraction. The best alignment so far is kept. Use 0 for no limit.
+        """
+        if budget is not None:
+            self.refinebudget = budget
+        if gain is not None:
+            self.refinegain = gain
+
+    def set_partition(self, partsize: int | None = None, groupsize: int | None = None):
+        """
+        Controls for PartTree: the number of sequences picked at each split,
+        and the largest group that is aligned, or -1 for a single alignment.
+        With a group size, each group is aligned on its own, so rows of
+        different groups may differ in length. Rows keep the input order,
+        and each name is prefixed by its group as "Group-N ", or by
+        "Group-para " for sequences that fall between groups.
+        """
+        if partsize is not None:
+            self.partsize = partsize
+        if groupsize is not None:
+            self.groupsize = groupsize
+
+    def set_add(
+        self,
+        path: Path,
+        mode: Literal["add", "addfragments", "addfull"] = "add",
+    ):
+        """
+        Add the sequences in path to the input, which must be aligned
+        and is kept fixed. Fragments are aligned one by one to the existing
+        alignment, while full-length sequences may also be longer than it.
+        """
+        self.addfile = str(path)
+        self.addarg0 = "-K -I"
+        self.fragment = dict(add=0, addfragments=1, addfull=-1)[mode]
+
+    def set_keeplength(self):
+        """Delete insertions of the added sequences, to keep the alignment length"""
+        self.add2ndhalfarg = " -Y "
+
+    def set_guide_tree(self, newick: str):
+        """
+        Align along the given Newick tree, which must contain every input
+        sequence and have branch lengths, instead of building one.
+        """
+        self.guidetree = newick
+        self.treein = 1
+        self.treeinopt = " -U "
+
+    def set_merge(self, table: str):
+        """
+        Merge the subalignments in the input, which are kept fixed.
+        Each line of the table lists the positions of the members
+        of one subalignment, counting from 1. Other sequences are aligned.
+        """
+        self.subalignments = table
+        self.mergearg = f"-H {self.seedoffset}"
+
+    def set_pair_tile(self, index: int, count: int):
+        """
+        Only compute one of count tiles of about the same size of the
+        pairwise alignments of G-INS-i, then stop. The tile is kept in
+        MultipleSequenceAlignment.tile, as bytes for set_pair_tiles().
+        """
+        if not 0 <= index < count:
+            raise ValueError(f"Tile {index} does not exist among {count}.")
+        self.pairtile = index
+        self.pairtilearg = f"-W {index}/{count}"
+
+    def set_pair_tiles(self, tiles: list[bytes]):
+        """
+        Read the pairwise alignments of G-INS-i from all tiles, as computed
+        by set_pair_tile() with the same input and options.
+        """
+        self.pairtiles = list(tiles)
+        self.pairtilearg = f"-X {len(self.pairtiles)}"
+
+    def set_pair_cache(self, path: Path, max_size: int = 2**30):
+        """
+        Reuse the pairwise alignments of G-INS-i that are stored in the
+        given directory, and store the new ones there.
+        """
+        self.paircache = str(path)
+        self.paircachesize = max_size
+
+    def set_fft_backend(self, backend: Literal["mafft", "fast"]):
+        """
+        Use the FFT of MAFFT for the anchors of group alignments, or a faster
+        one with exact twiddle factors, which may change results by rounding.
+        """
+        if backend not in ("mafft", "fast"):
+            raise ValueError(f"Unknown FFT backend {backend!r}.")
+        self.fftbackend = backend
+
+    def set_ktuple_distance(
+        self, distance: Literal["ktuples", "sketch"], sketchsize: int = 1024
+    ):
+        """
+        Count the ktuples that each pair of sequences has in common, or
+        estimate it from MinHash sketches of sketchsize bins, which is
+        faster for many long sequences. Only used by FFT-NS-1, 2 and i.
+        """
+        if distance not in ("ktuples", "sketch"):
+            raise ValueError(f"Unknown ktuple distance {distance!r}.")
+        if distance == "ktuples":
+            self.sketchsize = 0
+            self.sketcharg = " "
+            return
+        if sketchsize < 1:
+            raise ValueError("Sketches must hold at least one tuple.")
+        self.sketchsize = sketchsize
+        self.sketcharg = f"-+ {sketchsize}"
+
+    def set_distance_only(self):
+        """
+        Stop after the distance stage, which writes the condensed matrix
+        as float32 to the "bindist" file.
+        """
+        self.distout = 1
+        self.distformat = "bindist"
+        self.cycle = 0
+        self.iterate = 0
+
+    def set_threads(
+        self,
+        thread: int | None = None,
+        threadtb: int | None = None,
+        threadit: int | None = None,
+    ):
+        """
+        Threads for the pair, tree and iteration stages respectively.
+        Use -1 to detect the available cores, or 0 to disable threading.
+        """
+        if thread is not None:
+            self.numthreads = thread
+        if threadtb is not None:
+            self.numthreadstb = threadtb
+        if threadit is not None:
+            self.numthreadsit = threadit
+
 
 class MultipleSequenceAlignment:
     """
@@ -260,13 +622,41 @@ class MultipleSequenceAlignment:
 
     def __init__(self, input: Path = None, **kwargs):
         self.file = input
+        self.data = None
+        self.output = None
+        self.strategy = None
         self.target = None
         self.results = None
         self.log = None
+        self.metrics = []
+        self.choice = None
+        self.memory = None
+        self.tree = None
+        self.skipped = []
+        self.collapsed = 0
+        self.scores = []
+        self.tile = None
+        self.reused_pairs = 0
+        self.progress = None
+        self._cached_tree = None
+        self._tree_key = None
+        self._parser = None
         self.vars = MafftVars(**kwargs)
 
+    @classmethod
+    def from_records(cls, records: Records | bytes, **kwargs):
+        """Align the given (id, sequence) pairs or FASTA bytes in memory"""
+        self = cls(None, **kwargs)
+        self.data = records_to_bytes(records)
+        return self
+
     def __getstate__(self):
-        return self.__dict__
+        # The temporary directory belongs to the parent process
+        state = dict(self.__dict__)
+        state.pop("_temp", None)
+        # Callbacks stay in the parent, the child only needs to know
+        state["progress"] = self.progress is not None
+        return state
 
     def __setstate__(self, state):
         self.__dict__ = state
@@ -276,12 +666,38 @@ class MultipleSequenceAlignment:
         """Convert strings into kwargs accepted by the module"""
         res = dict()
         for item in list:
-            for var in re.finditer(r"-([+a-zA-Z])\s*([^-\s]*)?", item):
+            for var in re.finditer(r"-([+a-zA-Z])\s*(-?\d[^\s]*|[^-\s]*)?", item):
                 key = var.group(1)
                 val = None if var.group(2) == "" else var.group(2)
                 res[key] = val
         return res
 
+    def _splittbfast(self, input_kwargs: dict, **kwargs):
+        v = self.vars
+        _mafft.splittbfast(
+            **input_kwargs,
+            **kwargs,
+            f="-" + v.gop,
+            Q=v.spfactor,
+            h=v.aof,
+            p=v.partsize,
+            s=v.groupsize,
+            **self._vars_to_kwargs(
+                [
+                    v.legacygapopt,
+                    v.algopt,
+                    v.splitopt,
+                    v.partorderopt,
+                    v.parttreeoutopt,
+                    v.memopt,
+                    v.seqtype,
+                    v.model,
+                    v.treealg,
+                    v.outnum,
+                ]
+            ),
+        )
+
     @staticmethod
     def _trim(file, dest):
         """Copy file while trimming carriage returns"""
@@ -292,23 +708,117 @@ class MultipleSequenceAlignment:
                     fout.write(line.translate(tr))
 
     @contextmanager
-    def redirect_io(self, out_filename: Path | None = None):
-        if out_filename is None:
-            out_filename = os.devnull
-        err_filename = self.vars.progressfile
-        if err_filename is None:
-            err_filename = os.devnull
-        with redirect(_mafft, "stderr", err_filename, "a"):
-            with redirect(_mafft, "stdout", out_filename, "w"):
-                yield
+    def redirect_io(self, out_filename: Path | bytearray | None = None):
+        """
+        Redirect core output to native sinks, while feeding it any in-memory
+        input. Output without a destination is never formatted.
+        """
+        with feed(_mafft, "stdin", self.data):
+            with sink(_mafft, "stderr", self.vars.progressfile, "a"):
+                with sink(_mafft, "stdout", out_filename, "w"):
+                    yield
+
+    def _input_source(self) -> str | bytes:
+        """The current stage input, for measuring its size"""
+        if self.vars.infilename is None:
+            return self.data
+        return self.vars.infilename
+
+    def _input_kwargs(self) -> dict:
+        """Stages read from the memory buffer if there is no input file"""
+        if self.vars.infilename is None:
+            return {}
+        return dict(i=self.vars.infilename)
 
     def get_results_path(self) -> Path | None:
         if self.results:
             return Path(self.results) / "pre"
         return None
 
+    def get_records(self) -> list[tuple[str, str]]:
+        """Return the aligned sequences as (id, sequence) pairs"""
+        if self.output is not None:
+            return records_from_text(self.output)
+        results = self.get_results_path()
+        if results is None:
+            raise RuntimeError("No results to fetch.")
+        return records_from_text(results.read_text())
+
+    def distances(self, mmap: bool | None = None):
+        """
+        Compute the pairwise distances of the input without aligning it.
+        Return them as a condensed float32 NumPy array, in the order of
+        scipy.spatial.distance.squareform(). G-INS-i gives global distances,
+        other strategies give ktuple distances. Large matrices are
+        memory-mapped from a removed temporary file, so they outlive the
+        next run, unless mmap is False or on Windows, where mapped files
+        cannot be removed. Replaces the results of any previous run.
+        """
+        import numpy
+
+        vars = self.vars
+        self.vars = copy.deepcopy(vars)
+        try:
+            if self.vars.auto:
+                self.vars.set_strategy("fftns1")
+            if self.vars.distance == "parttree":
+                raise ValueError("PartTree does not compute a distance matrix.")
+            if self.vars.addarg0 != " ":
+                raise ValueError("Cannot compute distances when adding sequences.")
+            self.vars.treein = 0
+            self.vars.treeinopt = "  "
+            self.vars.dedup = 0
+            self.vars.set_distance_only()
+            self.start()
+        finally:
+            self.vars = vars
+        # The core only echoes the input
+        self.output = None
+        self.results = None
+
+        path = Path(self.target) / "bindist"
+        if not path.exists():
+            raise RuntimeError("No distances to fetch.")
+        size = path.stat().st_size
+        if mmap is None:
+            mmap = size >= MMAP_THRESHOLD
+        if not mmap or size == 0 or os.name == "nt":
+            return numpy.fromfile(path, dtype=numpy.float32)
+        # The temporary directory is removed by the next run, map a file of our own
+        fd, name = tempfile.mkstemp(prefix="mafft_", suffix=".bindist")
+        os.close(fd)
+        try:
+            shutil.move(path, name)
+            return numpy.memmap(name, dtype=numpy.float32, mode="r")
+        finally:
+            # The mapping stays valid until the array is released
+            os.remove(name)
+
+    def estimate_memory(self) -> dict:
+        """
+        Predict the peak memory of aligning the input, without aligning it.
+        Return the plan as a dict, which is also kept in the memory attribute
+        of every run: the strategy, the predicted bytes, the budget and the
+        memory-saving modes that are used to stay within it. The source of
+        the budget is "budget" if it was given, "cgroup" if it is the memory
+        limit of the cgroup, or None if there is neither.
+        """
+        vars = self.vars
+        self.vars = copy.deepcopy(vars)
+        try:
+            self.vars.estimateonly = 1
+            self.start()
+        finally:
+            self.vars = vars
+        self.output = None
+        self.results = None
+        return self.memory
+
     def fetch(self, destination):
         """Copy results as a new directory"""
+        if self.output is not None:
+            Path(destination).write_text(self.output)
+            return
         results = self.get_results_path()
         if results is None:
             raise RuntimeError("No results to fetch.")
@@ -326,13 +836,283 @@ class MultipleSequenceAlignment:
         if self.target is None:
             raise Exception("Target directory was not provided!")
 
-        self._trim(self.file, Path(self.target) / self.vars.infilename)
+        if self.data is not None:
+            self.vars.infilename = None
+        else:
+            self._trim(self.file, Path(self.target) / self.vars.infilename)
+        duplicates = self._collapse()
+        self.vars.nadd = self._append_addition()
+
+        with pushd(self.target), fft_backend(self.vars.fftbackend):
+            if self.progress:
+                self._parser = ProgressParser(self.progress, self.log)
+                self.vars.progressfile = self._parser
+            try:
+                self._script()
+            finally:
+                if self._parser is not None:
+                    self._parser.close()
+                    self._parser = None
+        if duplicates is not None:
+            self._expand(duplicates)
+
+    def _collapse(self) -> Duplicates | None:
+        """Keep only the first of identical sequences in the input, if asked to"""
+        self.collapsed = 0
+        v = self.vars
+        if not v.dedup or v.addarg0 != " " or v.subalignments is not None:
+            # Positions in the input must stay as they are
+            return None
+        path = Path(self.target) / v.infilename if self.data is None else None
+        text = self.data.decode() if path is None else path.read_text()
+        text, duplicates = collapse(text)
+        if duplicates is None:
+            return None
+        if path is None:
+            self.data = text.encode()
+        else:
+            path.write_text(text)
+        self.collapsed = duplicates.count
+        names = {name for copies in duplicates.copies().values() for name in copies}
+        if v.guidetree is not None:
+            v.guidetree = prune_tree(v.guidetree, names)
+        if self._cached_tree is not None:
+            self._cached_tree = prune_tree(self._cached_tree, names)
+        print("Collapsed duplicate sequences:", self.collapsed)
+        return duplicates
+
+    def _expand(self, duplicates: Duplicates):
+        """Give the aligned rows back to the duplicates that were collapsed"""
+        if self.output is not None:
+            self.output = expand(self.output, duplicates)
+        else:
+            path = Path(self.target) / "pre"
+            if path.exists():
+                path.write_text(expand(path.read_text(), duplicates))
+        if self.tree is not None:
+            self.tree = expand_tree(self.tree, duplicates)
+
+    def _guide_tree_ids(self) -> list[str]:
+        """Sequence names by position in the guide tree"""
+        if self.data is not None:
+            text = self.data.decode()
+        else:
+            text = Path(self.vars.infilename).read_text()
+        ids = [id for id, _ in records_from_text(text)]
+        if self.vars.fragment != 0:
+            # Fragments are placed on the tree of the existing alignment
+            ids = ids[: len(ids) - self.vars.nadd]
+        return ids
+
+    def _load_pairs(self, options: dict) -> tuple[PairCache, dict, list[str]]:
+        """Write the stored pairwise alignments as the only pair tile"""
+        v = self.vars
+        if self.data is not None:
+            text = self.data.decode()
+        else:
+            text = Path(v.infilename).read_text()
+        sequences = [sequence for _, sequence in records_from_text(text)]
+        keys = [PairCache.sequence_key(sequence) for sequence in sequences]
+        type = sequence_type(sequences)
+        cache = PairCache(v.paircache, v.paircachesize)
+        namespace = cache.namespace(options, type)
+        tile, self.reused_pairs = cache.load(namespace, keys, type)
+        Path("_pairtile0").write_bytes(tile)
+        print("Reused pairs:", self.reused_pairs)
+        return cache, options, keys
+
+    def _store_pairs(self, cache: PairCache, options: dict, keys: list[str]):
+        """Store the pairwise alignments that were computed, under the detected type"""
+        tile = Path("_pairtile").read_bytes()
+        namespace = cache.namespace(options, tile[:1].decode())
+        cache.store(namespace, keys, tile)
+
+    def _read_addition(self) -> bytes:
+        """The sequences to add, without carriage returns or empty lines"""
+        if self.vars.addarg0 == " ":
+            return b""
+        with open(self.vars.addfile, "rb") as file:
+            lines = file.read().replace(b"\r", b"\n").splitlines()
+        return b"".join(line + b"\n" for line in lines if line)
+
+    def _append_addition(self) -> int:
+        """Append the sequences to add to the input, return their number"""
+        addition = self._read_addition()
+        if not addition:
+            return 0
+        if self.data is not None:
+            data = self.data
+            if data and not data.endswith(b"\n"):
+                data += b"\n"
+            self.data = data + addition
+        else:
+            with open(Path(self.target) / self.vars.infilename, "ab") as file:
+                file.write(addition)
+        return addition.count(b"\n>") + addition.startswith(b">")
+
+    @contextmanager
+    def _stage(self, stage: str, input=None, output=None):
+        """Measure the enclosed stage and report its start and end"""
+        if self._parser is not None:
+            self._parser.start(stage)
+        with measure(self.metrics, stage, input, output):
+            yield
+        if self._parser is not None:
+            self._parser.end()
+
+    def _receive(self, connection):
+        """Pass progress events to the callback until the results arrive"""
+        while True:
+            message = connection.recv()
+            if not isinstance(message, ProgressEvent):
+                return message
+            if callable(self.progress):
+                self.progress(message)
+
+    def _run_to_pipe(self, connection):
+        """Run in a child process and send back the results"""
+        if self.progress:
+            self.progress = connection.send
+        self.run()
+        connection.send(self._child_state())
+        connection.close()
+
+    def _child_state(self) -> dict:
+        """Attributes that the parent process should receive"""
+        return dict(
+            output=self.output,
+            strategy=self.strategy,
+            metrics=self.metrics,
+            choice=self.choice,
+            memory=self.memory,
+            tree=self.tree,
+            skipped=self.skipped,
+            collapsed=self.collapsed,
+            scores=self.scores,
+            tile=self.tile,
+            reused_pairs=self.reused_pairs,
+        )
+
+    def _update_from_child(self, state: dict):
+        """Update analysis object with the state sent by the child process"""
+        self.__dict__.update(state)
+        self.results = self.target if self.data is None else None
+
+    def _validate(self):
+        """Reject options that the strategy does not support, before spawning"""
+        v = self.vars
+        if v.sketcharg != " " and not v.auto and v.distance != "ktuples":
+            raise ValueError(
+                "Sketch distances are only supported by FFT-NS-1, 2 and i."
+            )
+        if v.pairtilearg != " " and (
+            v.auto or v.distance != "global" or v.addarg0 != " "
+        ):
+            raise ValueError(
+                "Pair tiles are only supported by G-INS-i without additions."
+            )
+        if v.subalignments is not None:
+            if v.addarg0 != " ":
+                raise ValueError("Cannot add sequences while merging subalignments.")
+            if not v.auto and v.distance == "parttree":
+                raise ValueError("PartTree cannot merge subalignments.")
+        if v.treein:
+            if not v.auto and v.distance == "parttree":
+                raise ValueError("PartTree cannot use a given guide tree.")
+            to_core(v.guidetree, self._input_ids())
+
+    def _input_ids(self) -> list[str]:
+        """Sequence names that _guide_tree_ids() will find in the input of the core"""
+        if self.data is not None:
+            text = self.data.decode()
+        else:
+            text = Path(self.file).read_text()
+        ids = [id for id, _ in records_from_text(text)]
+        if self.vars.fragment == 0:
+            # Full sequences to add are placed on the tree with the others
+            addition = self._read_addition().decode()
+            ids += [id for id, _ in records_from_text(addition)]
+        return ids
+
+    def _prepare(self):
+        """Create a temporary directory for the core to work in"""
+        self._validate()
+        self._temp = tempfile.TemporaryDirectory(prefix="mafft_")
+        self.target = Path(self._temp.name).as_posix()
 
-        with pushd(self.target):
-            self._script()
+    def _cache_key(self) -> str | None:
+        """Key of the result cache for this job, or None if caching is off"""
+        cache = get_cache()
+        v = self.vars
+        if cache is None or v.distout or v.estimateonly or v.pairtile is not None:
+            # Distances are left in the target directory, tiles and estimates
+            # are not stored
+            return None
+        if self.data is not None:
+            data = self.data
+        else:
+            # Same normalization as _trim()
+            with open(self.file, "r") as file:
+                data = file.read().replace("\r", "").encode()
+        data += self._read_addition()
+        vars = self._key_vars()
+        self._tree_key = cache.tree_key(data, vars)
+        return cache.key(data, vars)
+
+    def _key_vars(self) -> MafftVars:
+        """Copy of the variables, with the values that depend on the machine resolved"""
+        vars = copy.copy(self.vars)
+        vars.numthreads, vars.numthreadstb, vars.numthreadsit = resolve_threads(
+            vars.numthreads, vars.numthreadstb, vars.numthreadsit, vars.threadlimit
+        )
+        # The auto strategy and the memory plan follow from these, the input
+        # and the limit of the cgroup, which is the default memory budget
+        vars.memorylimit = 0 if vars.memorybudget else memory_limit() or 0
+        return vars
+
+    def _load_cached(self, key: str) -> bool:
+        """Fill in the results from the cache, return False on a miss"""
+        cache = get_cache()
+        state = cache.get(key)
+        if state is None:
+            # Export the tree for later jobs, reuse one from earlier jobs
+            self.vars.treeout = 1
+            if not self.vars.treein:
+                self._cached_tree = cache.get_tree(self._tree_key)
+            return False
+        if self.data is None:
+            (Path(self.target) / "pre").write_text(state.pop("output"))
+        self._update_from_child(state)
+        return True
+
+    def _store_cached(self, key: str):
+        """Store the results of the job, which must have some"""
+        output = self.output
+        if output is None:
+            results = self.get_results_path()
+            if results is None or not results.exists():
+                # The core stopped early and explained why in the logs
+                raise RuntimeError("MAFFT stopped without results, please check logs.")
+            output = results.read_text()
+        state = dict(
+            output=output,
+            strategy=self.strategy,
+            choice=self.choice,
+            memory=self.memory,
+            tree=self.tree,
+            scores=self.scores,
+        )
+        get_cache().put(key, state)
+        if self.tree is not None and self._cached_tree is None and not self.vars.treein:
+            get_cache().put_tree(self._tree_key, self.tree)
 
     def _script(self):
         self.results = None
+        self.metrics = []
+        self.tree = None
+        self.skipped = []
+        self.scores = []
+        self.reused_pairs = 0
         v = self.vars
 
         # if maxambiguous != 1: call filter()
@@ -352,23 +1132,62 @@ class MultipleSequenceAlignment:
 
         # numthreads = number of cores
         # max 16 and 8 threads for some reason
-        v.numthreadstb = v.numthreads
-        v.numthreadsit = v.numthreads
+        v.numthreads, v.numthreadstb, v.numthreadsit = resolve_threads(
+            v.numthreads, v.numthreadstb, v.numthreadsit, v.threadlimit
+        )
 
-        v.nadd = "0"
+        if v.addarg0 != " " and v.nadd == 0:
+            print("Check", v.addfile)
+            return
+
+        with (
+            self._stage("countlen", self._input_source()),
+            self.redirect_io(),
+        ):
+            (nseq, nlenmax, nlenmin, dorp, _) = _mafft.countlen(v.infilename)
+        v.nseq = nseq
+        v.dorp = dorp
+
+        # The auto strategy and the memory plan share the same estimate
+        stats = dict(nseq=nseq, nlenmax=nlenmax, nlenmin=nlenmin, dorp=dorp)
+        budget = v.memorybudget
+        source = "budget"
+        if not budget:
+            budget = memory_limit() or 0
+            source = "cgroup" if budget else None
+        # The core cannot build compact trees in these modes
+        compact = not (
+            v.treein or v.nadd > 0 or v.distout or v.subalignments is not None
+        )
 
         if v.auto:
-            with self.redirect_io():
-                (nseq, nlen, _, _, _) = _mafft.countlen(v.infilename)
-            if nlen < 10000 and nseq < 200:
-                v.fft = 1
-                v.cycle = 1
-                v.iterate = 1000
-                v.distance = "global"
-            else:
-                v.fft = 1
-                v.cycle = 1
-                v.distance = "ktuples"
+            accuracy = v.accuracy
+            fixed = v.nadd > 0 or v.treein or v.subalignments is not None
+            if fixed and accuracy in (None, "parttree"):
+                # PartTree cannot add sequences, use a given tree or merge
+                accuracy = "fftns1"
+            strategies = SKETCH_STRATEGIES if v.sketcharg != " " else ACCURACY
+            if fixed:
+                strategies = [s for s in strategies if s != "parttree"]
+            chosen, candidates = choose(
+                stats,
+                v.timebudget or DEFAULT_TIME_BUDGET,
+                budget,
+                accuracy,
+                v.numthreads,
+                strategies,
+                compact,
+            )
+            v.set_strategy(chosen.strategy)
+            self.choice = dict(
+                asdict(chosen),
+                stats=stats,
+                candidates=[asdict(candidate) for candidate in candidates],
+            )
+            print(
+                f"Auto: {chosen.strategy}, predicted {chosen.time:.1f} s"
+                f" and {chosen.memory / 2**20:.0f} MiB"
+            )
 
         # fragments
 
@@ -399,14 +1218,14 @@ class MultipleSequenceAlignment:
             else:
                 v.treeoutopt = "-t -T"
             v.iterate = 0
-            v.weighti = "0.0"
+            v.weighti = 0.0
             if v.treeout == 1:
                 v.parttreeoutopt = "-t"
                 v.groupsize = 1
             else:
                 v.parttreeoutopt = " "
             if v.distout == 1:
-                v.distoutopt = "-y -T"
+                v.distoutopt = f"-y {v.distformat} -T"
                 if v.treeout == 0:
                     v.treeoutopt = ""
         else:
@@ -425,15 +1244,13 @@ class MultipleSequenceAlignment:
                 v.parttreeoutopt = " "
                 v.treeoutopt = " "
             if v.distout == 1:
-                v.distoutopt = "-y"
+                v.distoutopt = f"-y {v.distformat}"
 
         # check format (>)
 
-        # nseq = number of lines starting with > or =
-        v.nseq = 333
         if v.nseq == 2:
             v.cycle = 1
-        if v.nseq > 3:
+        if v.cycle > 3:
             v.cycle = 3
 
         if v.nseq > 60000 and v.iterate > 1:
@@ -441,19 +1258,76 @@ class MultipleSequenceAlignment:
             print("Please use a progressive method.")
             return
 
-        if v.distance == "ktuples":
-            # THIS IS CHEATING, setting cycle to 1 for no good reason
-            v.cycle = 1
+        if v.nadd > 0:
+            if v.fragment == 1:
+                v.addarg = f"{v.addarg0} {v.nadd} -g -0.01"
+                v.addsinglearg = " "
+                v.cycle = 1
+                v.iterate = 0
+            elif v.fragment == -1:
+                v.addarg = f"{v.addarg0} {v.nadd}"
+                v.addsinglearg = "-V"  # allowlongadds
+                v.cycle = 1
+                v.iterate = 0
+            else:
+                v.addarg = f"{v.addarg0} {v.nadd}"
+                v.addsinglearg = " "
+                v.bunkatsuopt = " -B "
+                if v.add2ndhalfarg != " ":
+                    v.iterate = 0
+        elif v.add2ndhalfarg != " ":
+            print("The --keeplength option is supported only with")
+            print("--add, --addfragments or --addfull.")
+            return
 
+        if v.distance == "parttree":
+            if v.iterate > 1 or v.fragment != 0:
+                print("PartTree is only available as a progressive method.")
+                return
+            if v.nadd > 0:
+                print("PartTree cannot add sequences to an alignment.")
+                return
+            # Its trees have no branch lengths and cannot be given back
+            v.parttreeoutopt = " "
+            if v.partdist == "localalign":
+                v.splitopt = " -U "
+                v.cycle = 1
+            elif v.partdist == "fasta":
+                v.splitopt = " -S "
+                v.cycle = 1
+            else:
+                v.splitopt = "  "
+
+        if v.distance == "ktuples":
+            v.localparam = ""
+            v.weighti = 0.0
+        elif v.distance == "parttree":
             v.localparam = ""
             v.weighti = 0.0
+            if v.groupsize > -1:
+                v.cycle = 1
         else:
             v.localparam = "-l " + str(v.weighti)
             if v.cycle > 1:
                 v.cycle = 1
 
         v.param_fft = " -F "
-        v.memsavetree = 0
+        plan = plan_memory(v.get_strategy(), stats, budget, compact)
+        self.memory = dict(asdict(plan), source=source)
+        report = f"Memory: predicted {plan.memory / 2**20:.0f} MiB"
+        if budget:
+            report += f" of {budget / 2**20:.0f} MiB"
+            if source == "cgroup":
+                report += " (limit of the cgroup)"
+        modes = [name for name in ("memsavetree", "memopt") if getattr(plan, name)]
+        if modes:
+            report += ", using " + " and ".join(modes)
+        print(report)
+        if v.estimateonly:
+            return
+        v.memsavetree = int(plan.memsavetree)
+        if plan.memopt:
+            v.memopt = " -M -B "
 
         v.cycletbfast = 1
         if v.localparam == "" and v.fragment == 0 and v.distance != "parttree":
@@ -462,10 +1336,10 @@ class MultipleSequenceAlignment:
             v.cycledisttbfast = v.cycle
             if v.cycledisttbfast == 0:
                 v.cycledisttbfast = 1
-            else:
-                # echo "use tbfast"
-                v.cycletbfast = v.cycle
-                v.cycledisttbfast = 1
+        else:
+            # echo "use tbfast"
+            v.cycletbfast = v.cycle
+            v.cycledisttbfast = 1
 
         if v.distance == "global" or v.distance == "distonly":
             v.strategy = "G-"
@@ -480,6 +1354,13 @@ class MultipleSequenceAlignment:
 
         if v.iterate > 0:
             v.strategy += "i"
+        elif v.distance == "parttree":
+            if v.partdist == "fasta":
+                v.strategy += "FastaPartTree-" + str(v.cycle)
+            elif v.partdist == "localalign":
+                v.strategy += "DPPartTree-" + str(v.cycle)
+            else:
+                v.strategy += "PartTree-" + str(v.cycle)
         else:
             v.strategy += str(v.cycle)
 
@@ -487,6 +1368,46 @@ class MultipleSequenceAlignment:
         v.performance = "Not tested."
 
         v.outputopt = "-f"
+        v.prefilename = "pre"
+
+        origin = "given"
+        if self._cached_tree is not None and v.distance != "parttree":
+            v.set_guide_tree(self._cached_tree)
+            origin = "cached"
+
+        if v.subalignments is not None:
+            lines = v.subalignments.replace("\r", "\n").splitlines()
+            Path("_subalignmentstable").write_text(
+                "".join(line + "\n" for line in lines if line.strip())
+            )
+
+        if v.pairtilearg != " ":
+            for index, tile in enumerate(v.pairtiles or []):
+                Path(f"_pairtile{index}").write_bytes(tile)
+
+        if v.memsavetree:
+            # Read by check_guidetreefile(), as with --initialramusage
+            # and --memsavetree of MAFFT
+            if plan.matrix:
+                Path("_guidetree").write_text(f"compact {plan.matrix // 1000}k\n")
+            else:
+                Path("_guidetree").write_text("very compact\n")
+            v.treeinopt = " -U "
+
+        ids = self._guide_tree_ids() if v.treein or v.treeout else []
+        if v.treein:
+            try:
+                Path("_guidetree").write_text(to_core(v.guidetree, ids))
+            except ValueError as e:
+                print(e)
+                return
+            if v.distance == "global":
+                self.skipped = ["tbfast:tree"]
+            elif v.fragment != 0:
+                self.skipped = ["addsingle:tree"]
+            else:
+                self.skipped = ["disttbfast:distances", "disttbfast:tree"]
+            print(f"Guide tree {origin}, skipping:", ", ".join(self.skipped))
 
         """
 		if [ $adjustdirection -gt 0 ]; then
@@ -509,7 +1430,6 @@ class MultipleSequenceAlignment:
 		fi
 		"""
 
-        v.nadd = 0  # TODO
         if v.adjustdirection > 0:
             v.fragarg = ""
             if v.fragment != 0:
@@ -517,61 +1437,95 @@ class MultipleSequenceAlignment:
             else:
                 v.fragarg = "-F"
             if v.adjustdirection == 1:
-                with self.redirect_io("_direction"):
+                with (
+                    self._stage(
+                        "makedirectionlist",
+                        self._input_source(),
+                        "_direction",
+                    ),
+                    self.redirect_io("_direction"),
+                ):
                     _mafft.makedirectionlist(
                         C=v.numthreads,
                         m=None,
                         I=v.nadd,
-                        i=v.infilename,
+                        **self._input_kwargs(),
                         t=0.00,
                         r=5000,
                         o="a",
                         **self._vars_to_kwargs([v.fragarg]),
                     )
             elif v.adjustdirection == 2:
-                with self.redirect_io("_direction"):
+                with (
+                    self._stage(
+                        "makedirectionlist",
+                        self._input_source(),
+                        "_direction",
+                    ),
+                    self.redirect_io("_direction"),
+                ):
                     _mafft.makedirectionlist(
                         C=v.numthreads,
                         m=None,
                         I=v.nadd,
-                        i=v.infilename,
+                        **self._input_kwargs(),
                         t=0.00,
                         r=100,
                         o="a",
                         **self._vars_to_kwargs([v.fragarg]),
                     )
-            with self.redirect_io("infiled"):
-                _mafft.setdirection(
-                    d="_direction", i="infile", **self._vars_to_kwargs([v.mergearg])
-                )
-            temp1 = open("infiled", "r")  # dirty hack
-            temp2 = open("infile", "w")
-            temp2.write(temp1.read())
-            temp1.close()
-            temp2.close()
+            if self.data is not None:
+                buffer = bytearray()
+                with (
+                    self._stage("setdirection", self.data, buffer),
+                    self.redirect_io(buffer),
+                ):
+                    _mafft.setdirection(
+                        d="_direction", **self._vars_to_kwargs([v.mergearg])
+                    )
+                self.data = bytes(buffer)
+            else:
+                with (
+                    self._stage("setdirection", "infile", "infiled"),
+                    self.redirect_io("infiled"),
+                ):
+                    _mafft.setdirection(
+                        d="_direction", i="infile", **self._vars_to_kwargs([v.mergearg])
+                    )
+                temp1 = open("infiled", "r")  # dirty hack
+                temp2 = open("infile", "w")
+                temp2.write(temp1.read())
+                temp1.close()
+                temp2.close()
 
         if v.distance == "global" and v.memsavetree == 0:
-            with self.redirect_io():
-                # if True:
+            # Everything that may change a pairwise alignment
+            options = dict(
+                u=v.unalignlevel,
+                g=v.pgexp,
+                f=v.pggop,
+                Q=v.spfactor,
+                h=v.pgaof,
+                A=v.usenaivepairscore,
+                **self._vars_to_kwargs([v.localparam, v.seqtype, v.model]),
+            )
+            pairtilearg = v.pairtilearg
+            pairs = None
+            if v.paircache is not None and pairtilearg == " ":
+                if v.focusarg == " " and v.nadd == 0:
+                    pairs = self._load_pairs(options)
+                    pairtilearg = "-X 1"
+            with (
+                self._stage("tbfast", self._input_source(), "pre"),
+                self.redirect_io(),
+            ):
                 _mafft.tbfast(
-                    i=v.infilename,
+                    **self._input_kwargs(),
                     pair=dict(
-                        i=v.infilename,
-                        u=v.unalignlevel,
+                        **self._input_kwargs(),
                         C=v.numthreads,
-                        g=v.pgexp,
-                        f=v.pggop,
-                        Q=v.spfactor,
-                        h=v.pgaof,
-                        A=v.usenaivepairscore,
-                        **self._vars_to_kwargs(
-                            [
-                                v.localparam,
-                                v.seqtype,
-                                v.model,
-                                v.focusarg,
-                            ]
-                        ),
+                        **options,
+                        **self._vars_to_kwargs([v.focusarg, pairtilearg]),
                     ),
                     W=v.minimumweight,
                     V="-" + v.gopdist,
@@ -604,16 +1558,67 @@ class MultipleSequenceAlignment:
                         ]
                     ),
                 )
+            if v.pairtile is not None:
+                self.tile = Path("_pairtile").read_bytes()
+                return
+            if pairs is not None:
+                self._store_pairs(*pairs)
             # print('BREAK HERE')
             # return
+        elif v.distance == "parttree":
+            out = "pre" if self.data is None else bytearray()
+            with (
+                self._stage("splittbfast", self._input_source(), out),
+                self.redirect_io(out),
+            ):
+                self._splittbfast(self._input_kwargs())
+            if self.data is not None:
+                self.data = bytes(out)
+                v.prefilename = None
         else:
             if v.fragment != 0:
-                pass
-            # "$prefix/addsingle" -Q 100 $legacygapopt -W $tuplesize -O $outnum $addsinglearg $addarg $add2ndhalfarg -C $numthreads $memopt $weightopt $treeinopt $treeoutopt $distoutopt $seqtype $model -f "-"$gop  -h $aof  $param_fft $localparam   $algopt $treealg $scoreoutarg < infile   > /dev/null 2>>"$progressfile" || exit 1
+                # Align each new sequence to the fixed alignment
+                with (
+                    self._stage("addsingle", self._input_source(), "pre"),
+                    self.redirect_io(),
+                ):
+                    _mafft.addsingle(
+                        **self._input_kwargs(),
+                        Q=100,
+                        W=v.tuplesize,
+                        O=None,
+                        C=v.numthreads,
+                        f="-" + v.gop,
+                        h=v.aof,
+                        **self._vars_to_kwargs(
+                            [
+                                v.legacygapopt,
+                                v.outnum,
+                                v.addsinglearg,
+                                v.addarg,
+                                v.add2ndhalfarg,
+                                v.memopt,
+                                v.weightopt,
+                                v.treeinopt,
+                                v.treeoutopt,
+                                v.distoutopt,
+                                v.seqtype,
+                                v.model,
+                                v.param_fft,
+                                v.localparam,
+                                v.algopt,
+                                v.treealg,
+                            ]
+                        ),
+                    )
             else:
-                with self.redirect_io("pre"):
+                out = "pre" if self.data is None else bytearray()
+                with (
+                    self._stage("disttbfast", self._input_source(), out),
+                    self.redirect_io(out),
+                ):
                     _mafft.disttbfast(
-                        i=v.infilename,
+                        **self._input_kwargs(),
                         q=v.npickup,
                         E=v.cycledisttbfast,
                         V="-" + v.gopdist,
@@ -636,6 +1641,7 @@ class MultipleSequenceAlignment:
                                 v.memopt,
                                 v.weightopt,
                                 v.treeinopt,
+                                v.treeoutopt,
                                 v.distoutopt,
                                 v.seqtype,
                                 v.model,
@@ -645,33 +1651,108 @@ class MultipleSequenceAlignment:
                                 v.scoreoutarg,
                                 v.anchoropt,
                                 v.oneiterationopt,
+                                v.sketcharg,
                             ]
                         ),
                     )
+                if self.data is not None:
+                    self.data = bytes(out)
+                    v.prefilename = None
 
         # v.progressfile = 'err2.log'
 
         while v.cycletbfast > 1:
             if v.distance == "parttree":
-                pass
-                # mv pre infile
-                # "$prefix/splittbfast" $legacygapopt -Z $algopt $splitopt $partorderopt $parttreeoutopt $memopt $seqtype $model -f "-"$gop -Q $spfactor -h $aof  -p $partsize -s $groupsize $treealg $outnum -i infile   > pre 2>>"$progressfile" || exit 1
+                # Split again, using distances from the previous alignment
+                if self.data is None:
+                    os.replace("pre", "infile")
+                    kwargs = dict(i="infile")
+                    out = "pre"
+                else:
+                    kwargs = {}
+                    out = bytearray()
+                source = self.data if self.data is not None else "infile"
+                with (
+                    self._stage("splittbfast", source, out),
+                    self.redirect_io(out),
+                ):
+                    self._splittbfast(kwargs, Z=None)
+                if self.data is not None:
+                    self.data = bytes(out)
             else:
-                # _mafft.disttbfast(W=v.minimumweight, V='-'+v.gopdist, s=v.unalignlevel, S=None)
-                pass
-                # "$prefix/tbfast" -W $minimumweight -V "-"$gopdist -s $unalignlevel $legacygapopt $mergearg $termgapopt $outnum -C $numthreadstb $rnaopt $weightopt $treeoutopt $distoutopt $memopt $seqtype $model  -f "-"$gop -Q $spfactor -h $aof $param_fft  $localparam $algopt -J $treealg $scoreoutarg < pre > /dev/null 2>>"$progressfile" || exit 1
+                # Rebuild the guide tree from the previous alignment
+                pre_kwargs = {} if v.prefilename is None else dict(i=v.prefilename)
+                source = self.data if v.prefilename is None else v.prefilename
+                with (
+                    self._stage("tbfast", source, "pre"),
+                    self.redirect_io(),
+                ):
+                    _mafft.tbfast(
+                        **pre_kwargs,
+                        W=v.minimumweight,
+                        V="-" + v.gopdist,
+                        s=v.unalignlevel,
+                        C=v.numthreadstb,
+                        f="-" + v.gop,
+                        Q=v.spfactor,
+                        h=v.aof,
+                        J=None,
+                        **self._vars_to_kwargs(
+                            [
+                                v.legacygapopt,
+                                v.mergearg,
+                                v.termgapopt,
+                                v.outnum,
+                                v.rnaopt,
+                                v.weightopt,
+                                v.treeoutopt,
+                                v.distoutopt,
+                                v.memopt,
+                                v.seqtype,
+                                v.model,
+                                v.param_fft,
+                                v.localparam,
+                                v.algopt,
+                                v.treealg,
+                                v.scoreoutarg,
+                            ]
+                        ),
+                    )
+                v.prefilename = "pre"
                 # fragment>0 no baai, nanimoshinai
                 # seed youchuui!!
             v.cycletbfast -= 1
 
+        # Refinement overwrites the tree file with a tree of its own
+        if v.treein:
+            self.tree = v.guidetree
+        elif v.treeout and os.path.exists("infile.tree"):
+            self.tree = from_core(Path("infile.tree").read_text(), ids)
+
         if v.iterate > 0:
+            pre_kwargs = {} if v.prefilename is None else dict(i=v.prefilename)
+            source = self.data if v.prefilename is None else v.prefilename
             if v.distance == "ktuples":
-                # "$prefix/dndpre" $seqtype $model -M 2 -C $numthreads < pre     > /dev/null 2>>"$progressfile" || exit 1
-                pass
+                # Distances for the refinement, from the progressive alignment
+                with (
+                    self._stage("dndpre", source, "hat2"),
+                    self.redirect_io(),
+                ):
+                    _mafft.dndpre(
+                        **pre_kwargs,
+                        M=2,
+                        C=v.numthreads,
+                        **self._vars_to_kwargs([v.seqtype, v.model]),
+                    )
 
-            with self.redirect_io():
+            # The refinement tree is always built from the progressive
+            # alignment, so that a given guide tree reproduces the output
+            with (
+                self._stage("dvtditr", source, "pre"),
+                self.redirect_io(),
+            ):
                 _mafft.dvtditr(
-                    i="pre",
+                    **pre_kwargs,
                     W=v.minimumweight,
                     E=v.fixthreshold,
                     s=v.unalignlevel,
@@ -684,6 +1765,8 @@ class MultipleSequenceAlignment:
                     I=v.iterate,
                     p=v.parallelizationstrategy,
                     K=v.nadd,
+                    x=v.refinebudget,
+                    v=v.refinegain,
                     **self._vars_to_kwargs(
                         [
                             v.bunkatsuopt,
@@ -697,13 +1780,21 @@ class MultipleSequenceAlignment:
                             v.seqtype,
                             v.model,
                             v.weightopt,
-                            v.treeinopt,
                             v.algoptit,
                             v.treealg,
                             v.scoreoutarg,
                         ]
                     ),
                 )
+            v.prefilename = "pre"
+            # Sum-of-pairs score before refinement and after each iteration
+            self.scores = [float(x) for x in Path("_scores").read_text().split()]
+
+        if self.data is not None:
+            if v.prefilename is None:
+                self.output = self.data.decode()
+            else:
+                self.output = Path(v.prefilename).read_text()
 
         print("Strategy:", v.strategy)
         print("Explanation:", v.explanation)
@@ -726,23 +1817,162 @@ class MultipleSequenceAlignment:
         as the script uses global I/O redirection, some internal functions
         call exit(), while repeated calls may cause segfaults.
         Save results in a temporary directory, use fetch() to retrieve them.
+        In-memory alignments are sent back through a pipe instead,
+        use get_records() to retrieve them.
+        If a result cache is set, previous results are reused.
         """
-        self._temp = tempfile.TemporaryDirectory(prefix="mafft_")
-        self.target = Path(self._temp.name).as_posix()
-        p = Process(target=self.run)
-        p.start()
+        self._prepare()
+        key = self._cache_key()
+        if key is not None and self._load_cached(key):
+            return
+        p, receiver = self._spawn()
+        try:
+            state = self._receive(receiver)
+        except EOFError:
+            state = None
+        except BaseException:
+            p.terminate()
+            p.join()
+            raise
+        finally:
+            receiver.close()
         p.join()
-        if p.exitcode != 0:
+        self._finish(p, state, key)
+
+    async def start_async(self, timeout: float | None = None):
+        """
+        Same as start(), but wait for the child process without blocking
+        the event loop. On timeout or cancellation, the child process is
+        terminated and its temporary directory is removed.
+        """
+        self._prepare()
+        key = self._cache_key()
+        if key is not None and self._load_cached(key):
+            return
+        p, receiver = self._spawn()
+        try:
+            state = await asyncio.wait_for(self._receive_async(receiver), timeout)
+            await asyncio.to_thread(p.join)
+        except BaseException:
+            p.terminate()
+            p.join()
+            self._cleanup()
+            raise
+        finally:
+            receiver.close()
+        self._finish(p, state, key)
+
+    def _spawn(self):
+        """Start the child process, return it with the receiving connection"""
+        receiver, sender = Pipe(duplex=False)
+        p = Process(target=self._run_to_pipe, args=(sender,))
+        p.start()
+        sender.close()
+        return p, receiver
+
+    def _finish(self, p: Process, state: dict | None, key: str | None):
+        if p.exitcode != 0 or state is None:
             raise RuntimeError("MAFFT internal error, please check logs.")
         # Success, update analysis object for parent process
-        self.results = self.target
+        self._update_from_child(state)
+        if key is not None:
+            self._store_cached(key)
+
+    def _cleanup(self):
+        """Remove the temporary directory, if any"""
+        temp = getattr(self, "_temp", None)
+        if temp is not None:
+            temp.cleanup()
+            self._temp = None
+            self.target = None
+
+    async def _receive_async(self, connection) -> dict | None:
+        """Like _receive(), but wait for data in the event loop"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._readable(connection)
+            try:
+                # Results can be large, read them off the event loop
+                message = await loop.run_in_executor(None, connection.recv)
+            except EOFError:
+                return None
+            if not isinstance(message, ProgressEvent):
+                return message
+            if callable(self.progress):
+                self.progress(message)
 
-
-def quick(input: Path, output: Path | None, strategy: Strategy, **kwargs):
-    """Quick analysis"""
+    @staticmethod
+    async def _readable(connection):
+        """Wait without blocking the event loop until data arrives"""
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        try:
+            loop.add_reader(connection.fileno(), ready.set)
+        except NotImplementedError:
+            # Proactor loops cannot watch pipes, poll them instead
+            while not connection.poll():
+                await asyncio.sleep(0.05)
+            return
+        try:
+            while not connection.poll():
+                await ready.wait()
+                ready.clear()
+        finally:
+            loop.remove_reader(connection.fileno())
+
+
+def align(
+    records: Records | bytes, strategy: Strategy = "auto", **kwargs
+) -> list[tuple[str, str]]:
+    """Align (id, sequence) pairs or FASTA bytes, return the aligned pairs"""
+    a = MultipleSequenceAlignment.from_records(records, strategy=strategy, **kwargs)
+    a.start()
+    return a.get_records()
+
+
+async def align_async(
+    records: Records | bytes,
+    strategy: Strategy = "auto",
+    timeout: float | None = None,
+    **kwargs,
+) -> list[tuple[str, str]]:
+    """Same as align(), for use with asyncio"""
+    a = MultipleSequenceAlignment.from_records(records, strategy=strategy, **kwargs)
+    await a.start_async(timeout)
+    return a.get_records()
+
+
+def quick(
+    input: Path,
+    output: Path | None,
+    strategy: Strategy,
+    metrics: Path | None = None,
+    treeout: Path | None = None,
+    estimate: bool = False,
+    **kwargs,
+):
+    """
+    Quick analysis, optionally write stage metrics as JSON ('-' for stdout)
+    and the guide tree in Newick format. With estimate, only print the
+    predicted peak memory as JSON.
+    """
+    kwargs["treeout"] = treeout is not None
     a = MultipleSequenceAlignment(input, strategy=strategy, **kwargs)
+    if estimate:
+        print(json.dumps(a.estimate_memory(), indent=2))
+        return
     a.start()
 
+    if treeout is not None and a.tree is not None:
+        Path(treeout).write_text(a.tree + "\n")
+
+    if metrics is not None:
+        text = json.dumps(a.metrics, indent=2)
+        if str(metrics) == "-":
+            print(text)
+        else:
+            Path(metrics).write_text(text + "\n")
+
     results_path = a.get_results_path()
 
     if results_path is None:
@@ -766,5 +1996,13 @@ def fftns1(input: Path, output: Path | None, **kwargs):
     quick(input, output, strategy="fftns1", **kwargs)
 
 
+def fftns2(input: Path, output: Path | None, **kwargs):
+    quick(input, output, strategy="fftns2", **kwargs)
+
+
+def fftnsi(input: Path, output: Path | None, **kwargs):
+    quick(input, output, strategy="fftnsi", **kwargs)
+
+
 def ginsi(input: Path, output: Path | None, **kwargs):
     quick(input, output, strategy="ginsi", **kwargs)
@@ -0,0 +1,144 @@
+# -----------------------------------------------------------------------------
+# MAFFTpy - Multiple sequence alignment with MAFFT
+# Copyright (C) 2021  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Time and memory cost model for choosing a strategy automatically"""
+
+import math
+from dataclasses import dataclass
+
+from .memory import plan_memory
+
+# Strategies in order of increasing accuracy
+ACCURACY = ["parttree", "fftns1", "fftns2", "fftnsi", "ginsi"]
+
+# Strategies that can use ktuple distances from sketches
+SKETCH_STRATEGIES = ["fftns1", "fftns2", "fftnsi"]
+
+# Terms of each model, as functions of sequence count n and maximum length l
+FEATURES = {
+    "parttree": ["base", "nl", "nl2", "nllogn"],
+    "fftns1": ["base", "n2", "n2l", "nllogl"],
+    "fftns2": ["base", "n2", "n2l", "nllogl"],
+    "fftnsi": ["base", "n2", "n2l", "nllogl"],
+    "ginsi": ["base", "n2l", "n2l2", "nl"],
+}
+
+# Fitted by benchmarks/calibrate.py: seconds per term
+COEFFICIENTS = {
+    ("parttree", "d"): {"base": 0, "nl": 0, "nl2": 3.65e-08, "nllogn": 5.6e-07},
+    ("parttree", "p"): {"base": 4.73, "nl": 2.46e-07, "nl2": 3.53e-08, "nllogn": 0},
+    ("fftns1", "d"): {"base": 0, "n2": 0, "n2l": 2.11e-09, "nllogl": 6.19e-07},
+    ("fftns1", "p"): {"base": 0, "n2": 0, "n2l": 3.04e-09, "nllogl": 3.52e-07},
+    ("fftns2", "d"): {"base": 0, "n2": 0, "n2l": 5.62e-09, "nllogl": 1.46e-06},
+    ("fftns2", "p"): {"base": 0, "n2": 4e-07, "n2l": 4.74e-09, "nllogl": 1.17e-06},
+    ("fftnsi", "d"): {"base": 0, "n2": 0, "n2l": 9.3e-07, "nllogl": 0},
+    ("fftnsi", "p"): {"base": 0, "n2": 0, "n2l": 1.01e-06, "nllogl": 0},
+    ("ginsi", "d"): {"base": 0.00978, "n2l": 0, "n2l2": 7.54e-09, "nl": 1.33e-06},
+    ("ginsi", "p"): {"base": 0.0013, "n2l": 0, "n2l2": 6.76e-09, "nl": 0},
+}
+
+# Used by auto mode when no time budget is given, in seconds
+DEFAULT_TIME_BUDGET = 60.0
+
+
+def features(strategy: str, stats: dict) -> list[float]:
+    """Values of the model terms for the given countlen statistics"""
+    n = stats["nseq"]
+    length = max(stats["nlenmax"], 1)
+    terms = dict(
+        base=1.0,
+        n2=n * n,
+        nl=n * length,
+        n2l=n * n * length,
+        n2l2=n * n * length * length,
+        nllogl=n * length * math.log2(length + 1),
+        nl2=n * length * length,
+        nllogn=n * length * math.log2(n + 1),
+    )
+    return [terms[name] for name in FEATURES[strategy]]
+
+
+@dataclass(frozen=True)
+class Estimate:
+    strategy: str
+    time: float
+    memory: int
+
+    def fits(self, time_budget: float, memory_budget: int) -> bool:
+        if time_budget and self.time > time_budget:
+            return False
+        if memory_budget and self.memory > memory_budget:
+            return False
+        return True
+
+
+def estimate(
+    strategy: str,
+    stats: dict,
+    threads: int = 0,
+    memory_budget: int = 0,
+    compact: bool = True,
+) -> Estimate:
+    """
+    Predict wall time in seconds and peak memory in bytes.
+    Quadratic terms belong to the pair stage and scale with its threads.
+    Memory comes from the plan that plan_memory() makes for the budget.
+    """
+    dorp = "p" if stats["dorp"] == "p" else "d"
+    coefficients = COEFFICIENTS[strategy, dorp]
+    values = dict(zip(FEATURES[strategy], features(strategy, stats)))
+    time = 0.0
+    for name, value in values.items():
+        share = value * coefficients.get(name, 0)
+        if name.startswith("n2") and threads > 1:
+            share /= threads
+        time += share
+    plan = plan_memory(strategy, stats, memory_budget, compact)
+    return Estimate(strategy, time, plan.memory)
+
+
+def choose(
+    stats: dict,
+    time_budget: float = 0,
+    memory_budget: int = 0,
+    accuracy: str | None = None,
+    threads: int = 0,
+    strategies: list[str] = ACCURACY,
+    compact: bool = True,
+) -> tuple[Estimate, list[Estimate]]:
+    """
+    Return the chosen estimate and all candidates among the given
+    strategies. With an accuracy target, pick the fastest strategy at
+    least that accurate within the budget, otherwise pick the most accurate
+    strategy within the budget. If nothing fits, fall back to the fastest.
+    Compact is passed on to plan_memory().
+    """
+    candidates = [
+        estimate(strategy, stats, threads, memory_budget, compact)
+        for strategy in ACCURACY
+        if strategy in strategies
+    ]
+    fitting = [c for c in candidates if c.fits(time_budget, memory_budget)]
+    if accuracy is not None:
+        level = ACCURACY.index(accuracy)
+        accurate = [c for c in fitting if ACCURACY.index(c.strategy) >= level]
+        if accurate:
+            return min(accurate, key=lambda c: c.time), candidates
+    if fitting:
+        return fitting[-1], candidates
+    return min(candidates, key=lambda c: c.time), candidates
@@ -0,0 +1,128 @@
+# -----------------------------------------------------------------------------
+# MAFFTpy - Multiple sequence alignment with MAFFT
+# Copyright (C) 2021  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Collapse identical sequences before alignment and expand them afterwards"""
+
+from dataclasses import dataclass
+
+from .tree import Node, _postorder, format_newick, parse_newick
+
+_normal = str.maketrans("", "", "- \t\r\n")
+
+
+@dataclass
+class Duplicates:
+    """The ids of all input records, and the unique record each one copies"""
+
+    ids: list[str]
+    representatives: list[int]
+
+    @property
+    def count(self) -> int:
+        return len(self.ids) - len(set(self.representatives))
+
+    def copies(self) -> dict[str, list[str]]:
+        """The ids of the copies of each unique sequence, by its own id"""
+        copies = {}
+        for index, rep in enumerate(self.representatives):
+            if index != rep:
+                copies.setdefault(self.ids[rep], []).append(self.ids[index])
+        return copies
+
+
+def _blocks(text: str) -> list[tuple[str, str]]:
+    """Split FASTA text into its header lines and raw sequence lines"""
+    blocks = []
+    for chunk in ("\n" + text).split("\n>")[1:]:
+        header, _, body = chunk.partition("\n")
+        if body and not body.endswith("\n"):
+            body += "\n"
+        blocks.append((header, body))
+    return blocks
+
+
+def collapse(text: str) -> tuple[str, Duplicates | None]:
+    """
+    Keep the first record of every sequence, ignoring case and gaps.
+    Return the text unchanged and None if there are no duplicates.
+    """
+    blocks = _blocks(text)
+    first = {}
+    representatives = []
+    for index, (_, body) in enumerate(blocks):
+        key = body.translate(_normal).upper()
+        representatives.append(first.setdefault(key, index))
+    if len(first) == len(blocks):
+        return text, None
+    kept = [index for index, rep in enumerate(representatives) if index == rep]
+    prefix = text[: text.find(">")] if blocks else ""
+    text = prefix + "".join(f">{blocks[i][0]}\n{blocks[i][1]}" for i in kept)
+    ids = [header.strip() for header, _ in blocks]
+    return text, Duplicates(ids, representatives)
+
+
+def expand(output: str, duplicates: Duplicates) -> str:
+    """
+    Give every input record the aligned row of its representative,
+    in input order. Names that the core decorated keep their prefix.
+    """
+    blocks = _blocks(output)
+    rows = {}
+    for index, rep in enumerate(duplicates.representatives):
+        if index == rep:
+            rows[rep] = blocks[len(rows)]
+    parts = []
+    for index, rep in enumerate(duplicates.representatives):
+        header, body = rows[rep]
+        if index != rep:
+            original = duplicates.ids[rep]
+            prefix = header[: -len(original)] if header.endswith(original) else ""
+            header = prefix + duplicates.ids[index]
+        parts.append(f">{header}\n{body}")
+    return "".join(parts)
+
+
+def prune_tree(newick: str, names: set[str]) -> str:
+    """Remove the leaves with the given names from a Newick tree"""
+    root = parse_newick(newick)
+    # Internal nodes left without leaves
+    empty = set()
+    for node in _postorder(root):
+        if not node.children:
+            continue
+        node.children = [
+            child
+            for child in node.children
+            if id(child) not in empty and (child.children or child.label not in names)
+        ]
+        if not node.children:
+            empty.add(id(node))
+    return format_newick(root)
+
+
+def expand_tree(newick: str, duplicates: Duplicates) -> str:
+    """Attach the copies of each sequence as zero-length siblings of it"""
+    copies = duplicates.copies()
+    root = parse_newick(newick)
+    for node in _postorder(root):
+        if node.children or node.label not in copies:
+            continue
+        leaves = [node.label] + copies[node.label]
+        node.children = [Node(label, 0.0) for label in leaves]
+        node.label = ""
+    return format_newick(root)
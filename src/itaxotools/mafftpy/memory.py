@@ -0,0 +1,167 @@
+# -----------------------------------------------------------------------------
+# MAFFTpy - Multiple sequence alignment with MAFFT
+# Copyright (C) 2021  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Peak memory estimates and the memory-saving modes they select"""
+
+import math
+from dataclasses import dataclass
+from pathlib import Path
+
+# Measured with the stage metrics of FFT-NS-2 and FFT-NS-i on DNA, in bytes
+BASE = 48 * 2**20
+RESIDUE = 18  # Sequences and profiles of disttbfast, per residue
+REFINE_SEQUENCE = 80 * 2**10  # Buffers of dvtditr, per sequence
+DP_CELL = 13  # Dynamic programming matrices of A__align, per cell
+MATRIX_CELL = 4  # Half distance matrix of doubles, per squared sequence
+COMPACT_RESIDUE = 8  # Alignment tables of compact guide trees, per residue
+COMPACT_MATRIX = 1.5  # Bytes used per byte of a partial distance matrix
+
+# Measured with benchmarks/calibrate.py on DNA and protein, in bytes
+GINSI_PAIR = 1.5  # Anchors of the pairwise alignments, per pair and residue
+PARTTREE_RESIDUE = 4  # Partitions and their profiles, per residue and level
+
+# Longer sequences are always aligned in the memory-saving mode of the core
+MEMSAVE_LENGTH = 30000
+
+# Values at least this large mean that cgroups set no limit
+_UNLIMITED = 2**60
+
+
+def _read_cgroup_v2_limit() -> int | None:
+    """Limit from memory.max of the cgroup this process belongs to"""
+    try:
+        lines = Path("/proc/self/cgroup").read_text().splitlines()
+    except OSError:
+        return None
+    limits = []
+    for line in lines:
+        if not line.startswith("0::"):
+            continue
+        path = Path("/sys/fs/cgroup") / line[3:].lstrip("/")
+        for directory in [path, *path.parents]:
+            try:
+                value = (directory / "memory.max").read_text().strip()
+            except OSError:
+                value = "max"
+            if value != "max":
+                limits.append(int(value))
+            if directory == Path("/sys/fs/cgroup"):
+                break
+    return min(limits) if limits else None
+
+
+def _read_cgroup_v1_limit() -> int | None:
+    """Limit from the memory controller of cgroup v1"""
+    try:
+        limit = int(Path("/sys/fs/cgroup/memory/memory.limit_in_bytes").read_text())
+    except (OSError, ValueError):
+        return None
+    if 0 < limit < _UNLIMITED:
+        return limit
+    return None
+
+
+def memory_limit() -> int | None:
+    """Memory limit of the cgroup of this process in bytes, or None"""
+    limit = _read_cgroup_v2_limit()
+    if limit is None:
+        limit = _read_cgroup_v1_limit()
+    return limit
+
+
+@dataclass(frozen=True)
+class MemoryPlan:
+    """
+    Predicted peak memory of a run and the memory-saving modes that keep it
+    within budget. With memsavetree, the guide tree is built from at most
+    matrix bytes of distances, or without a distance matrix if matrix is 0.
+    With memopt, group alignments use the linear space algorithm.
+    """
+
+    strategy: str
+    memory: int
+    budget: int
+    memsavetree: bool = False
+    matrix: int = 0
+    memopt: bool = False
+
+    def fits(self) -> bool:
+        return not self.budget or self.memory <= self.budget
+
+
+def peak_memory(
+    strategy: str,
+    stats: dict,
+    matrix: int | None = None,
+    memopt: bool = False,
+) -> int:
+    """
+    Predict the peak memory of a strategy in bytes, from the countlen
+    statistics. For FFT-NS, matrix caps the bytes of distances kept for
+    the guide tree, and memopt drops the dynamic programming matrices.
+    """
+    n = stats["nseq"]
+    length = stats["nlenmax"]
+    if strategy == "ginsi":
+        return int(BASE + GINSI_PAIR * n * n * length + DP_CELL * length**2)
+    if strategy == "parttree":
+        levels = math.log2(n + 1)
+        return int(BASE + PARTTREE_RESIDUE * n * length * levels + DP_CELL * length**2)
+    distances = MATRIX_CELL * n * n
+    if matrix is not None:
+        distances = COMPACT_RESIDUE * n * length + int(COMPACT_MATRIX * matrix)
+    dp = 0
+    if not memopt and length <= MEMSAVE_LENGTH:
+        dp = DP_CELL * length * length
+    memory = BASE + RESIDUE * n * length + distances + dp
+    if strategy == "fftnsi":
+        memory = max(memory, BASE + REFINE_SEQUENCE * n + dp)
+    return memory
+
+
+def plan_memory(
+    strategy: str, stats: dict, budget: int = 0, compact: bool = True
+) -> MemoryPlan:
+    """
+    Choose the memory-saving modes of FFT-NS for the given budget in bytes.
+    The guide tree is first built from a part of the distance matrix, then
+    without one. Group alignments only switch to linear space if that is
+    enough to fit, since it is several times slower. If nothing fits, the
+    plan that uses the least memory is returned. Other strategies, and
+    FFT-NS when compact is False, are only estimated.
+    """
+    plan = MemoryPlan(strategy, peak_memory(strategy, stats), budget)
+    if plan.fits() or not compact or strategy not in ("fftns1", "fftns2", "fftnsi"):
+        return plan
+    plans = []
+    for memopt in (False, True):
+        memory = peak_memory(strategy, stats, memopt=memopt)
+        plan = MemoryPlan(strategy, memory, budget, memopt=memopt)
+        if plan.fits():
+            return plan
+        rest = peak_memory(strategy, stats, matrix=0, memopt=memopt)
+        matrix = max(int((budget - rest) / COMPACT_MATRIX), 0)
+        # A partial matrix holds rows of distances to every sequence
+        if matrix < 8 * stats["nseq"]:
+            matrix = 0
+        memory = peak_memory(strategy, stats, matrix=matrix, memopt=memopt)
+        plan = MemoryPlan(strategy, memory, budget, True, matrix, memopt)
+        if plan.fits():
+            return plan
+        plans.append(plan)
+    return min(plans, key=lambda plan: plan.memory)
@@ -0,0 +1,90 @@
+# -----------------------------------------------------------------------------
+# MAFFTpy - Multiple sequence alignment with MAFFT
+# Copyright (C) 2021  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Wall time, CPU time, memory and size measurements for each core stage"""
+
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_status = Path("/proc/self/status")
+_clear_refs = Path("/proc/self/clear_refs")
+
+
+def reset_peak_rss() -> bool:
+    """Reset the peak resident set size, only possible on Linux"""
+    try:
+        _clear_refs.write_text("5")
+    except OSError:
+        return False
+    return True
+
+
+def peak_rss() -> int | None:
+    """Peak resident set size of this process in bytes"""
+    try:
+        match = re.search(r"VmHWM:\s+(\d+)\s+kB", _status.read_text())
+    except OSError:
+        match = None
+    if match is not None:
+        return int(match.group(1)) * 1024
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def size_of(item: str | bytes | bytearray | None) -> int | None:
+    """Size of a file or buffer in bytes, or None if unknown"""
+    if item is None:
+        return None
+    if isinstance(item, (bytes, bytearray)):
+        return len(item)
+    try:
+        return os.path.getsize(item)
+    except OSError:
+        return None
+
+
+@contextmanager
+def measure(metrics: list[dict], stage: str, input=None, output=None):
+    """
+    Append the metrics of the enclosed stage to the given list.
+    Input and output may be filenames or buffers. The peak memory is that
+    of the stage alone when the platform can reset it, otherwise it is the
+    peak of the whole process so far.
+    """
+    metric = dict(stage=stage, input=size_of(input))
+    reset_peak_rss()
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    yield metric
+    metric["wall"] = time.perf_counter() - wall
+    metric["cpu"] = time.process_time() - cpu
+    metric["rss"] = peak_rss()
+    metric["output"] = size_of(output)
+    metrics.append(metric)
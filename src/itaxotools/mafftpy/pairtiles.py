@@ -0,0 +1,75 @@
+# -----------------------------------------------------------------------------
+# MAFFTpy - Multiple sequence alignment with MAFFT
+# Copyright (C) 2021  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+
+"""Split the pairwise alignments of G-INS-i across processes or machines"""
+
+from functools import partial
+
+from .core import MultipleSequenceAlignment, Records, records_to_bytes
+from .pool import MafftPool
+from .threads import available_cores
+
+
+def pair_tile(records: Records | bytes, index: int, count: int, **kwargs) -> bytes:
+    """
+    Compute one of count tiles of the G-INS-i pairwise stage. This is a
+    module-level function, so that any executor can send it elsewhere.
+    """
+    job = MultipleSequenceAlignment.from_records(records, strategy="ginsi", **kwargs)
+    job.vars.set_pair_tile(index, count)
+    job.start()
+    return job.tile
+
+
+def align_tiled(
+    records: Records | bytes,
+    tiles: int | None = None,
+    workers: int | None = None,
+    executor=None,
+    **kwargs,
+) -> list[tuple[str, str]]:
+    """
+    Align with G-INS-i, computing the pairwise alignments in tiles. The
+    tiles are computed in a pool of workers, or with the map() method of
+    the given executor, such as a concurrent.futures or MPI pool executor.
+    The result is the same as that of a single G-INS-i job.
+    """
+    data = records_to_bytes(records)
+    if workers is None:
+        workers = available_cores()
+    if tiles is None:
+        tiles = workers
+    if executor is None:
+        with MafftPool(workers) as pool:
+            jobs = []
+            for index in range(tiles):
+                job = MultipleSequenceAlignment.from_records(
+                    data, strategy="ginsi", **kwargs
+                )
+                job.vars.set_pair_tile(index, tiles)
+                jobs.append(job)
+            results = [job.tile for job in pool.map(jobs)]
+    else:
+        results = list(
+            executor.map(partial(pair_tile, data, count=tiles, **kwargs), range(tiles))
+        )
+    job = MultipleSequenceAlignment.from_records(data, strategy="ginsi", **kwargs)
+    job.vars.set_pair_tiles(results)
+    job.start()
+    return job.get_records()
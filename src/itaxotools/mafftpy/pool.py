@@ -0,0 +1,240 @@
+# -----------------------------------------------------------------------------
+# MAFFTpy - Multiple sequence alignment with MAFFT
+# Copyright (C) 2021  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Persistent pool of worker processes for the MAFFT core"""
+
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future
+from multiprocessing import Pipe, Process
+from typing import Iterable, Iterator
+
+from .core import MultipleSequenceAlignment, Records, Strategy
+from .threads import available_cores
+
+
+def _clear(path: str):
+    """Remove everything inside the given directory"""
+    for entry in os.scandir(path):
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            os.remove(entry.path)
+
+
+def _work(connection, max_jobs: int):
+    """Worker process loop, exits after max_jobs or on the first error"""
+    with tempfile.TemporaryDirectory(prefix="mafft_") as scratch:
+        for _ in range(max_jobs):
+            try:
+                job = connection.recv()
+            except EOFError:
+                return
+            if job is None:
+                return
+            if job.target is None:
+                job.target = scratch
+            if job.progress:
+                job.progress = connection.send
+            try:
+                job.run()
+            except Exception as exception:
+                connection.send((False, f"MAFFT internal error: {exception!r}"))
+                return
+            connection.send((True, job._child_state()))
+            _clear(scratch)
+
+
+class _Worker:
+    """Parent side of a worker process, respawned whenever it exits"""
+
+    def __init__(self, max_jobs: int):
+        self.max_jobs = max_jobs
+        self.process = None
+        self.connection = None
+        self.jobs = 0
+
+    def spawn(self):
+        self.connection, child = Pipe()
+        self.process = Process(target=_work, args=(child, self.max_jobs), daemon=True)
+        self.process.start()
+        child.close()
+        self.jobs = 0
+
+    def kill(self):
+        """Terminate the worker without waiting for its current job"""
+        if self.process is None:
+            return
+        self.process.terminate()
+        self.process.join()
+        self.connection.close()
+        self.process = None
+        self.connection = None
+
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            try:
+                self.connection.send(None)
+            except OSError:
+                pass
+        self.process.join()
+        self.connection.close()
+        self.process = None
+        self.connection = None
+
+    def run(self, job: MultipleSequenceAlignment) -> tuple[bool, object]:
+        """Return (True, state) on success, or (False, message) on failure"""
+        if self.process is None or self.jobs >= self.max_jobs:
+            self.stop()
+            self.spawn()
+        self.jobs += 1
+        try:
+            self.connection.send(job)
+            ok, state = job._receive(self.connection)
+        except (EOFError, OSError):
+            ok, state = False, "MAFFT internal error, please check logs."
+        except BaseException:
+            self.kill()
+            raise
+        if not ok:
+            self.stop()
+        return ok, state
+
+
+class MafftPool:
+    """
+    Keep a number of warm worker processes with the MAFFT core loaded.
+    Every job still runs outside the calling process, for the same reasons
+    given in MultipleSequenceAlignment.start(). A worker is replaced after
+    it crashes, and after it has run max_jobs jobs, in order to discard
+    any global state left behind by the core.
+
+    Jobs that detect their thread count (thread=-1) share a budget of
+    threads, which defaults to the available cores, divided by workers.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_jobs: int = 16,
+        threads: int | None = None,
+    ):
+        if workers is None:
+            workers = available_cores()
+        if threads is None:
+            threads = available_cores()
+        if workers < 1 or max_jobs < 1:
+            raise ValueError("Need at least one worker and one job per worker.")
+        self.threadlimit = max(1, threads // workers)
+        self._queue = queue.SimpleQueue()
+        self._workers = [_Worker(max_jobs) for _ in range(workers)]
+        self._threads = []
+        self._shutdown = False
+        for worker in self._workers:
+            worker.spawn()
+            thread = threading.Thread(target=self._serve, args=(worker,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    def _serve(self, worker: _Worker):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            future, job = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if job.vars.numthreads < 0 and not job.vars.threadlimit:
+                    job.vars.threadlimit = self.threadlimit
+                if job.data is None:
+                    job._prepare()
+                else:
+                    # In-memory jobs need no directory here, only the checks
+                    job._validate()
+                key = job._cache_key()
+                if key is not None and job._load_cached(key):
+                    future.set_result(job)
+                    continue
+                ok, state = worker.run(job)
+                if ok:
+                    job._update_from_child(state)
+                    if key is not None:
+                        job._store_cached(key)
+                    future.set_result(job)
+                else:
+                    future.set_exception(RuntimeError(state))
+            except Exception as exception:
+                future.set_exception(exception)
+        worker.stop()
+
+    def submit(self, job: MultipleSequenceAlignment) -> Future:
+        """Schedule the alignment, the future resolves to the same object"""
+        if self._shutdown:
+            raise RuntimeError("Cannot submit jobs after shutdown.")
+        future = Future()
+        self._queue.put((future, job))
+        return future
+
+    def align(
+        self, records: Records | bytes, strategy: Strategy = "auto", **kwargs
+    ) -> Future:
+        """Schedule an in-memory alignment, the future resolves to aligned pairs"""
+        job = MultipleSequenceAlignment.from_records(
+            records, strategy=strategy, **kwargs
+        )
+        records_future = Future()
+        records_future.set_running_or_notify_cancel()
+
+        def done(future: Future):
+            try:
+                records_future.set_result(future.result().get_records())
+            except BaseException as exception:
+                records_future.set_exception(exception)
+
+        self.submit(job).add_done_callback(done)
+        return records_future
+
+    def map(
+        self, jobs: Iterable[MultipleSequenceAlignment]
+    ) -> Iterator[MultipleSequenceAlignment]:
+        """Schedule all alignments at once, yield them in the order given"""
+        futures = [self.submit(job) for job in jobs]
+        return (future.result() for future in futures)
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs, workers exit once the queue is drained"""
+        if self._shutdown:
+            return
+        self._shutdown = True
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
@@ -0,0 +1,136 @@
+# -----------------------------------------------------------------------------
+# MAFFTpy - Multiple sequence alignment with MAFFT
+# Copyright (C) 2021  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Structured progress events parsed from the core log"""
+
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Literal
+
+EventKind = Literal[
+    "stage_start", "stage_end", "pairs", "tree", "progressive", "iteration"
+]
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """
+    Stage events are sent for every stage. The other kinds report
+    done out of total for the pair, tree and progressive phases, or the
+    iteration number and the score reached during refinement.
+    """
+
+    kind: EventKind
+    stage: str
+    done: int | None = None
+    total: int | None = None
+    iteration: int | None = None
+    score: float | None = None
+
+
+_phases = [
+    (re.compile(r"All-to-all alignment|Making a distance matrix|Step 2/2"), "pairs"),
+    (re.compile(r"Constructing a .*tree"), "tree"),
+    (re.compile(r"Progressive alignment"), "progressive"),
+    (re.compile(r"Loading 'hat3'"), "tree"),
+]
+_count = re.compile(r"^\s*(?:STEP\s+)?(\d+)\s*/\s*(\d+)\b")
+_iteration = re.compile(
+    r"^(?:STEP )?(\d{3})-(\d{3,4})-\d"
+    r".*?(?:identical|accepted|rejected|better|worse)"
+    r"(?:\.)?\s*score = (-?[\d.]+(?:e[+-]?\d+)?)"
+)
+
+
+class ProgressParser:
+    """
+    File-like sink for the core log. Lines are parsed into events that are
+    passed to the callback, at most once per interval for each event kind,
+    except for stage events and the last step of each phase. The raw text
+    is copied to the log file if one is given.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[ProgressEvent], object],
+        log: str | None = None,
+        interval: float = 0.1,
+    ):
+        self.callback = callback
+        self.interval = interval
+        self.log = open(log, "a") if log else None
+        self.stage = None
+        self.phase = None
+        self._partial = ""
+        self._last = {}
+
+    def emit(self, event: ProgressEvent, force: bool = False):
+        if not force:
+            now = time.monotonic()
+            if now - self._last.get(event.kind, -self.interval) < self.interval:
+                return
+            self._last[event.kind] = now
+        self.callback(event)
+
+    def start(self, stage: str):
+        self.stage = stage
+        self.phase = "tree" if stage == "dvtditr" else "pairs"
+        self._last.clear()
+        self.emit(ProgressEvent("stage_start", stage), force=True)
+
+    def end(self):
+        self._parse(self._partial)
+        self._partial = ""
+        self.emit(ProgressEvent("stage_end", self.stage), force=True)
+
+    def _parse(self, line: str):
+        for pattern, phase in _phases:
+            if pattern.search(line):
+                self.phase = phase
+                return
+        if match := _iteration.match(line):
+            iteration, step, score = match.groups()
+            event = ProgressEvent(
+                "iteration",
+                self.stage,
+                done=int(step),
+                iteration=int(iteration),
+                score=float(score),
+            )
+            self.emit(event)
+            return
+        if match := _count.match(line):
+            done, total = int(match.group(1)), int(match.group(2))
+            event = ProgressEvent(self.phase, self.stage, done=done, total=total)
+            self.emit(event, force=done >= total)
+
+    def write(self, text: str):
+        if self.log is not None:
+            self.log.write(text)
+        *lines, self._partial = re.split(r"[\r\n]", self._partial + text)
+        for line in lines:
+            self._parse(line)
+
+    def flush(self):
+        if self.log is not None:
+            self.log.flush()
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
@@ -0,0 +1,92 @@
+# -----------------------------------------------------------------------------
+# MAFFTpy - Multiple sequence alignment with MAFFT
+# Copyright (C) 2021  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Thread count detection for the multithreaded stages"""
+
+import math
+import os
+from pathlib import Path
+
+
+def _read_cgroup_v2_quota() -> float | None:
+    """Quota from cpu.max of the cgroup this process belongs to"""
+    try:
+        lines = Path("/proc/self/cgroup").read_text().splitlines()
+    except OSError:
+        return None
+    for line in lines:
+        if not line.startswith("0::"):
+            continue
+        path = Path("/sys/fs/cgroup") / line[3:].lstrip("/")
+        for directory in [path, *path.parents]:
+            try:
+                quota, period = (directory / "cpu.max").read_text().split()
+            except (OSError, ValueError):
+                continue
+            if quota != "max":
+                return int(quota) / int(period)
+            if directory == Path("/sys/fs/cgroup"):
+                break
+    return None
+
+
+def _read_cgroup_v1_quota() -> float | None:
+    """Quota from the cpu controller of cgroup v1"""
+    root = Path("/sys/fs/cgroup/cpu")
+    try:
+        quota = int((root / "cpu.cfs_quota_us").read_text())
+        period = int((root / "cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    if quota > 0 and period > 0:
+        return quota / period
+    return None
+
+
+def available_cores() -> int:
+    """Number of cores usable by this process, respecting affinity and cgroups"""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    quota = _read_cgroup_v2_quota()
+    if quota is None:
+        quota = _read_cgroup_v1_quota()
+    if quota is not None:
+        cores = min(cores, math.ceil(quota))
+    return max(1, cores)
+
+
+def resolve_threads(
+    numthreads: int, numthreadstb: int, numthreadsit: int, limit: int = 0
+) -> tuple[int, int, int]:
+    """
+    Negative values select defaults, as in the mafft script:
+    detect the cores for the pair stage, then use at most 16 threads
+    for the tree stage and 8 threads for the iteration stage.
+    If a limit is given, the detected cores are capped to it.
+    """
+    if numthreads < 0:
+        numthreads = available_cores()
+        if limit > 0:
+            numthreads = min(numthreads, limit)
+    if numthreadstb < 0:
+        numthreadstb = min(numthreads, 16)
+    if numthreadsit < 0:
+        numthreadsit = min(numthreads, 8)
+    return numthreads, numthreadstb, numthreadsit
@@ -0,0 +1,168 @@
+# -----------------------------------------------------------------------------
+# MAFFTpy - Multiple sequence alignment with MAFFT
+# Copyright (C) 2021  Patmanidis Stefanos
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Conversion of guide trees between Newick and the core format"""
+
+import re
+from dataclasses import dataclass, field
+
+_token = re.compile(r"'(?:[^']|'')*'|\[[^\]]*\]|[(),:;]|[^\s(),:;'\[\]]+|\s+")
+_special = re.compile(r"[\s(),:;'\[\]]")
+
+
+@dataclass
+class Node:
+    label: str = ""
+    length: float | None = None
+    children: list["Node"] = field(default_factory=list)
+
+
+def parse_newick(text: str) -> Node:
+    """Parse a single Newick tree, comments are ignored"""
+    root = node = Node()
+    parents = []
+    length = False
+    for token in _token.findall(text):
+        if token.isspace() or token.startswith("["):
+            continue
+        if length:
+            try:
+                node.length = float(token)
+            except ValueError:
+                raise ValueError("Invalid branch length in the guide tree.")
+            length = False
+        elif token == "(":
+            parents.append(node)
+            node = Node()
+            parents[-1].children.append(node)
+        elif token == ",":
+            if not parents:
+                raise ValueError("Unbalanced parentheses in the guide tree.")
+            node = Node()
+            parents[-1].children.append(node)
+        elif token == ")":
+            if not parents:
+                raise ValueError("Unbalanced parentheses in the guide tree.")
+            node = parents.pop()
+        elif token == ":":
+            length = True
+        elif token == ";":
+            break
+        else:
+            node.label = _unquote(token)
+    if parents or length:
+        raise ValueError("Incomplete guide tree.")
+    return root
+
+
+def format_newick(root: Node) -> str:
+    parts = []
+    # Nodes to write, or separators once their children are done
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            parts.append(node)
+            continue
+        suffix = "" if node.length is None else f":{node.length!r}"
+        if not node.children:
+            parts.append(_quote(node.label) + suffix)
+            continue
+        parts.append("(")
+        stack.append(")" + suffix)
+        for index, child in enumerate(reversed(node.children)):
+            stack.append(child)
+            if index < len(node.children) - 1:
+                stack.append(",")
+    return "".join(parts) + ";"
+
+
+def _unquote(label: str) -> str:
+    if label.startswith("'"):
+        return label[1:-1].replace("''", "'")
+    return label
+
+
+def _quote(label: str) -> str:
+    if _special.search(label):
+        return "'" + label.replace("'", "''") + "'"
+    return label
+
+
+def _postorder(root: Node) -> list[Node]:
+    nodes = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(node.children)
+    return nodes[::-1]
+
+
+def from_core(text: str, ids: list[str]) -> str:
+    """
+    Convert a tree written by the core, whose leaves are labelled
+    by their position and a mangled name, to Newick with the given ids.
+    """
+    root = parse_newick(text)
+    for node in _postorder(root):
+        if not node.children:
+            node.label = ids[int(node.label.strip().split("_", 1)[0]) - 1]
+    return format_newick(root)
+
+
+def to_core(text: str, ids: list[str]) -> str:
+    """
+    Convert a Newick tree over the given ids to the input format of the core:
+    one line per merge, with the smallest member of each cluster
+    and its branch length. Multifurcations are resolved arbitrarily.
+    """
+    positions = {}
+    for position, name in enumerate(ids):
+        if name in positions:
+            raise ValueError(f"Duplicate sequence name: {name!r}")
+        positions[name] = position
+    lines = []
+    # Smallest member and branch length of each node
+    members = {}
+    for node in _postorder(parse_newick(text)):
+        length = node.length if node.length is not None else 0.0
+        if not node.children:
+            if node.label not in positions:
+                raise ValueError(f"Unknown sequence in the guide tree: {node.label!r}")
+            if positions[node.label] is None:
+                raise ValueError(f"Repeated sequence in the guide tree: {node.label!r}")
+            members[id(node)] = (positions[node.label], length)
+            positions[node.label] = None
+            continue
+        if any(child.length is None for child in node.children):
+            raise ValueError("The guide tree must have branch lengths.")
+        first = members.pop(id(node.children[0]))
+        for child in node.children[1:]:
+            first, second = sorted([first, members.pop(id(child))])
+            # Lengths are kept exact, as they set the sequence weights
+            lines.append(
+                f"{first[0] + 1:5d} {second[0] + 1:5d} {first[1]!r} {second[1]!r}\n"
+            )
+            first = (first[0], 0.0)
+        if len(node.children) == 1:
+            length += first[1]
+        members[id(node)] = (first[0], length)
+    if any(position is not None for position in positions.values()):
+        raise ValueError("The guide tree must contain every sequence.")
+    return "".join(lines)
@@ -131,6 +131,7 @@ void imp_match_init_strictD( double *imp, int clus1, int clus2, int lgth1, int l
 	{
 		if( impmtx ) FreeFloatMtx( impmtx );
 		impmtx = NULL;
+		impalloclen = 0;
 //		if( nocount1 ) free( nocount1 );
 //		nocount1 = NULL;
 //		if( nocount2 ) free( nocount2 );
@@ -130,6 +130,7 @@ static void mymergesort( int first, int last, Segment **seg )
 	if( seg == NULL )
 	{
 		free( work ); work = NULL;
+		allo = 0;
 		return;
 	}
 
@@ -231,7 +232,7 @@ double Falign_localhom( int **whichmtx, double ***scoringmatrices, double **n_dy
 			partA__align_variousdist( NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, 0, 0, 0, 0, NULL, 0, 0, 0, 0, NULL, NULL, NULL, NULL, NULL, NULL, NULL, 0, NULL );
 			blockAlign2( NULL, NULL, NULL, NULL, NULL, NULL );
 			if( crossscore ) FreeDoubleMtx( crossscore );
-			FreeCharMtx( result1 );
+			FreeCharMtx( result1 ); result1 = NULL;
 			FreeCharMtx( result2 );
 			FreeCharMtx( tmpres1 );
 			FreeCharMtx( tmpres2 );
@@ -1241,6 +1241,9 @@ for( i=0; i<lgth2+1; i++ )
 fprintf( stderr, "\n" );
 #endif
 
+	if( !trywarp && G__align11_simd( amino_dynamicmtx, seq1[0], seq2[0], lgth1, lgth2, lasti, initverticalw, currentw, lastverticalw, ijp, fpenalty, fpenalty_ex, &wm ) )
+		goto tracking;
+
 	for( i=1; i<lasti; i++ )
 	{
 		wtmp = previousw;
@@ -1445,6 +1448,7 @@ fprintf( stderr, "\n" );
 		free( prevwarpj );
 	}
 
+tracking:
 	wmo = Atracking( currentw, lastverticalw, seq1, seq2, mseq1, mseq2, ijp, tailgp, warpis, warpjs, warpbase );
 	if( !tailgp ) wm = wmo;
 
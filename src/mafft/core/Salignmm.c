@@ -93,6 +93,7 @@ void imp_match_init_strict( double *imp, int clus1, int clus2, int lgth1, int lg
 	{
 		if( impmtx ) FreeFloatMtx( impmtx );
 		impmtx = NULL;
+		impalloclen = 0;
 //		if( nocount1 ) free( nocount1 );
 //		nocount1 = NULL;
 //		if( nocount2 ) free( nocount2 );
@@ -1807,6 +1808,18 @@ for( i=0; i<lgth2; i++ )
 	fprintf( stderr, "fgcp2[%d]=%f\n", i, ogcp2[i] );
 #endif
 
+	if( !trywarp ) switch( A__align_simd( n_dynamicmtx, *cpmx1pt, doublework, intwork, constraint ? impmtx : NULL, ogcp1, fgcp1, gapfreq1pt, ogcp2, fgcp2, gapfreq2pt, lgth1, lgth2, lasti, initverticalw, currentw, lastverticalw, ijp, fpenalty_ex, chudanpt, chudanref, &wm ) )
+	{
+		case 1:
+			goto tracking;
+		case -1:
+			*chudanres = 1;
+			free( mseq1 );
+			free( mseq2 );
+			FreeCharMtx( mseq );
+			return( -1.0 );
+	}
+
 	for( i=1; i<lasti; i++ )
 	{
 
@@ -2054,6 +2067,7 @@ fprintf( stderr, "\n" );
 	for( j=0; j<jcyc; j++ ) strcpy( mseq2[j], seq2[j] );
 	*/
 
+tracking:
 	gt1 = gt1bk = AllocateCharVec( lgth1+lgth2+1 );
 	gt2 = gt2bk = AllocateCharVec( lgth1+lgth2+1 );
 
@@ -22,6 +22,7 @@ static int smoothing;
 static double hitout;
 
 static int tuplesize;
+static int nunknown = 0;
 
 #define PLENFACA 0.01
 #define PLENFACB 10000
@@ -661,7 +662,7 @@ static int insertgapsbyotherfragments_compact( int len, char *a, char *s, int *l
 	return( realignment );
 }
 
-void makegaplistcompact( int len, int *p, int *c, int *l )
+static void makegaplistcompact( int len, int *p, int *c, int *l )
 {
 	int i;
 	int pg;
@@ -688,7 +689,7 @@ void makegaplistcompact( int len, int *p, int *c, int *l )
 }
 
 
-void gaplist2alnx( int len, char *a, char *s, int *l, int *p, int lenlimit )
+static void gaplist2alnx( int len, char *a, char *s, int *l, int *p, int lenlimit )
 {
 	int gaplen;
 	int pos, pi, posl;
@@ -790,7 +791,7 @@ static void makenewgaplist( int *l, char *a )
 }
 
 
-void arguments( int argc, char *argv[] )
+static void arguments( int argc, char *argv[] )
 {
     int c;
 
@@ -867,6 +868,9 @@ void arguments( int argc, char *argv[] )
 	distout = 0;
 	hitout = 0.0;
 	nwildcard = 0;
+	treeout = 0;
+	noalign = 0;
+	nunknown = 0;
 
     while( --argc > 0 && (*++argv)[0] == '-' )
 	{
@@ -2069,9 +2073,7 @@ static void	*addsinglethread( void *arg )
 		return( NULL );
 	}
 
-static int nunknown = 0;
-
-void seq_grp_nuc( int *grp, char *seq )
+static void seq_grp_nuc( int *grp, char *seq )
 {
 	int tmp;
 	int *grpbk = grp;
@@ -2092,7 +2094,7 @@ void seq_grp_nuc( int *grp, char *seq )
 	}
 }
 
-void seq_grp( int *grp, char *seq )
+static void seq_grp( int *grp, char *seq )
 {
 	int tmp;
 	int *grpbk = grp;
@@ -2113,7 +2115,7 @@ void seq_grp( int *grp, char *seq )
 	}
 }
 
-void makecompositiontable_p( int *table, int *pointt )
+static void makecompositiontable_p( int *table, int *pointt )
 {
 	int point;
 
@@ -2131,7 +2133,7 @@ void makecompositiontable_p( int *table, int *pointt )
 }
 
 
-void makepointtable_nuc_dectet( int *pointt, int *n )
+static void makepointtable_nuc_dectet( int *pointt, int *n )
 {
 	int point;
 	register int *p;
@@ -2166,7 +2168,7 @@ void makepointtable_nuc_dectet( int *pointt, int *n )
 	*pointt = END_OF_VEC;
 }
 
-void makepointtable_nuc_octet( int *pointt, int *n )
+static void makepointtable_nuc_octet( int *pointt, int *n )
 {
 	int point;
 	register int *p;
@@ -2198,7 +2200,7 @@ void makepointtable_nuc_octet( int *pointt, int *n )
 	*pointt = END_OF_VEC;
 }
 
-void makepointtable_nuc( int *pointt, int *n )
+static void makepointtable_nuc( int *pointt, int *n )
 {
 	int point;
 	register int *p;
@@ -2228,7 +2230,7 @@ void makepointtable_nuc( int *pointt, int *n )
 	*pointt = END_OF_VEC;
 }
 
-void makepointtable( int *pointt, int *n )
+static void makepointtable( int *pointt, int *n )
 {
 	int point;
 	register int *p;
@@ -2260,7 +2262,7 @@ void makepointtable( int *pointt, int *n )
 
 #ifdef enablemultithread
 
-void *dndprethread( void *arg )
+static void *dndprethread( void *arg )
 {
 	dndprethread_arg_t *targ = (dndprethread_arg_t *)arg;
 	int njob = targ->njob;
@@ -2454,7 +2456,7 @@ static void *distancematrixthread( void *arg )
 #endif
 
 
-void ktupledistancematrix( int nseq, int norg, int nlenmax, char **seq, char **name, double **imtx, double **nmtx )
+static void ktupledistancematrix( int nseq, int norg, int nlenmax, char **seq, char **name, double **imtx, double **nmtx )
 {
 	char *tmpseq;
 	int *grpseq;
@@ -2699,7 +2701,7 @@ void ktupledistancematrix( int nseq, int norg, int nlenmax, char **seq, char **n
 #endif
 }
 
-void dndpre( int nseq, char **seq, double **mtx ) // not used yet
+static void dndpre( int nseq, char **seq, double **mtx ) // not used yet
 {
 	int i, j, ilim;
 	double *selfscore;
@@ -2964,7 +2966,7 @@ static double ratioambiguouscolumn_simple( char **s, int n, int l )
 	return( (double)nambiguous / l );
 }
 
-int main( int argc, char *argv[] )
+int addsingle( int argc, char *argv[] )
 {
 	static int  *nlen;
 	static char **name, **seq;
@@ -3011,6 +3013,7 @@ int main( int argc, char *argv[] )
 	Addtree *addtree;
 
 
+	eff_kozo_mapped = NULL;
 	arguments( argc, argv );
 #ifndef enablemultithread
 	nthread = 0;
@@ -3823,9 +3826,11 @@ int main( int argc, char *argv[] )
 
 
 
-	if( commonIP ) FreeIntMtx( commonIP );
-	commonIP = NULL;
+	FreeCommonIP();
 	A__align( NULL, 0, 0, NULL, NULL, NULL, NULL, 0, 0, 0, 0, NULL, NULL, NULL, NULL, NULL, NULL, 0, NULL, 0, 0, -1, -1, NULL, NULL, NULL, 0.0, 0.0 );
+	G__align11( NULL, NULL, NULL, 0, 0, 0 );
+	Falign( NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, 0, 0, 0, NULL, NULL, 0, NULL );
+	Falign_udpari_long( NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, 0, 0, 0, NULL );
 	FreeIntMtx( newgaplist_o );
 	FreeIntVec( newgaplist_compact );
 	FreeIntVec( posmap );
@@ -3891,3 +3896,10 @@ int main( int argc, char *argv[] )
 	}
 	return( 0 );
 }
+
+#ifndef ismodule
+int main( int argc, char *argv[] )
+{
+	return addsingle( argc, argv );
+}
+#endif
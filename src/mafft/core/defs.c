@@ -136,6 +136,15 @@ char codonscore = 0;
 
 char distout = 0;
 
+double refinetimelimit = 0.0;
+double refinemingain = 0.0;
+double refinestart = 0.0;
+double refinescore = 0.0;
+double refinescorebase = 0.0;
+
+int npairtiles = 0;
+int pairtile = 0;
+
 int terminalmargin = 100;
 
 
@@ -25,6 +25,7 @@ static int keeplength;
 static int ndeleted;
 static int mapout;
 static int smoothing;
+static int sketchsize;
 static double maxdistmtxsize;
 static int nthreadtb;
 static int useexternalanchors;
@@ -220,6 +221,7 @@ static void arguments( int argc, char *argv[] )
 	mapout = 0;
 	smoothing = 0;
 	nwildcard = 0;
+	sketchsize = 0;
 
     while( --argc > 0 && (*++argv)[0] == '-' )
 	{
@@ -313,9 +315,9 @@ static void arguments( int argc, char *argv[] )
 				case 'y':
                                         distout = *(*++argv);
 					reporterr(       "distout=%c\n", distout );
-                                        if( distout != 'c' && distout != 'h' )
+                                        if( distout != 'c' && distout != 'h' && distout != 'b' )
                                         {
-                                            reporterr(       "Set -y c or -y h in v>=7.521.\n" );
+                                            reporterr(       "Set -y c, -y h or -y b in v>=7.521.\n" );
                                             exit( 1 );
                                         }
 					--argc;
@@ -497,6 +499,11 @@ static void arguments( int argc, char *argv[] )
 				case ':':
 					nwildcard = 1;
 					break;
+				case '+':
+					sketchsize = myatoi( *++argv );
+					reporterr(       "sketchsize = %d\n", sketchsize );
+					--argc;
+					goto nextoption;
                 default:
                     reporterr(       "illegal option %c\n", c );
                     argc = 0;
@@ -3267,6 +3274,7 @@ int disttbfast( int ngui, int lgui, char **namegui, char **seqgui, int argc, cha
 	int *preservegaps = NULL;
 	char ***subalnpt = NULL;
 	int val;
+	int stopped = 0; // after writing the tree or distances that were asked for
 	char **tmpargv = NULL;
 	int iguidetree;
 	int *selfscore = NULL;
@@ -3781,6 +3789,11 @@ int disttbfast( int ngui, int lgui, char **namegui, char **seqgui, int argc, cha
 		}
 		else
 		{
+			if( sketchsize > 0 )
+			{
+				sketchdistancematrix( njob, pointt, tsize, sketchsize, nthreadpair, mtx );
+			}
+			else
 #ifdef enablemultithread
 			if( nthreadpair > 0 )
 			{
@@ -3996,6 +4009,7 @@ int disttbfast( int ngui, int lgui, char **namegui, char **seqgui, int argc, cha
 					writeData_pointer( stdout, njob, name, nlen, seq );
 					reporterr(       "\n" );
 					SHOWVERSION;
+					stopped = 1;
 					goto chudan;
 //					return( 0 );
 				}
@@ -4109,6 +4123,7 @@ int disttbfast( int ngui, int lgui, char **namegui, char **seqgui, int argc, cha
 			writeData_pointer( stdout, njob, name, nlen, seq );
 			reporterr(       "\n" );
 			SHOWVERSION;
+			stopped = 1;
 			goto chudan;
 //			return( 0 );
 		}
@@ -5070,7 +5085,7 @@ chudan:
 	closeFiles();
 	FreeCommonIP();
 
-	return( GUI_CANCEL );
+	return( stopped ? 0 : GUI_CANCEL );
 }
 
 #ifndef ismodule
@@ -25,7 +25,7 @@ typedef struct _thread_arg
 } thread_arg_t;
 
 #if 0
-void *athread( void *arg )
+static void *athread( void *arg )
 {
 	thread_arg_t *targ = (thread_arg_t *)arg;
 	int njob = targ->njob;
@@ -108,7 +108,7 @@ void *athread( void *arg )
 	}
 }
 #else
-void *athread( void *arg )
+static void *athread( void *arg )
 {
 	thread_arg_t *targ = (thread_arg_t *)arg;
 	int njob = targ->njob;
@@ -188,10 +188,11 @@ void *athread( void *arg )
 
 #endif
 
-void arguments( int argc, char *argv[] )
+static void arguments( int argc, char *argv[] )
 {
     int c;
 
+	maxdist = 1;
 	nadd = 0;
 	nthread = 1;
 	alg = 'X';
@@ -315,7 +316,7 @@ void arguments( int argc, char *argv[] )
 	}
 }
 
-int main( int argc, char **argv )
+int dndpre( int argc, char **argv )
 {
 	int i, j, ilim;
 	char **seq;
@@ -525,11 +526,23 @@ int main( int argc, char **argv )
 	}
 #endif
 	if( skiptable ) FreeIntMtx( skiptable ); skiptable = NULL;
+	FreeCharMtx( seq );
+	FreeCharMtx( name );
+	FreeDoubleMtx( mtx );
+	FreeFloatVec( selfscore );
+	FreeIntVec( nlen );
 	SHOWVERSION;
-	exit( 0 );
+	return( 0 );
 /*
 	res = system( ALNDIR "/spgsdl < hat2"  );
 	if( res ) exit( 1 );
 	else exit( 0 );
 */
 }
+
+#ifndef ismodule
+int main( int argc, char *argv[] )
+{
+	return dndpre( argc, argv );
+}
+#endif
@@ -0,0 +1,392 @@
+#include "mltaln.h"
+
+/*
+  Vectorized main loops of G__align11() and A__align().
+  Cells are computed along antidiagonals, four at a time with AVX2. Every cell
+  repeats the operations of the scalar loop in the same order, on the state of
+  its own row (mi, mpi) and column (m, mp), so that the scores and the traceback
+  are exactly the same. The scalar loops stay in use on other CPUs.
+*/
+
+#if defined( __GNUC__ ) && ( defined( __x86_64__ ) || defined( __i386__ ) )
+#define DPSIMD 1
+#include <immintrin.h>
+#define AVX2 __attribute__(( target( "avx2" ) ))
+#else
+#define DPSIMD 0
+#endif
+
+/* Use the AVX2 kernels if the CPU has them, unless MAFFTPY_SIMD=0 */
+int dpsimd( void )
+{
+#if DPSIMD
+	char *env = getenv( "MAFFTPY_SIMD" );
+	if( env && !strcmp( env, "0" ) ) return( 0 );
+	return( __builtin_cpu_supports( "avx2" ) );
+#else
+	return( 0 );
+#endif
+}
+
+#if DPSIMD
+
+typedef struct
+{
+	int lgth1, lgth2, lasti;
+	double *buf[3];   /* Scores on the last three antidiagonals, by row */
+	double *row0;     /* Scores of row 0 */
+	double *mi, *mpi; /* Best vertical start of each row, and its column */
+	double *m, *mp;   /* Best horizontal start of each column, and its row */
+} Diagonals;
+
+static void initdiagonals( Diagonals *dg, int lgth1, int lgth2, int lasti, double *currentw )
+{
+	int k;
+	dg->lgth1 = lgth1;
+	dg->lgth2 = lgth2;
+	dg->lasti = lasti;
+	for( k=0; k<3; k++ ) dg->buf[k] = calloc( lasti+1, sizeof( double ) );
+	dg->row0 = calloc( lgth2+1, sizeof( double ) );
+	memcpy( dg->row0, currentw, ( lgth2+1 ) * sizeof( double ) );
+	dg->mi = calloc( lasti+4, sizeof( double ) );
+	dg->mpi = calloc( lasti+4, sizeof( double ) );
+	dg->m = calloc( lgth2+4, sizeof( double ) );
+	dg->mp = calloc( lgth2+4, sizeof( double ) );
+}
+
+static void freediagonals( Diagonals *dg )
+{
+	int k;
+	for( k=0; k<3; k++ ) free( dg->buf[k] );
+	free( dg->row0 );
+	free( dg->mi );
+	free( dg->mpi );
+	free( dg->m );
+	free( dg->mp );
+}
+
+/* Start antidiagonal d from the first row and column, return its scores */
+static double *startdiagonal( Diagonals *dg, int d, double *initverticalw )
+{
+	double *w0 = dg->buf[d%3];
+	if( d <= dg->lgth2 ) w0[0] = dg->row0[d];
+	if( d < dg->lasti ) w0[d] = initverticalw[d];
+	return( w0 );
+}
+
+/* Keep the scores that the scalar loop leaves behind for the traceback */
+static void enddiagonal( Diagonals *dg, int d, int ilo, int ihi, double *currentw, double *lastverticalw )
+{
+	double *w0 = dg->buf[d%3];
+	int i = d - ( dg->lgth2 - 1 );
+	int last = dg->lasti - 1;
+	if( ilo <= i && i <= ihi ) lastverticalw[i] = w0[i];
+	if( ilo <= last && last <= ihi && d - last < dg->lgth2 ) currentw[d-last] = w0[last];
+}
+
+static double g11cell( Diagonals *dg, double *w0, double *w2, int i, int j, double match, double fpenalty, double fpenalty_ex, int **ijp )
+{
+	double diag = w2[i-1];
+	double wm = diag, g;
+	int dir = 0;
+
+	if( (g=dg->mi[i]+fpenalty) > wm )
+	{
+		wm = g;
+		dir = -( j - (int)dg->mpi[i] );
+	}
+	if( diag >= dg->mi[i] )
+	{
+		dg->mi[i] = diag;
+		dg->mpi[i] = j-1;
+	}
+	dg->mi[i] += ( i < dg->lgth1 ) ? fpenalty_ex : 0.0;
+
+	if( (g=dg->m[j]+fpenalty) > wm )
+	{
+		wm = g;
+		dir = +( i - (int)dg->mp[j] );
+	}
+	if( diag >= dg->m[j] )
+	{
+		dg->m[j] = diag;
+		dg->mp[j] = i-1;
+	}
+	if( j < dg->lgth2 ) dg->m[j] += fpenalty_ex;
+
+	ijp[i][j] = dir;
+	w0[i] = match + wm;
+	return( wm );
+}
+
+#define REVERSE( x ) _mm256_permute4x64_pd( x, 0x1B )
+
+AVX2 static void g11avx2( double **mtx, char *seq1, char *seq2, int lgth1, int lgth2, int lasti, double *initverticalw, double *currentw, double *lastverticalw, int **ijp, double fpenalty, double fpenalty_ex, double *wmpt )
+{
+	Diagonals dg;
+	double *w0, *w2, **rows;
+	unsigned char *s2 = (unsigned char *)seq2;
+	int i, j, d, ilo, ihi, dirs[4];
+	double wm = 0.0;
+	__m256d vdiag, vmi, vmpi, vm, vmp, vi, vj, vwm, vdir, vg, c;
+	__m256d vpen = _mm256_set1_pd( fpenalty ), vex = _mm256_set1_pd( fpenalty_ex );
+	__m256d vzero = _mm256_setzero_pd(), vone = _mm256_set1_pd( 1.0 );
+	__m256d vlgth1 = _mm256_set1_pd( lgth1 ), vlgth2 = _mm256_set1_pd( lgth2 );
+
+	initdiagonals( &dg, lgth1, lgth2, lasti, currentw );
+	rows = calloc( lasti, sizeof( double * ) );
+	for( i=0; i<lasti; i++ ) rows[i] = mtx[(unsigned char)seq1[i]];
+	for( i=1; i<lasti; i++ ) dg.mi[i] = initverticalw[i-1];
+	for( j=1; j<lgth2+1; j++ ) dg.m[j] = dg.row0[j-1];
+	dg.buf[0][0] = dg.row0[0];
+	startdiagonal( &dg, 1, initverticalw );
+
+	for( d=2; d<lasti+lgth2; d++ )
+	{
+		w0 = startdiagonal( &dg, d, initverticalw );
+		w2 = dg.buf[(d+1)%3];
+		ilo = MAX( 1, d - lgth2 );
+		ihi = MIN( lasti - 1, d - 1 );
+		for( i=ilo; i+3<=ihi; i+=4 )
+		{
+			j = d - i;
+			vdiag = _mm256_loadu_pd( w2 + i - 1 );
+			vmi = _mm256_loadu_pd( dg.mi + i );
+			vmpi = _mm256_loadu_pd( dg.mpi + i );
+			vm = REVERSE( _mm256_loadu_pd( dg.m + j - 3 ) );
+			vmp = REVERSE( _mm256_loadu_pd( dg.mp + j - 3 ) );
+			vi = _mm256_set_pd( i+3, i+2, i+1, i );
+			vj = _mm256_set_pd( j-3, j-2, j-1, j );
+
+			vwm = vdiag;
+			vdir = vzero;
+			vg = _mm256_add_pd( vmi, vpen );
+			c = _mm256_cmp_pd( vg, vwm, _CMP_GT_OQ );
+			vwm = _mm256_blendv_pd( vwm, vg, c );
+			vdir = _mm256_blendv_pd( vdir, _mm256_sub_pd( vmpi, vj ), c );
+			c = _mm256_cmp_pd( vdiag, vmi, _CMP_GE_OQ );
+			vmi = _mm256_blendv_pd( vmi, vdiag, c );
+			vmpi = _mm256_blendv_pd( vmpi, _mm256_sub_pd( vj, vone ), c );
+			vmi = _mm256_add_pd( vmi, _mm256_blendv_pd( vzero, vex, _mm256_cmp_pd( vi, vlgth1, _CMP_LT_OQ ) ) );
+
+			vg = _mm256_add_pd( vm, vpen );
+			c = _mm256_cmp_pd( vg, vwm, _CMP_GT_OQ );
+			vwm = _mm256_blendv_pd( vwm, vg, c );
+			vdir = _mm256_blendv_pd( vdir, _mm256_sub_pd( vi, vmp ), c );
+			c = _mm256_cmp_pd( vdiag, vm, _CMP_GE_OQ );
+			vm = _mm256_blendv_pd( vm, vdiag, c );
+			vmp = _mm256_blendv_pd( vmp, _mm256_sub_pd( vi, vone ), c );
+			vm = _mm256_blendv_pd( vm, _mm256_add_pd( vm, vex ), _mm256_cmp_pd( vj, vlgth2, _CMP_LT_OQ ) );
+
+			_mm256_storeu_pd( dg.mi + i, vmi );
+			_mm256_storeu_pd( dg.mpi + i, vmpi );
+			_mm256_storeu_pd( dg.m + j - 3, REVERSE( vm ) );
+			_mm256_storeu_pd( dg.mp + j - 3, REVERSE( vmp ) );
+			_mm256_storeu_pd( w0 + i, _mm256_add_pd( _mm256_set_pd( rows[i+3][s2[j-3]], rows[i+2][s2[j-2]], rows[i+1][s2[j-1]], rows[i][s2[j]] ), vwm ) );
+			_mm_storeu_si128( (__m128i *)dirs, _mm256_cvtpd_epi32( vdir ) );
+			ijp[i][j] = dirs[0];
+			ijp[i+1][j-1] = dirs[1];
+			ijp[i+2][j-2] = dirs[2];
+			ijp[i+3][j-3] = dirs[3];
+		}
+		for( ; i<=ihi; i++ )
+		{
+			j = d - i;
+			wm = g11cell( &dg, w0, w2, i, j, rows[i][s2[j]], fpenalty, fpenalty_ex, ijp );
+		}
+		enddiagonal( &dg, d, ilo, ihi, currentw, lastverticalw );
+	}
+	currentw[0] = initverticalw[lasti-1];
+	*wmpt = wm; // The last cell is alone on its antidiagonal
+
+	free( rows );
+	freediagonals( &dg );
+}
+
+typedef struct
+{
+	double *ogcp1, *fgcp1, *gapfreq1;
+	double *ogcp2, *fgcp2, *gapfreq2;
+} Gaps;
+
+static double acell( Diagonals *dg, Gaps *gp, double *w0, double *w2, int i, int j, double match, double fpenalty_ex, int **ijp )
+{
+	double diag = w2[i-1];
+	double wm = diag, g;
+	int dir = 0;
+
+	if( (g=dg->mi[i]+gp->fgcp2[j-1]*gp->gapfreq1[i]) > wm )
+	{
+		wm = g;
+		dir = -( j - (int)dg->mpi[i] );
+	}
+	if( (g=diag+gp->ogcp2[j]*gp->gapfreq1[i-1]) >= dg->mi[i] )
+	{
+		dg->mi[i] = g;
+		dg->mpi[i] = j-1;
+	}
+	dg->mi[i] += fpenalty_ex;
+
+	if( (g=dg->m[j]+gp->fgcp1[i-1]*gp->gapfreq2[j]) > wm )
+	{
+		wm = g;
+		dir = +( i - (int)dg->mp[j] );
+	}
+	if( (g=diag+gp->ogcp1[i]*gp->gapfreq2[j-1]) >= dg->m[j] )
+	{
+		dg->m[j] = g;
+		dg->mp[j] = i-1;
+	}
+	dg->m[j] += fpenalty_ex;
+
+	ijp[i][j] = dir;
+	w0[i] = match + wm;
+	return( wm );
+}
+
+/* Same sums as match_calc() in Salignmm.c, zero outside the sequences */
+static double amatch( double **sc, double **imp, double **doublework, int **intwork, int lgth1, int lgth2, int i, int j )
+{
+	double match = 0.0, *pd, *scarr;
+	int *pn;
+	if( i >= lgth1 || j >= lgth2 ) return( 0.0 );
+	scarr = sc[i];
+	pn = intwork[j];
+	pd = doublework[j];
+	while( *pn>-1 )
+		match += scarr[*pn++] * *pd++;
+	if( imp ) match += imp[i][j];
+	return( match );
+}
+
+AVX2 static int aavx2( double **n_dynamicmtx, double **cpmx1, double **doublework, int **intwork, double **imp, Gaps *gp, int lgth1, int lgth2, int lasti, double *initverticalw, double *currentw, double *lastverticalw, int **ijp, double fpenalty_ex, int *chudanpt, int chudanref, double *wmpt )
+{
+	Diagonals dg;
+	double *w0, *w2, **sc, s;
+	int i, j, l, k, d, ilo, ihi, dirs[4];
+	double wm = 0.0;
+	__m256d vdiag, vmi, vmpi, vm, vmp, vi, vj, vwm, vdir, vg, c;
+	__m256d vex = _mm256_set1_pd( fpenalty_ex ), vzero = _mm256_setzero_pd(), vone = _mm256_set1_pd( 1.0 );
+
+	initdiagonals( &dg, lgth1, lgth2, lasti, currentw );
+	sc = calloc( lasti, sizeof( double * ) );
+	for( i=0; i<lasti && i<lgth1; i++ )
+	{
+		sc[i] = calloc( nalphabets, sizeof( double ) );
+		for( l=0; l<nalphabets; l++ )
+		{
+			s = 0.0;
+			for( k=0; k<nalphabets; k++ )
+				s += n_dynamicmtx[k][l] * cpmx1[k][i];
+			sc[i][l] = s;
+		}
+	}
+	for( i=1; i<lasti; i++ ) dg.mi[i] = initverticalw[i-1] + gp->ogcp2[1] * gp->gapfreq1[i-1];
+	for( j=1; j<lgth2+1; j++ ) dg.m[j] = dg.row0[j-1] + gp->ogcp1[1] * gp->gapfreq2[j-1];
+	dg.buf[0][0] = dg.row0[0];
+	startdiagonal( &dg, 1, initverticalw );
+
+	for( d=2; d<lasti+lgth2; d++ )
+	{
+		if( chudanpt && *chudanpt != chudanref ) break;
+		w0 = startdiagonal( &dg, d, initverticalw );
+		w2 = dg.buf[(d+1)%3];
+		ilo = MAX( 1, d - lgth2 );
+		ihi = MIN( lasti - 1, d - 1 );
+		for( i=ilo; i+3<=ihi; i+=4 )
+		{
+			j = d - i;
+			vdiag = _mm256_loadu_pd( w2 + i - 1 );
+			vmi = _mm256_loadu_pd( dg.mi + i );
+			vmpi = _mm256_loadu_pd( dg.mpi + i );
+			vm = REVERSE( _mm256_loadu_pd( dg.m + j - 3 ) );
+			vmp = REVERSE( _mm256_loadu_pd( dg.mp + j - 3 ) );
+			vi = _mm256_set_pd( i+3, i+2, i+1, i );
+			vj = _mm256_set_pd( j-3, j-2, j-1, j );
+
+			vwm = vdiag;
+			vdir = vzero;
+			vg = _mm256_add_pd( vmi, _mm256_mul_pd( REVERSE( _mm256_loadu_pd( gp->fgcp2 + j - 4 ) ), _mm256_loadu_pd( gp->gapfreq1 + i ) ) );
+			c = _mm256_cmp_pd( vg, vwm, _CMP_GT_OQ );
+			vwm = _mm256_blendv_pd( vwm, vg, c );
+			vdir = _mm256_blendv_pd( vdir, _mm256_sub_pd( vmpi, vj ), c );
+			vg = _mm256_add_pd( vdiag, _mm256_mul_pd( REVERSE( _mm256_loadu_pd( gp->ogcp2 + j - 3 ) ), _mm256_loadu_pd( gp->gapfreq1 + i - 1 ) ) );
+			c = _mm256_cmp_pd( vg, vmi, _CMP_GE_OQ );
+			vmi = _mm256_blendv_pd( vmi, vg, c );
+			vmpi = _mm256_blendv_pd( vmpi, _mm256_sub_pd( vj, vone ), c );
+			vmi = _mm256_add_pd( vmi, vex );
+
+			vg = _mm256_add_pd( vm, _mm256_mul_pd( _mm256_loadu_pd( gp->fgcp1 + i - 1 ), REVERSE( _mm256_loadu_pd( gp->gapfreq2 + j - 3 ) ) ) );
+			c = _mm256_cmp_pd( vg, vwm, _CMP_GT_OQ );
+			vwm = _mm256_blendv_pd( vwm, vg, c );
+			vdir = _mm256_blendv_pd( vdir, _mm256_sub_pd( vi, vmp ), c );
+			vg = _mm256_add_pd( vdiag, _mm256_mul_pd( _mm256_loadu_pd( gp->ogcp1 + i ), REVERSE( _mm256_loadu_pd( gp->gapfreq2 + j - 4 ) ) ) );
+			c = _mm256_cmp_pd( vg, vm, _CMP_GE_OQ );
+			vm = _mm256_blendv_pd( vm, vg, c );
+			vmp = _mm256_blendv_pd( vmp, _mm256_sub_pd( vi, vone ), c );
+			vm = _mm256_add_pd( vm, vex );
+
+			_mm256_storeu_pd( dg.mi + i, vmi );
+			_mm256_storeu_pd( dg.mpi + i, vmpi );
+			_mm256_storeu_pd( dg.m + j - 3, REVERSE( vm ) );
+			_mm256_storeu_pd( dg.mp + j - 3, REVERSE( vmp ) );
+			_mm256_storeu_pd( w0 + i, _mm256_add_pd( _mm256_set_pd(
+				amatch( sc, imp, doublework, intwork, lgth1, lgth2, i+3, j-3 ),
+				amatch( sc, imp, doublework, intwork, lgth1, lgth2, i+2, j-2 ),
+				amatch( sc, imp, doublework, intwork, lgth1, lgth2, i+1, j-1 ),
+				amatch( sc, imp, doublework, intwork, lgth1, lgth2, i, j ) ), vwm ) );
+			_mm_storeu_si128( (__m128i *)dirs, _mm256_cvtpd_epi32( vdir ) );
+			ijp[i][j] = dirs[0];
+			ijp[i+1][j-1] = dirs[1];
+			ijp[i+2][j-2] = dirs[2];
+			ijp[i+3][j-3] = dirs[3];
+		}
+		for( ; i<=ihi; i++ )
+		{
+			j = d - i;
+			wm = acell( &dg, gp, w0, w2, i, j, amatch( sc, imp, doublework, intwork, lgth1, lgth2, i, j ), fpenalty_ex, ijp );
+		}
+		enddiagonal( &dg, d, ilo, ihi, currentw, lastverticalw );
+	}
+	currentw[0] = initverticalw[lasti-1];
+	*wmpt = wm;
+
+	for( i=0; i<lasti; i++ ) free( sc[i] );
+	free( sc );
+	freediagonals( &dg );
+	return( d < lasti+lgth2 ? -1 : 1 );
+}
+
+#endif
+
+/*
+  Run the main loop of A__align() without warps, like G__align11_simd(). The
+  match scores are those of match_calc() plus imp, if given. Return -1 if the
+  alignment was interrupted through chudanpt.
+*/
+int A__align_simd( double **n_dynamicmtx, double **cpmx1, double **doublework, int **intwork, double **imp, double *ogcp1, double *fgcp1, double *gapfreq1, double *ogcp2, double *fgcp2, double *gapfreq2, int lgth1, int lgth2, int lasti, double *initverticalw, double *currentw, double *lastverticalw, int **ijp, double fpenalty_ex, int *chudanpt, int chudanref, double *wmpt )
+{
+#if DPSIMD
+	Gaps gp = { ogcp1, fgcp1, gapfreq1, ogcp2, fgcp2, gapfreq2 };
+	if( !dpsimd() || lasti < 5 || lgth2 < 4 ) return( 0 );
+	return( aavx2( n_dynamicmtx, cpmx1, doublework, intwork, imp, &gp, lgth1, lgth2, lasti, initverticalw, currentw, lastverticalw, ijp, fpenalty_ex, chudanpt, chudanref, wmpt ) );
+#else
+	return( 0 );
+#endif
+}
+
+/*
+  Run the main loop of G__align11() without warps. Return 0 if the scalar loop
+  should run instead, or 1, with the last row in currentw, the last column in
+  lastverticalw, the traceback in ijp and the score of the last cell in *wmpt.
+*/
+int G__align11_simd( double **mtx, char *seq1, char *seq2, int lgth1, int lgth2, int lasti, double *initverticalw, double *currentw, double *lastverticalw, int **ijp, double fpenalty, double fpenalty_ex, double *wmpt )
+{
+#if DPSIMD
+	if( !dpsimd() || lasti < 5 || lgth2 < 4 ) return( 0 );
+	g11avx2( mtx, seq1, seq2, lgth1, lgth2, lasti, initverticalw, currentw, lastverticalw, ijp, fpenalty, fpenalty_ex, wmpt );
+	return( 1 );
+#else
+	return( 0 );
+#endif
+}
@@ -103,6 +103,8 @@ static void arguments( int argc, char *argv[] )
 	autosubalignment = 0.0;
 	specifictarget = 0;
 	nwildcard = 0;
+	refinetimelimit = 0.0;
+	refinemingain = 0.0;
 
 	while( --argc > 0 && (*++argv)[0] == '-' )
 	{
@@ -125,6 +127,16 @@ static void arguments( int argc, char *argv[] )
 					fprintf( stderr, "niter = %d\n", niter );
 					--argc;
 					goto nextoption;
+				case 'x':
+					refinetimelimit = myatof( *++argv );
+					fprintf( stderr, "refinetimelimit = %f\n", refinetimelimit );
+					--argc;
+					goto nextoption;
+				case 'v':
+					refinemingain = myatof( *++argv );
+					fprintf( stderr, "refinemingain = %f\n", refinemingain );
+					--argc;
+					goto nextoption;
 				case 'e':
 					RNApthr = (int)( atof( *++argv ) * 1000 - 0.5 );
 					--argc;
@@ -453,11 +465,14 @@ int dvtditr( int argc, char *argv[] )
 	char ***subalnpt;
 	int ntarget, *targetmap, *targetmapr;
 	int ilim;
+	FILE *scorefp;
+	double *segscore, totalscore;
 
 	arguments( argc, argv );
 #ifndef enablemultithread
 	nthread = 0;
 #endif
+	refinestart = wallclock();
 	if( fastathreshold < 0.0001 ) constraint = 0;
 
 	if( inputfile )
@@ -1080,6 +1095,26 @@ exit( 1 );
 
 
 
+	segscore = AllocateDoubleVec( nseg );
+	totalscore = 0.0;
+	for( iseg=0; iseg<nseg-1; iseg++ )
+	{
+		int tmplen = anchors[iseg+1]-anchors[iseg];
+		for( j=0; j<njob; j++ )
+		{
+			strncpy( seq[j], seq_g[j]+anchors[iseg], tmplen );
+			seq[j][tmplen]= 0;
+		}
+		segscore[iseg] = sumofpairsscore( njob, seq );
+		totalscore += segscore[iseg];
+	}
+	scorefp = fopen( "_scores", "w" );
+	if( scorefp )
+	{
+		fprintf( scorefp, "%.17g\n", totalscore );
+		fclose( scorefp );
+	}
+
 	for( i=0; i<njob; i++ ) res_g[i][0] = 0;
 
 	for( iseg=0; iseg<nseg-1; iseg++ )
@@ -1098,11 +1133,16 @@ exit( 1 );
 		fprintf( trap_g, "Segment %3d/%3d %4d-%4d\n", iseg+1, nseg-1, pos+1, pos+1+tmplen );
 
 		cut = ocut;
+		refinescore = segscore[iseg];
+		refinescorebase = totalscore - segscore[iseg];
 		returnvalue = TreeDependentIteration( njob, name, nlen, seq, bseq, topol, len, eff, skipthisbranch, alloclen, localhomtable, singlerna, nkozo, kozoarivec, ntarget, targetmap, targetmapr );
 
+		totalscore += refinescore - segscore[iseg];
+
 		for( i=0; i<njob; i++ )
 			strcat( res_g[i], bseq[i] );
 	}
+	free( segscore );
 	FreeCharMtx( seq_g_bk );
 	FreeIntCub( topol );
 	FreeDoubleMtx( len );
@@ -40,21 +40,156 @@ static void make_bitrev(int n, int bitrev[])
                 j += k;
         }
 }
+/*
+  Tables of every size are kept until fft( 0, NULL, 1 ), since Falign()
+  transforms profiles of several sizes along the guide tree.
+  Sizes are powers of two.
+*/
+#define NPLANS 32
+static TLS double *sintbls[NPLANS];
+static TLS int *bitrevs[NPLANS];
+static TLS Fukusosuu *twiddles[NPLANS];
+
+static int planindex(int n)
+{
+        int b = 0;
+        while ((1 << b) < n) b++;
+        return b;
+}
+
+static void free_plans(void)
+{
+        int b;
+        for (b = 0; b < NPLANS; b++) {
+                free(sintbls[b]);  sintbls[b] = NULL;
+                free(bitrevs[b]);  bitrevs[b] = NULL;
+                free(twiddles[b]);  twiddles[b] = NULL;
+        }
+}
+
+static int *plan_bitrev(int n)
+{
+        int b = planindex(n);
+        if (bitrevs[b] == NULL) {
+                bitrevs[b] = (int *)malloc(n * sizeof(int));
+                if (bitrevs[b] == NULL) return NULL;
+                make_bitrev(n, bitrevs[b]);
+        }
+        return bitrevs[b];
+}
+
+static double *plan_sintbl(int n)
+{
+        int b = planindex(n);
+        if (sintbls[b] == NULL) {
+                sintbls[b] = (double *)malloc((n + n / 4) * sizeof(double));
+                if (sintbls[b] == NULL) return NULL;
+                make_sintbl(n, sintbls[b]);
+        }
+        return sintbls[b];
+}
+
+/* twiddle[k+j] = exp(-i pi j/k) for each half size k of a butterfly, j<k */
+static Fukusosuu *plan_twiddle(int n)
+{
+        int b = planindex(n);
+        int j, k;
+        Fukusosuu *tw;
+        if (twiddles[b] == NULL) {
+                tw = twiddles[b] = (Fukusosuu *)malloc(n * sizeof(Fukusosuu));
+                if (tw == NULL) return NULL;
+                tw[0].R = tw[0].I = 0.0;
+                for (k = 1; k < n; k *= 2)
+                        for (j = 0; j < k; j++) {
+                                tw[k + j].R = cos(PI * j / k);
+                                tw[k + j].I = - sin(PI * j / k);
+                        }
+        }
+        return twiddles[b];
+}
+
+/*
+  Same transform as fft(), in radix-4 passes over contiguous butterflies,
+  with exact twiddle factors. Results differ from fft() by rounding only.
+*/
+static void fastfft(int n, Fukusosuu *x, int inverse, Fukusosuu *tw, int *bitrev)
+{
+        int i, j, k, k2, k3;
+        double t, wR, wI, vR, vI, sg;
+        double a0R, a0I, a1R, a1I, a2R, a2I, a3R, a3I, b1R, b1I, b3R, b3I;
+        Fukusosuu *p;
+
+        for (i = 0; i < n; i++) {
+                j = bitrev[i];
+                if (i < j) {
+                        t = x[i].R;  x[i].R = x[j].R;  x[j].R = t;
+                        t = x[i].I;  x[i].I = x[j].I;  x[j].I = t;
+                }
+        }
+        sg = inverse ? -1.0 : 1.0;
+        k = 1;
+        if (planindex(n) % 2) {
+                for (i = 0; i < n; i += 2) {
+                        a0R = x[i].R;  a0I = x[i].I;
+                        x[i].R = a0R + x[i+1].R;  x[i].I = a0I + x[i+1].I;
+                        x[i+1].R = a0R - x[i+1].R;  x[i+1].I = a0I - x[i+1].I;
+                }
+                k = 2;
+        }
+        for (; k < n; k *= 4) {
+                k2 = k + k;  k3 = k2 + k;
+                for (i = 0; i < n; i += 4 * k) {
+                        p = x + i;
+                        for (j = 0; j < k; j++, p++) {
+                                /* Two radix-2 passes: half size k, then 2k */
+                                wR = tw[k + j].R;  wI = sg * tw[k + j].I;
+                                vR = wR * p[k].R - wI * p[k].I;
+                                vI = wR * p[k].I + wI * p[k].R;
+                                a0R = p[0].R + vR;  a0I = p[0].I + vI;
+                                b1R = p[0].R - vR;  b1I = p[0].I - vI;
+                                vR = wR * p[k3].R - wI * p[k3].I;
+                                vI = wR * p[k3].I + wI * p[k3].R;
+                                a2R = p[k2].R + vR;  a2I = p[k2].I + vI;
+                                b3R = p[k2].R - vR;  b3I = p[k2].I - vI;
+
+                                wR = tw[k2 + j].R;  wI = sg * tw[k2 + j].I;
+                                vR = wR * a2R - wI * a2I;
+                                vI = wR * a2I + wI * a2R;
+                                p[0].R = a0R + vR;  p[0].I = a0I + vI;
+                                p[k2].R = a0R - vR;  p[k2].I = a0I - vI;
+                                /* The twiddle of j+k is that of j times -i, or i when inverse */
+                                a1R = wR * b3R - wI * b3I;
+                                a1I = wR * b3I + wI * b3R;
+                                a3R = sg * a1I;  a3I = - sg * a1R;
+                                p[k].R = b1R + a3R;  p[k].I = b1I + a3I;
+                                p[k3].R = b1R - a3R;  p[k3].I = b1I - a3I;
+                        }
+                }
+        }
+        if (! inverse)
+                for (i = 0; i < n; i++) {  x[i].R /= n;  x[i].I /= n;  }
+}
+
+/* The radix-4 transform is used when MAFFTPY_FFT=fast */
+static int usefastfft(void)
+{
+        char *env = getenv("MAFFTPY_FFT");
+        return (env && !strcmp(env, "fast"));
+}
+
 /*
 */
 int fft(int n, Fukusosuu *x, int freeflag)
 {
-        static TLS int    last_n = 0;    /*  {\tt n} */
-        static TLS int   *bitrev = NULL; /*  */
-        static TLS double *sintbl = NULL; /*  */
+        int    *bitrev; /*  */
+        double *sintbl; /*  */
+        Fukusosuu *tw;
         int i, j, k, ik, h, d, k2, n4, inverse;
         double t, s, c, dR, dI;
 
 		if (freeflag)
 		{
-			if (bitrev) free(bitrev); bitrev = NULL;
-			if (sintbl) free(sintbl); sintbl = NULL;
-			last_n = 0;
+			free_plans();
 			return( 0 );
 		}
 
@@ -62,30 +197,20 @@ int fft(int n, Fukusosuu *x, int freeflag)
         if (n < 0) {
                 n = -n;  inverse = 1;  /*  */
         } else inverse = 0;
+        if (n == 0) return 0;
         n4 = n / 4;
-        if (n != last_n || n == 0) {
-                last_n = n;
-#if 0
-                if (sintbl != NULL) {
-					free(sintbl);
-					sintbl = NULL;
-				}
-                if (bitrev != NULL) {
-					free(bitrev);
-					bitrev = NULL;
-				}
-                if (n == 0) return 0;  /*  */
-                sintbl = (double *)malloc((n + n4) * sizeof(double));
-                bitrev = (int *)malloc(n * sizeof(int));
-#else /* by T. Nishiyama */
-				sintbl = realloc(sintbl, (n + n4) * sizeof(double));
-				bitrev = realloc(bitrev, n * sizeof(int));
-#endif
-                if (sintbl == NULL || bitrev == NULL) {
+        bitrev = plan_bitrev(n);
+        if (usefastfft()) {
+                tw = plan_twiddle(n);
+                if (bitrev == NULL || tw == NULL) {
                         fprintf(stderr, "\n");  return 1;
                 }
-                make_sintbl(n, sintbl);
-                make_bitrev(n, bitrev);
+                fastfft(n, x, inverse, tw, bitrev);
+                return 0;
+        }
+        sintbl = plan_sintbl(n);
+        if (sintbl == NULL || bitrev == NULL) {
+                fprintf(stderr, "\n");  return 1;
         }
         for (i = 0; i < n; i++) {    /*  */
                 j = bitrev[i];
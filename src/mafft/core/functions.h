@@ -162,6 +162,10 @@ extern void part_imp_match_init( double *imp, int clus1, int clus2, int lgth1, i
 extern double partA__align( char **seq1, char **seq2, double *eff1, double *eff2, int icyc, int jcyc, int alloclen, int constraint, double *impmatch, int start1, int end1, int start2, int end2, int *gapmap1, int *gapmap2, char *, char *, char *, char *, int *, int, int * );
 extern double partA__align_variousdist( int **which, double ***scoringmatrices, double **dummtx, char **seq1, char **seq2, double *eff1, double *eff2, double **eff1s, double **eff2s, int icyc, int jcyc, int alloclen, int constraint, double *impmatch, int start1, int end1, int start2, int end2, int *gapmap1, int *gapmap2, char *, char *, char *, char *, int *, int, int * );
 extern double G__align11( double **scoringmtx, char **seq1, char **seq2, int alloclen, int headgp, int tailgp  );
+extern int dpsimd( void );
+extern int G__align11_simd( double **mtx, char *seq1, char *seq2, int lgth1, int lgth2, int lasti, double *initverticalw, double *currentw, double *lastverticalw, int **ijp, double fpenalty, double fpenalty_ex, double *wmpt );
+extern int A__align_simd( double **scoringmtx, double **cpmx1, double **doublework, int **intwork, double **imp, double *ogcp1, double *fgcp1, double *gapfreq1, double *ogcp2, double *fgcp2, double *gapfreq2, int lgth1, int lgth2, int lasti, double *initverticalw, double *currentw, double *lastverticalw, int **ijp, double fpenalty_ex, int *chudanpt, int chudanref, double *wmpt );
+extern void sketchdistancematrix( int njob, int **pointt, int tsize, int size, int nthreadpair, double **mtx );
 extern double G__align11psg( double **codonmtx, double **scoringmtx, char **seq1, char **seq2, int alloclen, int headgp, int tailgp, double *gstart, double *gend  );
 extern double G__align11_noalign( double **scoringmtx, int penal, int penal_ex, char **seq1, char **seq2, int alloclen );
 extern double L__align11( double **scoringmtx, double scoreoffset, char **seq1, char **seq2, int alloclen, int *off1pt, int *off2pt );
@@ -385,6 +389,7 @@ extern void initglobalvariables();
 extern void makeskiptable( int n, int **skip, char **seq );
 extern int generatesubalignmentstable( int nseq, int ***tablept, int *nsubpt, int *maxmempt, int ***topol, double **len, double threshold );
 extern double sumofpairsscore( int nseq, char **seq );
+extern double wallclock( void );
 //extern int maskoriginalgaps( char *repseq, char *originallygapped );
 
 //extern void restoregaponlysites( char *originallygapped, int n1, int n2, char **s1, char **s2, int rep );
@@ -2975,6 +2975,24 @@ void WriteFloatHat2_pointer_halfmtx( FILE *hat2p, int locnjob, char **name, doub
 {
 	int i, j, ijsa;
 	double max = 0.0;
+	if( distout == 'b' ) // condensed float32 matrix, in a binary file of its own
+	{
+		FILE *fp = fopen( "bindist", "wb" );
+		float d;
+		if( !fp )
+		{
+			reporterr( "Cannot open bindist\n" );
+			exit( 1 );
+		}
+		for( i=0; i<locnjob; i++ ) for( j=i+1; j<locnjob; j++ )
+		{
+			d = (float)mtx[i][j-i];
+			fwrite( &d, sizeof( float ), 1, fp );
+		}
+		fclose( fp );
+		return;
+	}
+
 	for( i=0; i<locnjob-1; i++ ) for( j=1; j<locnjob-i; j++ ) if( mtx[i][j] > max ) max = mtx[i][j];
 
 	fprintf( hat2p, "%5d\n", 1 );
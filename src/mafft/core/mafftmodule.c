@@ -175,11 +175,14 @@ mafft_disttbfast(PyObject *self, PyObject *args, PyObject *kwargs) {
 	char **argv;
 	if (argsFromDict(dict, &argc, &argv, "disttbfast")) return NULL;
 
+	if (wrapio_open()) return NULL;
+
 	fprintf(stderr, ">");
 	for (int i = 0; i < argc; i++) fprintf(stderr, " %s", argv[i]);
 	fprintf(stderr, "\n");
 
 	int res = disttbfast( 0, 0, NULL, NULL, argc, argv, NULL );
+	if (wrapio_close()) return NULL;
 	if (res) {
 		PyErr_Format(PyExc_TypeError, "mafft_disttbfast: Abnormal exit code: %i", res);
 		return NULL;
@@ -187,10 +190,6 @@ mafft_disttbfast(PyObject *self, PyObject *args, PyObject *kwargs) {
 
 	// argsFree(argc, argv);
 
-	// Required, as streams are redirected by python caller
-	fflush(stdout);
-	fflush(stderr);
-
 	Py_INCREF(Py_None);
 	return Py_None;
 }
@@ -242,11 +241,14 @@ mafft_tbfast(PyObject *self, PyObject *args, PyObject *kwargs) {
 		argv = targv;
 	}
 
+	if (wrapio_open()) return NULL;
+
 	fprintf(stderr, ">");
 	for (int i = 0; i < argc; i++) fprintf(stderr, " %s", argv[i]);
 	fprintf(stderr, "\n");
 
 	int res = tbfast(argc, argv);
+	if (wrapio_close()) return NULL;
 	if (res) {
 		PyErr_Format(PyExc_TypeError, "mafft_tbfast: Abnormal exit code: %i", res);
 		return NULL;
@@ -254,10 +256,6 @@ mafft_tbfast(PyObject *self, PyObject *args, PyObject *kwargs) {
 
 	// argsFree(argc, argv);
 
-	// Required, as streams are redirected by python caller
-	fflush(stdout);
-	fflush(stderr);
-
 	Py_INCREF(Py_None);
 	return Py_None;
 }
@@ -275,11 +273,14 @@ mafft_dvtditr(PyObject *self, PyObject *args, PyObject *kwargs) {
 	char **argv;
 	if (argsFromDict(dict, &argc, &argv, "dvtditr")) return NULL;
 
+	if (wrapio_open()) return NULL;
+
 	fprintf(stderr, ">");
 	for (int i = 0; i < argc; i++) fprintf(stderr, " %s", argv[i]);
 	fprintf(stderr, "\n");
 
 	int res = dvtditr(argc, argv);
+	if (wrapio_close()) return NULL;
 	if (res) {
 		PyErr_Format(PyExc_TypeError, "mafft_dvtditr: Abnormal exit code: %i", res);
 		return NULL;
@@ -287,9 +288,89 @@ mafft_dvtditr(PyObject *self, PyObject *args, PyObject *kwargs) {
 
 	// argsFree(argc, argv);
 
-	// Required, as streams are redirected by python caller
-	fflush(stdout);
-	fflush(stderr);
+	Py_INCREF(Py_None);
+	return Py_None;
+}
+
+static PyObject *
+mafft_dndpre(PyObject *self, PyObject *args, PyObject *kwargs) {
+
+	/* module specific */
+
+	PyObject *dict = kwargs;
+
+	int argc;
+	char **argv;
+	if (argsFromDict(dict, &argc, &argv, "dndpre")) return NULL;
+
+	if (wrapio_open()) return NULL;
+
+	fprintf(stderr, ">");
+	for (int i = 0; i < argc; i++) fprintf(stderr, " %s", argv[i]);
+	fprintf(stderr, "\n");
+
+	int res = dndpre(argc, argv);
+	if (wrapio_close()) return NULL;
+	if (res) {
+		PyErr_Format(PyExc_TypeError, "mafft_dndpre: Abnormal exit code: %i", res);
+		return NULL;
+	}
+
+	Py_INCREF(Py_None);
+	return Py_None;
+}
+
+static PyObject *
+mafft_splittbfast(PyObject *self, PyObject *args, PyObject *kwargs) {
+
+	/* module specific */
+
+	PyObject *dict = kwargs;
+
+	int argc;
+	char **argv;
+	if (argsFromDict(dict, &argc, &argv, "splittbfast")) return NULL;
+
+	if (wrapio_open()) return NULL;
+
+	fprintf(stderr, ">");
+	for (int i = 0; i < argc; i++) fprintf(stderr, " %s", argv[i]);
+	fprintf(stderr, "\n");
+
+	int res = splittbfast(argc, argv);
+	if (wrapio_close()) return NULL;
+	if (res) {
+		PyErr_Format(PyExc_TypeError, "mafft_splittbfast: Abnormal exit code: %i", res);
+		return NULL;
+	}
+
+	Py_INCREF(Py_None);
+	return Py_None;
+}
+
+static PyObject *
+mafft_addsingle(PyObject *self, PyObject *args, PyObject *kwargs) {
+
+	/* module specific */
+
+	PyObject *dict = kwargs;
+
+	int argc;
+	char **argv;
+	if (argsFromDict(dict, &argc, &argv, "addsingle")) return NULL;
+
+	if (wrapio_open()) return NULL;
+
+	fprintf(stderr, ">");
+	for (int i = 0; i < argc; i++) fprintf(stderr, " %s", argv[i]);
+	fprintf(stderr, "\n");
+
+	int res = addsingle(argc, argv);
+	if (wrapio_close()) return NULL;
+	if (res) {
+		PyErr_Format(PyExc_TypeError, "mafft_addsingle: Abnormal exit code: %i", res);
+		return NULL;
+	}
 
 	Py_INCREF(Py_None);
 	return Py_None;
@@ -309,12 +390,15 @@ mafft_makedirectionlist(PyObject *self, PyObject *args, PyObject *kwargs) {
 	if(argsFromDict(dict, &argc, &argv, "makedirectionlist"))
 		return NULL;
 
+	if (wrapio_open()) return NULL;
+
 	fprintf(stderr, ">");
 	for (int i = 0; i < argc; i++)
 		fprintf(stderr, " %s", argv[i]);
 	fprintf(stderr, "\n");
 
 	int res = makedirectionlist(argc, argv);
+	if (wrapio_close()) return NULL;
 	if (res) {
 		PyErr_Format(PyExc_TypeError, "mafft_makedirectionlist: Abnormal exit code: %i", res);
 		return NULL;
@@ -322,10 +406,6 @@ mafft_makedirectionlist(PyObject *self, PyObject *args, PyObject *kwargs) {
 
 	// argsFree(argc, argv);
 
-	// Required, as streams are redirected by python caller
-	fflush(stdout);
-	fflush(stderr);
-
 	Py_INCREF(Py_None);
 	return Py_None;
 }
@@ -344,12 +424,15 @@ mafft_setdirection(PyObject *self, PyObject *args, PyObject *kwargs) {
 	if(argsFromDict(dict, &argc, &argv, "setdirection"))
 		return NULL;
 
+	if (wrapio_open()) return NULL;
+
 	fprintf(stderr, ">");
 	for (int i = 0; i < argc; i++)
 		fprintf(stderr, " %s", argv[i]);
 	fprintf(stderr, "\n");
 
 	int res = setdirection(argc, argv);
+	if (wrapio_close()) return NULL;
 	if (res) {
 		fprintf(stderr, "test2\n");
 		PyErr_Format(PyExc_TypeError, "mafft_setdirection: Abnormal exit code: %i", res);
@@ -358,10 +441,6 @@ mafft_setdirection(PyObject *self, PyObject *args, PyObject *kwargs) {
 
 	// argsFree(argc, argv);
 
-	// Required, as streams are redirected by python caller
-	fflush(stdout);
-	fflush(stderr);
-
 	Py_INCREF(Py_None);
 	return Py_None;
 }
@@ -373,14 +452,25 @@ mafft_countlen(PyObject *self, PyObject *args) {
 	int nlenmin;
 	double nfreq;
 
-	if (!PyArg_ParseTuple(args, "s", &inputfile))
+	inputfile = NULL;
+	if (!PyArg_ParseTuple(args, "|z", &inputfile))
 		return NULL;
 
-	infp = fopen( inputfile, "r" );
-	if( !infp )
+	if (wrapio_open()) return NULL;
+
+	if (inputfile)
 	{
-		PyErr_Format(PyExc_TypeError, "mafft_countlen: Cannot open %s", inputfile);
-		return NULL;
+		infp = fopen( inputfile, "r" );
+		if( !infp )
+		{
+			wrapio_close();
+			PyErr_Format(PyExc_TypeError, "mafft_countlen: Cannot open %s", inputfile);
+			return NULL;
+		}
+	}
+	else
+	{
+		infp = stdin;
 	}
 
 	dorp = NOTSPECIFIED;
@@ -388,6 +478,7 @@ mafft_countlen(PyObject *self, PyObject *args) {
 	fprintf(stderr, "%d x %d - %d %c nfreq=%f\n", njob, nlenmax, nlenmin, dorp, nfreq );
 
 	fclose(infp);
+	if (wrapio_close()) return NULL;
 
 	return Py_BuildValue("(iiiCd)", njob, nlenmax, nlenmin, dorp, nfreq);
 }
@@ -408,12 +499,18 @@ static PyMethodDef MafftMethods[] = {
    "Run mafft/tbfast with given parameters."},
   {"dvtditr",  (PyCFunction)mafft_dvtditr, METH_VARARGS | METH_KEYWORDS,
    "Run mafft/dvtditr with given parameters."},
+  {"dndpre",  (PyCFunction)mafft_dndpre, METH_VARARGS | METH_KEYWORDS,
+   "Run mafft/dndpre with given parameters."},
+  {"splittbfast",  (PyCFunction)mafft_splittbfast, METH_VARARGS | METH_KEYWORDS,
+   "Run mafft/splittbfast with given parameters."},
+  {"addsingle",  (PyCFunction)mafft_addsingle, METH_VARARGS | METH_KEYWORDS,
+   "Run mafft/addsingle with given parameters."},
   {"makedirectionlist",  (PyCFunction)mafft_makedirectionlist, METH_VARARGS | METH_KEYWORDS,
    "Run mafft/makedirectionlist with given parameters."},
   {"setdirection",  (PyCFunction)mafft_setdirection, METH_VARARGS | METH_KEYWORDS,
    "Run mafft/setdirection with given parameters."},
   {"countlen",  mafft_countlen, METH_VARARGS,
-   "Run mafft/getnumlen_nogap_countn."},
+   "Run mafft/getnumlen_nogap_countn on the given file, or stdin if omitted."},
   {"foo",  mafft_foo, METH_VARARGS, "bar"},
   {NULL, NULL, 0, NULL}        /* Sentinel */
 };
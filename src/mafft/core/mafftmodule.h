@@ -4,3 +4,6 @@ int tbfast( int argc, char *argv[] );
 int dvtditr( int argc, char *argv[] );
 int makedirectionlist(int argc, char* argv[]);
 int setdirection( int argc, char *argv[] );
+int dndpre( int argc, char **argv );
+int splittbfast( int argc, char *argv[] );
+int addsingle( int argc, char *argv[] );
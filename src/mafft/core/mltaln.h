@@ -398,6 +398,15 @@ extern char codonscore;
 
 extern char distout;
 
+extern double refinetimelimit;
+extern double refinemingain;
+extern double refinestart;
+extern double refinescore;
+extern double refinescorebase;
+
+extern int npairtiles;
+extern int pairtile;
+
 extern int terminalmargin;
 
 
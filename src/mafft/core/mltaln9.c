@@ -1,4 +1,5 @@
 #include "mltaln.h"
+#include <time.h>
 
 #define DEBUG 0
 #define CANONICALTREEFORMAT 1
@@ -1769,7 +1770,7 @@ void loadtop( int nseq, double **mtx, int ***topol, double **len, char **name, i
 			reporterr(       "Cannot allocate treetmp\n" );
 			exit( 1 );
 		}
-		sprintf( treetmp, "(%s:%7.5f,%s:%7.5f)", tree[im], len[k][0], tree[jm], len[k][1] );
+		sprintf( treetmp, "(%s:%.17g,%s:%.17g)", tree[im], len[k][0], tree[jm], len[k][1] );
 		free( tree[im] );
 		free( tree[jm] );
 		tree[im] = calloc( strlen( treetmp )+1, sizeof( char ) );
@@ -2754,7 +2755,7 @@ void loadtree( int nseq, int ***topol, double **len, char **name, int *nlen, Tre
 				reporterr(       "Cannot allocate treetmp\n" );
 				exit( 1 );
 			}
-			sprintf( treetmp, "(%s:%7.5f,%s:%7.5f)", tree[im], len[k][0], tree[jm], len[k][1] );
+			sprintf( treetmp, "(%s:%.17g,%s:%.17g)", tree[im], len[k][0], tree[jm], len[k][1] );
 			free( tree[im] );
 			free( tree[jm] );
 			tree[im] = calloc( strlen( treetmp )+1, sizeof( char ) );
@@ -3501,7 +3502,7 @@ void fixed_supg_double_realloc_nobk_halfmtx_treeout_constrained( int nseq, doubl
 			reporterr(       "Cannot allocate treetmp\n" );
 			exit( 1 );
 		}
-		sprintf( treetmp, "(%s:%7.5f,%s:%7.5f)", tree[im], len[k][0], tree[jm], len[k][1] );
+		sprintf( treetmp, "(%s:%.17g,%s:%.17g)", tree[im], len[k][0], tree[jm], len[k][1] );
 		free( tree[im] );
 		free( tree[jm] );
 		tree[im] = calloc( strlen( treetmp )+1, sizeof( char ) );
@@ -5967,7 +5968,7 @@ void compacttree_memsaveselectable( int nseq, double **partmtx, int *nearest, do
 				reporterr(       "Cannot allocate treetmp\n" );
 				exit( 1 );
 			}
-			sprintf( treetmp, "(%s:%7.5f,%s:%7.5f)", tree[im], len[k][0], tree[jm], len[k][1] );
+			sprintf( treetmp, "(%s:%.17g,%s:%.17g)", tree[im], len[k][0], tree[jm], len[k][1] );
 			free( tree[im] );
 			free( tree[jm] );
 			tree[im] = calloc( strlen( treetmp )+1, sizeof( char ) );
@@ -6434,7 +6435,7 @@ void fixed_musclesupg_double_realloc_nobk_halfmtx_treeout_memsave( int nseq, dou
 			reporterr(       "Cannot allocate treetmp\n" );
 			exit( 1 );
 		}
-		sprintf( treetmp, "(%s:%7.5f,%s:%7.5f)", tree[im], len[k][0], tree[jm], len[k][1] );
+		sprintf( treetmp, "(%s:%.17g,%s:%.17g)", tree[im], len[k][0], tree[jm], len[k][1] );
 		free( tree[im] );
 		free( tree[jm] );
 		tree[im] = calloc( strlen( treetmp )+1, sizeof( char ) );
@@ -6797,7 +6798,7 @@ void fixed_musclesupg_double_realloc_nobk_halfmtx_treeout( int nseq, double **ef
 			reporterr(       "Cannot allocate treetmp\n" );
 			exit( 1 );
 		}
-		sprintf( treetmp, "(%s:%7.5f,%s:%7.5f)", tree[im], len[k][0], tree[jm], len[k][1] );
+		sprintf( treetmp, "(%s:%.17g,%s:%.17g)", tree[im], len[k][0], tree[jm], len[k][1] );
 		free( tree[im] );
 		free( tree[jm] );
 		tree[im] = calloc( strlen( treetmp )+1, sizeof( char ) );
@@ -7183,7 +7184,7 @@ void fixed_musclesupg_double_treeout( int nseq, double **eff, int ***topol, doub
 			reporterr(       "Cannot allocate treetmp\n" );
 			exit( 1 );
 		}
-		sprintf( treetmp, "(%s:%7.5f,%s:%7.5f)", tree[im], len[k][0], tree[jm], len[k][1] );
+		sprintf( treetmp, "(%s:%.17g,%s:%.17g)", tree[im], len[k][0], tree[jm], len[k][1] );
 		free( tree[im] );
 		free( tree[jm] );
 		tree[im] = calloc( strlen( treetmp )+1, sizeof( char ) );
@@ -7725,7 +7726,7 @@ void fixed_supg_double_treeout_constrained( int nseq, double **eff, int ***topol
 			reporterr(       "Cannot allocate treetmp\n" );
 			exit( 1 );
 		}
-		sprintf( treetmp, "(%s:%7.5f,%s:%7.5f)", tree[im], len[k][0], tree[jm], len[k][1] );
+		sprintf( treetmp, "(%s:%.17g,%s:%.17g)", tree[im], len[k][0], tree[jm], len[k][1] );
 		free( tree[im] );
 		free( tree[jm] );
 		tree[im] = calloc( strlen( treetmp )+1, sizeof( char ) );
@@ -8600,7 +8601,7 @@ void veryfastsupg_double_loadtree( int nseq, double **eff, int ***topol, double
 			reporterr(       "Cannot allocate treetmp\n" );
 			exit( 1 );
 		}
-		sprintf( treetmp, "(%s:%7.5f,%s:%7.5f)", tree[im], len[k][0], tree[jm], len[k][1] );
+		sprintf( treetmp, "(%s:%.17g,%s:%.17g)", tree[im], len[k][0], tree[jm], len[k][1] );
 		free( tree[im] );
 		free( tree[jm] );
 		tree[im] = calloc( strlen( treetmp )+1, sizeof( char ) );
@@ -16264,3 +16265,10 @@ void fillimp_file( double **impmtx, double *imp, int clus1, int clus2, int lgth1
 	}
 #endif
 }
+
+double wallclock( void )
+{
+	struct timespec ts;
+	timespec_get( &ts, TIME_UTC );
+	return( (double)ts.tv_sec + (double)ts.tv_nsec * 1.0e-9 );
+}
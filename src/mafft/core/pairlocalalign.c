@@ -1616,6 +1616,8 @@ static void arguments( int argc, char *argv[] )
 	stdout_dist = 0;
 	store_dist = 1;
 	store_localhom = 1;
+	npairtiles = 0;
+	pairtile = 0;
 //	dorp = NOTSPECIFIED;
 	ppenalty = NOTSPECIFIED;
 	ppenalty_OP = NOTSPECIFIED;
@@ -1854,6 +1856,19 @@ static void arguments( int argc, char *argv[] )
 				case 'V':
 					alg = 'V';
 					break;
+				case 'W':
+					if( sscanf( *++argv, "%d/%d", &pairtile, &npairtiles ) != 2 || pairtile < 0 || pairtile >= npairtiles )
+					{
+						reporterr( "Give the pair tile as index/count.\n" );
+						exit( 1 );
+					}
+					--argc;
+					goto nextoption;
+				case 'X':
+					npairtiles = myatoi( *++argv );
+					pairtile = -1;
+					--argc;
+					goto nextoption;
 				case 'F':
 					use_fft = 1;
 					break;
@@ -1920,6 +1935,126 @@ static void arguments( int argc, char *argv[] )
 	}
 }
 
+static long long pairtilestart, pairtileend;
+static char *pairknown = NULL;
+
+static void setpairtile( int n )
+{
+	long long npairs = (long long)n * ( n - 1 ) / 2;
+	pairtilestart = npairs * pairtile / npairtiles;
+	pairtileend = npairs * ( pairtile + 1 ) / npairtiles;
+}
+
+/* Pairs to align: those of this tile, or those missing from the tiles that were read */
+static int inpairtile( int i, int j )
+{
+	long long k = (long long)i * ( 2 * njob - i - 1 ) / 2 + ( j - i - 1 );
+	if( pairknown ) return( !pairknown[k] );
+	return( pairtilestart <= k && k < pairtileend );
+}
+
+/* Write the sequence type, then the distances and localhom of the pairs to align, exactly, to _pairtile */
+static void writepairtile( int n, double **distancemtx, LocalHom **localhomtable )
+{
+	FILE *fp;
+	LocalHom *tmpptr;
+	int i, j, nentries;
+
+	fp = fopen( "_pairtile", "w" );
+	if( !fp ) ErrorExit( "Cannot open _pairtile." );
+	fprintf( fp, "%c\n", dorp );
+	for( i=0; i<n-1; i++ ) for( j=i+1; j<n; j++ )
+	{
+		if( !inpairtile( i, j ) ) continue;
+		nentries = 0;
+		if( localhomtable && localhomtable[i][j-i].nokori )
+			for( tmpptr=localhomtable[i]+j-i; tmpptr; tmpptr=tmpptr->next ) nentries++;
+		fprintf( fp, "%d %d %.17g %d\n", i, j, distancemtx ? distancemtx[i][j-i] : 0.0, nentries );
+		if( nentries == 0 ) continue;
+		for( tmpptr=localhomtable[i]+j-i; tmpptr; tmpptr=tmpptr->next )
+			fprintf( fp, "%d %d %d %d %d %.17g %c\n", tmpptr->start1, tmpptr->end1, tmpptr->start2, tmpptr->end2, tmpptr->overlapaa, tmpptr->opt, tmpptr->korh );
+	}
+	fclose( fp );
+}
+
+/*
+ * Fill in the pairs from _pairtile0, _pairtile1, ..., the same way as putlocalhom2().
+ * Tiles of another sequence type are ignored. Return the number of pairs that were read,
+ * the rest are marked in pairknown for pairalign() to compute.
+ */
+static long long readpairtiles( int n, double **distancemtx, LocalHom **localhomtable )
+{
+	FILE *fp;
+	LocalHom *head, *tmpptr;
+	char filename[100];
+	int t, i, j, k, nentries;
+	int start1, end1, start2, end2, overlapaa;
+	double dist, opt;
+	char korh, type;
+	long long pair, npairs = 0;
+
+	pairknown = calloc( (long long)n * ( n - 1 ) / 2 + 1, sizeof( char ) );
+	for( t=0; t<npairtiles; t++ )
+	{
+		sprintf( filename, "_pairtile%d", t );
+		fp = fopen( filename, "r" );
+		if( !fp )
+		{
+			reporterr( "Cannot open %s.\n", filename );
+			exit( 1 );
+		}
+		if( fscanf( fp, " %c", &type ) != 1 || type != dorp )
+		{
+			reporterr( "Ignoring %s, which is not for this sequence type.\n", filename );
+			fclose( fp );
+			continue;
+		}
+		while( fscanf( fp, "%d %d %lf %d", &i, &j, &dist, &nentries ) == 4 )
+		{
+			if( i < 0 || j <= i || j >= n )
+			{
+				reporterr( "Unknown pair %d-%d in %s.\n", i, j, filename );
+				exit( 1 );
+			}
+			pair = (long long)i * ( 2 * n - i - 1 ) / 2 + ( j - i - 1 );
+			head = tmpptr = NULL;
+			if( !pairknown[pair] ) // The first copy of a pair wins
+			{
+				pairknown[pair] = 1;
+				npairs++;
+				if( distancemtx ) distancemtx[i][j-i] = dist;
+				if( localhomtable ) head = tmpptr = localhomtable[i]+j-i;
+			}
+			for( k=0; k<nentries; k++ )
+			{
+				if( fscanf( fp, "%d %d %d %d %d %lf %c", &start1, &end1, &start2, &end2, &overlapaa, &opt, &korh ) != 7 )
+				{
+					reporterr( "Truncated pair %d-%d in %s.\n", i, j, filename );
+					exit( 1 );
+				}
+				if( !head ) continue;
+				if( k > 0 )
+				{
+					tmpptr->next = (LocalHom *)calloc( 1, sizeof( LocalHom ) );
+					tmpptr = tmpptr->next;
+					tmpptr->next = NULL;
+				}
+				tmpptr->start1 = start1;
+				tmpptr->end1 = end1;
+				tmpptr->start2 = start2;
+				tmpptr->end2 = end2;
+				tmpptr->overlapaa = overlapaa;
+				tmpptr->opt = opt;
+				tmpptr->korh = korh;
+				tmpptr->nokori += 1;
+				head->last = tmpptr;
+			}
+		}
+		fclose( fp );
+	}
+	return( npairs );
+}
+
 int countamino( char *s, int end )
 {
 	int val = 0;
@@ -2045,6 +2180,8 @@ static void *athread( void *arg ) // alg='R', alg='r' -> tsukawarenai.
 		jobpospt->i = i;
 		pthread_mutex_unlock( targ->mutex_counter );
 
+		if( npairtiles && !inpairtile( i, j ) ) continue;
+
 
 //		if( j == i+1 || j % 100 == 0 )
 		if( j == i+1 && i % 10 == 0 )
@@ -2667,6 +2804,7 @@ static void pairalign( char **name, int *nlen, char **seq, char **aseq, char **d
 			else jst = i + 1;
 			for( j=jst; j<njob; j++ )
 			{
+				if( npairtiles && !inpairtile( i, j ) ) continue;
 
 				if( strlen( seq[i] ) == 0 || strlen( seq[j] ) == 0 )
 				{
@@ -3255,7 +3393,22 @@ int pairlocalalign( int ngui, int lgui, char **namegui, char **seqgui, double **
 		}
 	}
 
+	if( npairtiles )
+	{
+		if( !ngui || specifictarget || alg == 'Y' || alg == 'r' || alg == 'R' )
+		{
+			reporterr( "Pair tiles are only supported for all pairs, within tbfast.\n" );
+			exit( 1 );
+		}
+		setpairtile( njob );
+	}
+	if( npairtiles && pairtile == -1 )
+		reporterr( "Read %lld of %lld pairs.\n", readpairtiles( njob, distancemtx, localhomtable ), (long long)njob * ( njob - 1 ) / 2 );
 	pairalign( name, nlen, bseq, aseq, dseq, thereisxineachseq, mseq1, mseq2, alloclen, lastresx, distancemtx, localhomtable, expdist, ngui );
+	if( npairtiles )
+		writepairtile( njob, distancemtx, localhomtable );
+	if( pairknown ) free( pairknown );
+	pairknown = NULL;
 
 	fprintf( trap_g, "done.\n" );
 #if DEBUG
@@ -116,6 +116,7 @@ void part_imp_match_init_strict( double *imp, int clus1, int clus2, int lgth1, i
 	{
 		if( impmtx ) FreeFloatMtx( impmtx );
 		impmtx = NULL;
+		impalloclen = 0;
 //		if( nocount1 ) free( nocount1 );
 //		nocount1 = NULL;
 //		if( nocount2 ) free( nocount2 );
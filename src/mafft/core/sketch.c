@@ -0,0 +1,183 @@
+#include "mltaln.h"
+
+/*
+  Ktuple distances from MinHash sketches, for disttbfast.
+  Each tuple is hashed together with the number of its earlier occurrences in
+  the sequence, so that a sketch samples the multiset of tuples, and the
+  estimated size of the intersection of two multisets stands for the count of
+  commonsextet_p(). Sketches use one permutation hashing: the hashes are split
+  into size bins, and each bin keeps its minimum. They are stored in one array
+  of size entries per sequence, compared bin by bin in loops that the compiler
+  vectorizes, and by blocks of rows that stay in the cache.
+*/
+
+#define END_OF_VEC -1
+#define SKETCHEMPTY 0xffffffffU
+#define SKETCHBLOCK 64
+
+typedef struct
+{
+	int njob;
+	int size;
+	unsigned int *bins; /* size per sequence, SKETCHEMPTY if no hash fell there */
+	int *total;         /* Number of tuples of each sequence */
+} Sketches;
+
+#ifdef enablemultithread
+typedef struct
+{
+	Sketches *sk;
+	double **mtx;
+	int *blockpospt;
+	pthread_mutex_t *mutex;
+} sketchthread_arg_t;
+#endif
+
+/* Bijective mixer of splitmix64 */
+static unsigned long long mixhash( unsigned long long x )
+{
+	x ^= x >> 30;
+	x *= 0xbf58476d1ce4e5b9ULL;
+	x ^= x >> 27;
+	x *= 0x94d049bb133111ebULL;
+	x ^= x >> 31;
+	return( x );
+}
+
+static void makesketch( unsigned int *sketch, int *total, int *pointt, int *occurrence, int size )
+{
+	unsigned long long hash;
+	unsigned int bin, value;
+	int n, point;
+
+	for( bin=0; bin<size; bin++ ) sketch[bin] = SKETCHEMPTY;
+	for( n=0; ( point = pointt[n] ) != END_OF_VEC; n++ )
+	{
+		hash = mixhash( ( (unsigned long long)point << 32 ) | (unsigned int)occurrence[point]++ );
+		bin = (unsigned int)( ( ( hash >> 32 ) * size ) >> 32 );
+		value = (unsigned int)hash;
+		if( value == SKETCHEMPTY ) value--;
+		if( value < sketch[bin] ) sketch[bin] = value;
+	}
+	for( n=0; ( point = pointt[n] ) != END_OF_VEC; n++ )
+		occurrence[point] = 0;
+	*total = n;
+}
+
+/* Estimated number of tuples in common, from the Jaccard index of the multisets */
+static double sketchcommon( Sketches *sk, int i, int j )
+{
+	unsigned int *a = sk->bins + (size_t)i * sk->size;
+	unsigned int *b = sk->bins + (size_t)j * sk->size;
+	int k, same = 0, empty = 0;
+	double jaccard;
+
+	for( k=0; k<sk->size; k++ )
+	{
+		same += ( a[k] == b[k] );
+		empty += ( ( a[k] & b[k] ) == SKETCHEMPTY );
+	}
+	if( empty == sk->size ) return( 0.0 );
+
+	jaccard = (double)( same - empty ) / ( sk->size - empty );
+	return( jaccard * ( sk->total[i] + sk->total[j] ) / ( 1.0 + jaccard ) );
+}
+
+static void sketchblock( Sketches *sk, double **mtx, int block )
+{
+	int i, j, jb;
+	int istart = block * SKETCHBLOCK;
+	int iend = MIN( istart + SKETCHBLOCK, sk->njob );
+
+	for( i=istart; i<iend; i++ ) mtx[i][0] = (double)sk->total[i];
+
+	for( jb=istart; jb<sk->njob; jb+=SKETCHBLOCK )
+	{
+		int jend = MIN( jb + SKETCHBLOCK, sk->njob );
+		for( i=istart; i<iend; i++ )
+			for( j=MAX( jb, i+1 ); j<jend; j++ )
+				mtx[i][j-i] = sketchcommon( sk, i, j );
+	}
+}
+
+#ifdef enablemultithread
+static void *sketchthread( void *arg )
+{
+	sketchthread_arg_t *targ = (sketchthread_arg_t *)arg;
+	int nblock = ( targ->sk->njob + SKETCHBLOCK - 1 ) / SKETCHBLOCK;
+	int block;
+
+	while( 1 )
+	{
+		pthread_mutex_lock( targ->mutex );
+		block = *targ->blockpospt;
+		if( block == nblock )
+		{
+			pthread_mutex_unlock( targ->mutex );
+			return( NULL );
+		}
+		*targ->blockpospt = block+1;
+		pthread_mutex_unlock( targ->mutex );
+
+		sketchblock( targ->sk, targ->mtx, block );
+	}
+}
+#endif
+
+/*
+  Fill mtx like commonsextet_p() does for every pair, with the number of tuples
+  of each sequence on the diagonal and the estimated number in common elsewhere.
+*/
+void sketchdistancematrix( int njob, int **pointt, int tsize, int size, int nthreadpair, double **mtx )
+{
+	Sketches sk;
+	int *occurrence;
+	int i, block, nblock;
+
+	sk.njob = njob;
+	sk.size = size;
+	sk.bins = malloc( (size_t)njob * size * sizeof( unsigned int ) );
+	sk.total = calloc( njob, sizeof( int ) );
+	occurrence = calloc( tsize, sizeof( int ) );
+	if( !sk.bins || !sk.total || !occurrence ) ErrorExit( "Cannot allocate sketches\n" );
+
+	for( i=0; i<njob; i++ )
+		makesketch( sk.bins + (size_t)i * size, sk.total+i, pointt[i], occurrence, size );
+	free( occurrence );
+
+	nblock = ( njob + SKETCHBLOCK - 1 ) / SKETCHBLOCK;
+#ifdef enablemultithread
+	if( nthreadpair > 0 )
+	{
+		sketchthread_arg_t targ;
+		pthread_t *handle;
+		pthread_mutex_t mutex;
+		int blockpos = 0;
+
+		handle = calloc( nthreadpair, sizeof( pthread_t ) );
+		pthread_mutex_init( &mutex, NULL );
+		targ.sk = &sk;
+		targ.mtx = mtx;
+		targ.blockpospt = &blockpos;
+		targ.mutex = &mutex;
+
+		for( i=0; i<nthreadpair; i++ )
+			pthread_create( handle+i, NULL, sketchthread, (void *)&targ );
+		for( i=0; i<nthreadpair; i++ )
+			pthread_join( handle[i], NULL );
+		pthread_mutex_destroy( &mutex );
+		free( handle );
+	}
+	else
+#endif
+	{
+		for( block=0; block<nblock; block++ )
+		{
+			if( block % 10 == 0 ) reporterr( "\r% 5d / %d", block * SKETCHBLOCK + 1, njob );
+			sketchblock( &sk, mtx, block );
+		}
+	}
+
+	free( sk.bins );
+	free( sk.total );
+}
@@ -29,6 +29,7 @@ static int picksize;
 static int reorder;
 static int pid;
 static int maxdepth = 0;
+static int nunknown = 0;
 static double tokyoripara;
 
 #define PLENFACA 0.01
@@ -57,19 +58,19 @@ typedef struct _scores
 	int shimon;
 } Scores;
 
-int intcompare( const int *a, const int *b )
+static int intcompare( const int *a, const int *b )
 {
 	return( *a - *b );
 }
 
-int lcompare( const Scores *a, const Scores *b )
+static int lcompare( const Scores *a, const Scores *b )
 {
 	if( a->orilen < b->orilen ) return 1;
 	else if( a->orilen > b->orilen ) return -1;
 	else return 0;
 }
 
-int dcompare( const Scores *a, const Scores *b )
+static int dcompare( const Scores *a, const Scores *b )
 {
 	if( a->score > b->score ) return 1;
 	else if( a->score < b->score ) return -1;
@@ -528,10 +529,12 @@ static void selhead( int *ar, int n )
 }
 #endif
 
-void arguments( int argc, char *argv[] )
+static void arguments( int argc, char *argv[] )
 {
     int c;
 
+	maxdepth = 0;
+	nunknown = 0;
 	doalign = 0;
 	fromaln = 0;
 	treeout = 0;
@@ -803,9 +806,7 @@ void arguments( int argc, char *argv[] )
 	}
 }
 
-static int nunknown = 0;
-
-int seq_grp_nuc( int *grp, char *seq )
+static int seq_grp_nuc( int *grp, char *seq )
 {
 	int tmp;
 	int *grpbk = grp;
@@ -821,7 +822,7 @@ int seq_grp_nuc( int *grp, char *seq )
 	return( grp-grpbk );
 }
 
-int seq_grp( int *grp, char *seq )
+static int seq_grp( int *grp, char *seq )
 {
 	int tmp;
 	int *grpbk = grp;
@@ -837,7 +838,7 @@ int seq_grp( int *grp, char *seq )
 	return( grp-grpbk );
 }
 
-void makecompositiontable_p( int *table, int *pointt )
+static void makecompositiontable_p( int *table, int *pointt )
 {
 	int point;
 
@@ -864,6 +865,13 @@ static int localcommonsextet_p( int *table, int *pointt )
 	static int *ct = NULL;
 	static int *cp;
 
+	if( table == NULL )
+	{
+		if( memo ) free( memo ); memo = NULL;
+		if( ct ) free( ct ); ct = NULL;
+		return( 0 );
+	}
+
 	if( !memo )
 	{
 		memo = (int *)calloc( tsize, sizeof( int ) );
@@ -897,7 +905,7 @@ static int localcommonsextet_p( int *table, int *pointt )
 	return( value );
 }
 
-void makepointtable_nuc( int *pointt, int *n )
+static void makepointtable_nuc( int *pointt, int *n )
 {
 	int point;
 	register int *p;
@@ -921,7 +929,7 @@ void makepointtable_nuc( int *pointt, int *n )
 	*pointt = END_OF_VEC;
 }
 
-void makepointtable( int *pointt, int *n )
+static void makepointtable( int *pointt, int *n )
 {
 	int point;
 	register int *p;
@@ -964,6 +972,20 @@ static void pairalign( int nseq, int *nlen, char **seq, int *mem1, int *mem2, do
 	int i, j;
 #endif
 
+	if( mem1 == NULL )
+	{
+		if( effarr1 )
+		{
+			free( fftlog );
+			free( effarr1 ); effarr1 = NULL;
+			free( effarr2 ); effarr2 = NULL;
+			free( indication1 );
+			free( indication2 );
+			free( mseq1 );
+			free( mseq2 );
+		}
+		return;
+	}
 
 	if( effarr1 == NULL )
 	{
@@ -1224,6 +1246,15 @@ static int splitseq_mq( Scores *scores, int nin, int *nlen, char **seq, char **o
 	static int palloclen = 0;
 	double maxdist;
 
+	if( qinoya == -1 ) // top level, forget the previous run
+	{
+		groupid = 0;
+		branchid = 0;
+		orderpos = NULL;
+		palloclen = 0;
+		if( mseq1 ) FreeCharMtx( mseq1 ); mseq1 = NULL;
+		if( mseq2 ) FreeCharMtx( mseq2 ); mseq2 = NULL;
+	}
 	if( orderpos == NULL )
 		orderpos = order;
 	if( palloclen == 0 )
@@ -2414,6 +2445,7 @@ exit( 1 );
 		int l;
 		static int *mem1 = NULL;
 		static int *mem2 = NULL;
+		static int memalloc = 0;
 		char **parttree = NULL; // by Mathog
 
 #if TREE
@@ -2430,10 +2462,13 @@ exit( 1 );
 			free( children );
 		}
 #endif
-		if( mem1 == NULL )
+		if( memalloc < njob+1 )
 		{
+			if( mem1 ) free( mem1 );
+			if( mem2 ) free( mem2 );
 			mem1 = AllocateIntVec( njob+1 );
 			mem2 = AllocateIntVec( njob+1 );
+			memalloc = njob+1;
 		}
 
 //		veryfastsupg_double_realloc_nobk_halfmtx( nyuko, yukomtx, topol, len );
@@ -2671,7 +2706,7 @@ static void alignparaphiles( int nseq, int *nlen, double *weight, char **seq, in
 
 
 
-int main( int argc, char *argv[] )
+int splittbfast( int argc, char *argv[] )
 {
 	static char **name, **seq, **orialn;
 	static int *grpseq;
@@ -2707,7 +2742,9 @@ int main( int argc, char *argv[] )
 	static char **tree;
 
 
-
+#ifdef ismodule
+	srand( 1 ); // as in a new process
+#endif
 	arguments( argc, argv );
 
 	if( inputfile )
@@ -3236,7 +3273,43 @@ int main( int argc, char *argv[] )
 		system( com );
 	}
 
+	if( !doalign ) for( i=0; i<njob; i++ ) free( pointt[i] );
+	free( pointt );
+	if( fromaln ) FreeCharMtx( orialn );
+	FreeCharMtx( name );
+	FreeCharMtx( seq );
+	free( nlen );
+	free( tmpseq );
+	free( grpseq );
+	free( order );
+	free( whichgroup );
+	free( weight );
+	free( scores );
+#if TREE
+	if( treeout )
+	{
+		free( *tree );
+		free( tree );
+	}
+#endif
+	pairalign( 0, NULL, NULL, NULL, NULL, NULL, NULL );
+	localcommonsextet_p( NULL, NULL );
+	Falign( NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, 0, 0, 0, NULL, NULL, 0, NULL );
+	Falign_udpari_long( NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, 0, 0, 0, NULL );
+	A__align( NULL, 0, 0, NULL, NULL, NULL, NULL, 0, 0, 0, 0, NULL, NULL, NULL, NULL, NULL, NULL, 0, NULL, 0, 0, -1, -1, NULL, NULL, NULL, 0.0, 0.0 );
+	G__align11( NULL, NULL, NULL, 0, 0, 0 );
+	G__align11_noalign( NULL, 0, 0, NULL, NULL, 0 );
+	freeconstants();
+	FreeCommonIP();
+
 	SHOWVERSION;
 
 	return( 0 );
 }
+
+#ifndef ismodule
+int main( int argc, char *argv[] )
+{
+	return splittbfast( argc, argv );
+}
+#endif
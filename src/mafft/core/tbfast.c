@@ -344,9 +344,9 @@ static void arguments( int argc, char *argv[], int *pac, char **pav, int *tac, c
 				case 'y':
                                         distout = *(*++argv);
 					reporterr(       "distout=%c\n", distout );
-                                        if( distout != 'c' && distout != 'h' )
+                                        if( distout != 'c' && distout != 'h' && distout != 'b' )
                                         {
-                                            reporterr(       "Set -y c or -y h in v>=7.521.\n" );
+                                            reporterr(       "Set -y c, -y h or -y b in v>=7.521.\n" );
                                             exit( 1 );
                                         }
 					--argc;
@@ -1944,6 +1944,7 @@ int tbfast( int argc, char *argv[] )
 	int *uselh = NULL;
 	int nseed = 0;
 	int *nfilesfornode = NULL;
+	int filesopen = 0;
 
 	pav = calloc( argc, sizeof( char * ) );
 	tav = calloc( argc, sizeof( char * ) );
@@ -2175,6 +2176,11 @@ int tbfast( int argc, char *argv[] )
 		if( callpairlocalalign )
 		{
 			pairlocalalign( njob, nlenmax, name, seq, iscore, localhomtable, pac, pav, expdist );
+			if( npairtiles && pairtile >= 0 ) // Only one tile of the pairs, for another run to read
+			{
+				if( expdist ) FreeDoubleMtx( expdist ); expdist = NULL;
+				goto chudan;
+			}
 			arguments( tac, tav, NULL, NULL, NULL, NULL ); // anzen no tame
 			callpairlocalalign = 1; // wakarinikui.
 			if( expdist ) FreeDoubleMtx( expdist ); expdist = NULL;
@@ -2330,6 +2336,11 @@ int tbfast( int argc, char *argv[] )
 		if( callpairlocalalign )
 		{
 			pairlocalalign( njob, nlenmax, name, seq, iscore, NULL, pac, pav, expdist );
+			if( npairtiles && pairtile >= 0 ) // Only one tile of the pairs, for another run to read
+			{
+				if( expdist ) FreeDoubleMtx( expdist ); expdist = NULL;
+				goto chudan;
+			}
 			arguments( tac, tav, NULL, NULL, NULL, NULL ); // anzen no tame
 			callpairlocalalign = 1; // wakarinikui.
 			if( expdist ) FreeDoubleMtx( expdist ); expdist = NULL;
@@ -2466,6 +2477,7 @@ int tbfast( int argc, char *argv[] )
 	initSignalSM();
 
 	initFiles();
+	filesopen = 1;
 
 	WriteOptions( trap_g );
 
@@ -3655,7 +3667,7 @@ chudan:
 	if( localmem ) FreeIntMtx( localmem ); localmem = NULL;
 
 	freeconstants();
-	closeFiles();
+	if( filesopen ) closeFiles(); // Pair tiles stop before initFiles()
 	FreeCommonIP();
 	return( 0 );
 
@@ -160,6 +160,28 @@ exit( 1 );
 #endif
 }
 
+static int timelimitreached( void )
+{
+	return( refinetimelimit > 0.0 && wallclock() - refinestart >= refinetimelimit );
+}
+
+/* Append the sum-of-pairs score of the whole alignment to _scores, return 1 if this segment gained less than refinemingain */
+static int recordscore( int nseq, char **seq )
+{
+	FILE *fp;
+	double score = sumofpairsscore( nseq, seq );
+	int lowgain = refinemingain > 0.0 && score - refinescore < refinemingain * fabs( refinescore );
+
+	fp = fopen( "_scores", "a" );
+	if( fp )
+	{
+		fprintf( fp, "%.17g\n", refinescorebase + score );
+		fclose( fp );
+	}
+	refinescore = score;
+	return( lowgain );
+}
+
 static void Writeoption2( FILE *fp, int cycle, double cut )
 {
 	fprintf( fp, "%dth cycle\n", cycle );
@@ -367,6 +389,7 @@ static void *athread( void *arg )
 	int i, k, l, ii;
 	double gain;
 	int iterate;
+	int lowgain;
 	int **memlist;
 	char *pairbuf;
 	int locnjob;
@@ -638,6 +661,18 @@ static void *athread( void *arg )
 			}
 #endif
 
+			lowgain = recordscore( locnjob, mastercopy );
+			if( timelimitreached() )
+			{
+				fprintf( stderr, "\nTime limit reached.\n" );
+				*collectingpt = -1;
+			}
+			else if( lowgain )
+			{
+				fprintf( stderr, "\nGain below %f.\n", refinemingain );
+				*collectingpt = -1;
+			}
+
 			pthread_mutex_unlock( targ->mutex );
 		}
 		pthread_mutex_lock( targ->mutex );
@@ -738,6 +773,8 @@ static void *athread( void *arg )
 			(*ntrypt)++;
 			pthread_mutex_unlock( targ->mutex );
 
+			if( timelimitreached() ) goto skipjob;
+
 //			fprintf( stderr, "\n IRANAI IRANAI *jobposintpt=%d, nbranch = %d\n", *jobposintpt, nbranch );
 
 //			fprintf( stderr, "branchpos = %d (thread %d)\n", branchpos, thread_no );
@@ -1187,7 +1224,7 @@ static void *athread( void *arg )
 					fprintf( stderr, "tscore =  %f   mscore = %f  accepted.\n", tscore, mscore );
 					fprintf( stderr, "\nbetter! gain = %f (thread %d)\r", gain, thread_no );
 #else
-					fprintf( stderr, "%03d-%04d-%d (thread %4d) better     \r", iterate+1, *ndonept, k, thread_no );
+					fprintf( stderr, "%03d-%04d-%d (thread %4d) better score = %f     \r", iterate+1, *ndonept, k, thread_no, tscore );
 #endif
 
 				}
@@ -1197,7 +1234,7 @@ static void *athread( void *arg )
 					fprintf( stderr, "tscore =  %f   mscore = %f  rejected.\r", tscore, mscore );
 					fprintf( stderr, "worse! gain = %f", gain );
 #else
-					fprintf( stderr, "%03d-%04d-%d (thread %4d) worse      \r", iterate+1, *ndonept, k, thread_no );
+					fprintf( stderr, "%03d-%04d-%d (thread %4d) worse score = %f      \r", iterate+1, *ndonept, k, thread_no, tscore );
 #endif
 					tscore = mscore;
 				}
@@ -1234,6 +1271,7 @@ static void *athread( void *arg )
 			tscorehistory_detail[iterate][branchpos] = tscore;
 			fprintf( stderr, "\r" );
 
+			skipjob:
 			pthread_mutex_lock( targ->mutex );
 			(*ndonept)++;
 //			fprintf( stderr, "*ndonept = %d, nbranch = %d (thread %d) iterate=%d\n", *ndonept, nbranch, thread_no, iterate );
@@ -1286,6 +1324,7 @@ int TreeDependentIteration( int locnjob, char **name, int nlen[M],
 	double tscore, mscore;
 	int identity;
 	int converged;
+	int pending;
 	int oscillating;
 //	double naivescore0 = 0.0; // by D.Mathog, a guess
 //	double naivescore1;
@@ -1400,6 +1439,7 @@ int TreeDependentIteration( int locnjob, char **name, int nlen[M],
 	for( i=0; i<locnjob; i++ ) strcpy( bseq[i], aseq[i] );
 
 	writePre( locnjob, name, nlen, aseq, 0 );
+	pending = 0;
 
 	if( utree )
 	{
@@ -1687,6 +1727,14 @@ int TreeDependentIteration( int locnjob, char **name, int nlen[M],
 	#else
 					fprintf( stderr, "STEP %03d-%03d-%d %s", iterate+1, l+1, k, use_fft?"\n":"\n" );
 	#endif
+					if( timelimitreached() )
+					{
+						fprintf( trap_g, "Time limit reached.\n\n" );
+						fprintf( stderr, "\nTime limit reached.\n\n" );
+						if( pending ) recordscore( locnjob, bseq );
+						value = 0;
+						goto end;
+					}
 					if( skipthisbranch[l][k] )
 					{
 						fprintf( stderr, " skip.      \r" );
@@ -2303,6 +2351,7 @@ int TreeDependentIteration( int locnjob, char **name, int nlen[M],
 	#endif
 							fprintf( stderr, " accepted." );
 							converged = 0;
+							pending = 1;
 
 						}
 						else
@@ -2315,6 +2364,7 @@ int TreeDependentIteration( int locnjob, char **name, int nlen[M],
 							converged++;
 						}
 					}
+					fprintf( stderr, " score = %f", tscore );
 					if( alg == 'd' )
 						fprintf( stderr, "\n" );
 					else
@@ -2337,6 +2387,7 @@ int TreeDependentIteration( int locnjob, char **name, int nlen[M],
 							if( weight || constraint ) fprintf( stderr, " (differs from the objective score)" );
 							fprintf( stderr, "\n\n" );
 						}
+						if( pending ) recordscore( locnjob, bseq );
 						value = 0;
 						goto end;
 					}
@@ -2365,6 +2416,7 @@ int TreeDependentIteration( int locnjob, char **name, int nlen[M],
 								fprintf( stderr, "\n\n" );
 							}
 	#if 1 /* hujuubun */
+							if( pending ) recordscore( locnjob, bseq );
 							value = -1;
 							goto end;
 	#endif
@@ -2380,6 +2432,14 @@ int TreeDependentIteration( int locnjob, char **name, int nlen[M],
 				if( weight || constraint ) fprintf( stderr, " (differs from the objective score)" );
 				fprintf( stderr, "\n\n" );
 			}
+			pending = 0;
+			if( recordscore( locnjob, bseq ) )
+			{
+				fprintf( trap_g, "Gain below %f.\n\n", refinemingain );
+				fprintf( stderr, "\nGain below %f.\n\n", refinemingain );
+				value = 0;
+				goto end;
+			}
 		}                  /* for( iterate ) */
 	}
 	value = 2;
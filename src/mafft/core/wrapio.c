@@ -19,17 +19,71 @@
  /*
   * wrapio.c:
   * Uses static variables, does not support subinterpreters
+  *
+  * Between wrapio_open() and wrapio_close(), output to stdout/stderr
+  * is collected by native sinks, chosen from the module attributes:
+  * - None: discard output without formatting it
+  * - int: buffer and write to that file descriptor
+  * - bytearray: buffer in memory, append to the bytearray when closing
+  * - other: write to the Python file per line, buffer other threads
+  * Outside of that, each call writes to the Python file directly.
   */
 
 #define PY_SSIZE_T_CLEAN
 #include <Python.h>
 #include <stdlib.h>
 #include <stdio.h>
+#include <string.h>
+#ifdef _WIN32
+#include <io.h>
+#define write _write
+#else
+#include <unistd.h>
+#endif
+#ifdef enablemultithread
+#include <pthread.h>
+#endif
 
 
 static PyObject * _module = NULL;
 static char *_buffer = NULL;
 static int _buffer_size = 256;
+static FILE *_stdin = NULL;
+static PyObject *_stdin_data = NULL;
+
+// wrapio.h is not included here, as its macros replace the functions wrapped
+int wrapio_close ( void );
+void wrapio_close_stdin ( void );
+
+#define SINK_FLUSH_SIZE (1 << 16)
+
+enum { SINK_CLOSED, SINK_QUIET, SINK_FD, SINK_MEMORY, SINK_PYTHON };
+
+typedef struct {
+  int kind;
+  int fd;
+  PyObject *object;
+  char *data;
+  size_t size;
+  size_t capacity;
+} Sink;
+
+static Sink _sinks[2] = {
+  {SINK_CLOSED, -1, NULL, NULL, 0, 0},
+  {SINK_CLOSED, -1, NULL, NULL, 0, 0},
+};
+
+#ifdef enablemultithread
+static pthread_mutex_t _sink_mutex = PTHREAD_MUTEX_INITIALIZER;
+static pthread_t _sink_owner;
+#define SINK_LOCK pthread_mutex_lock(&_sink_mutex)
+#define SINK_UNLOCK pthread_mutex_unlock(&_sink_mutex)
+#define SINK_OWNED pthread_equal(pthread_self(), _sink_owner)
+#else
+#define SINK_LOCK
+#define SINK_UNLOCK
+#define SINK_OWNED 1
+#endif
 
 
 int __add_attr_from_dict ( PyObject *m, PyObject *dict, char *attr ) {
@@ -66,6 +120,222 @@ char *__attr_from_stream ( FILE *stream ) {
   return attr;
 }
 
+Sink *__sink_from_stream ( FILE *stream ) {
+ /*
+  * Return the open sink for stdout/stderr, or NULL.
+  */
+  Sink *sink = NULL;
+  if (stream == stdout) sink = &_sinks[0];
+  else if (stream == stderr) sink = &_sinks[1];
+  if (sink && sink->kind == SINK_CLOSED) sink = NULL;
+  return sink;
+}
+
+int __sink_reserve ( Sink *sink, size_t extra ) {
+ /*
+  * Make room for extra bytes plus a terminating null.
+  * Return 0 on success, -1 on failure.
+  */
+  size_t capacity = sink->capacity ? sink->capacity : SINK_FLUSH_SIZE;
+  char *data;
+
+  if (sink->size + extra + 1 <= sink->capacity)
+    return 0;
+  while (sink->size + extra + 1 > capacity)
+    capacity *= 2;
+  if (!(data = realloc(sink->data, capacity)))
+    return -1;
+  sink->data = data;
+  sink->capacity = capacity;
+  return 0;
+}
+
+int __sink_write_fd ( Sink *sink ) {
+ /*
+  * Write all buffered data to the file descriptor.
+  * Return 0 on success, -1 on failure.
+  */
+  size_t done = 0;
+  while (done < sink->size) {
+    int count = (int) write(sink->fd, sink->data + done, (unsigned int) (sink->size - done));
+    if (count <= 0) return -1;
+    done += count;
+  }
+  sink->size = 0;
+  return 0;
+}
+
+int __sink_drain ( Sink *sink ) {
+ /*
+  * Pass buffered data to its destination. Python objects are only
+  * touched by the thread that opened the sink, which holds the GIL.
+  * Return 0 on success. Return -1 and may set an error on failure.
+  */
+  PyObject *result = NULL;
+  Py_ssize_t offset;
+
+  switch (sink->kind) {
+    case SINK_FD:
+      return __sink_write_fd(sink);
+    case SINK_MEMORY:
+      if (!SINK_OWNED || !sink->size) return 0;
+      offset = PyByteArray_GET_SIZE(sink->object);
+      if (PyByteArray_Resize(sink->object, offset + sink->size))
+        return -1;
+      memcpy(PyByteArray_AS_STRING(sink->object) + offset, sink->data, sink->size);
+      sink->size = 0;
+      return 0;
+    case SINK_PYTHON:
+      if (!SINK_OWNED || !sink->size) return 0;
+      sink->data[sink->size] = '\0';
+      sink->size = 0;
+      if (PyFile_WriteString(sink->data, sink->object))
+        return -1;
+      if (!(result = PyObject_CallMethod(sink->object, "flush", NULL)))
+        return -1;
+      Py_DECREF(result);
+      return 0;
+  }
+  return 0;
+}
+
+void __sink_live ( Sink *sink, const char *str, size_t length ) {
+ /*
+  * Python sinks are line buffered when written by the owning thread,
+  * so that progress reaches them while the core is still running.
+  * Errors cannot be passed on to the core: they are reported as
+  * unraisable and any further output is discarded.
+  */
+  if (sink->kind != SINK_PYTHON || !SINK_OWNED) return;
+  if (!memchr(str, '\n', length) && !memchr(str, '\r', length)) return;
+  if (__sink_drain(sink)) {
+    PyErr_WriteUnraisable(sink->object);
+    sink->kind = SINK_QUIET;
+    sink->size = 0;
+  }
+}
+
+int __sink_append ( Sink *sink, const char *str, size_t length ) {
+ /*
+  * Buffer a string, draining to file descriptors when the buffer is full.
+  * Return 0 on success, -1 on failure.
+  */
+  int done = 0;
+  SINK_LOCK;
+  if (sink->kind != SINK_QUIET) {
+    if (__sink_reserve(sink, length)) done = -1;
+    else {
+      memcpy(sink->data + sink->size, str, length);
+      sink->size += length;
+      if (sink->kind == SINK_FD && sink->size >= SINK_FLUSH_SIZE)
+        done = __sink_write_fd(sink);
+      __sink_live(sink, str, length);
+    }
+  }
+  SINK_UNLOCK;
+  return done;
+}
+
+int __sink_vprintf ( Sink *sink, const char *format, va_list args ) {
+ /*
+  * Format directly into the sink buffer, or skip formatting if quiet.
+  * Return the number of characters written, or -1 on failure.
+  */
+  int done = 0;
+  size_t available;
+  va_list args_copy;
+
+  if (sink->kind == SINK_QUIET)
+    return 0;
+
+  SINK_LOCK;
+  if (__sink_reserve(sink, 256)) done = -1;
+  else {
+    available = sink->capacity - sink->size;
+    va_copy(args_copy, args);
+    done = vsnprintf(sink->data + sink->size, available, format, args_copy);
+    va_end(args_copy);
+    if (done >= 0 && (size_t) done >= available) {
+      if (__sink_reserve(sink, done)) done = -1;
+      else {
+        va_copy(args_copy, args);
+        done = vsnprintf(sink->data + sink->size, done + 1, format, args_copy);
+        va_end(args_copy);
+      }
+    }
+    if (done > 0) {
+      sink->size += done;
+      if (sink->kind == SINK_FD && sink->size >= SINK_FLUSH_SIZE)
+        if (__sink_write_fd(sink)) done = -1;
+      __sink_live(sink, sink->data + sink->size - done, done);
+    }
+  }
+  SINK_UNLOCK;
+  return done;
+}
+
+int __sink_open ( Sink *sink, const char *attr ) {
+ /*
+  * Choose the sink kind from the module attribute.
+  * Return 0 on success. Return -1 and sets an error on failure.
+  */
+  PyObject *dict = NULL;
+  PyObject *object = NULL;
+
+  if (!(dict = PyModule_GetDict(_module)))
+    return -1;
+  if (!(object = PyDict_GetItemString(dict, attr))) {
+    PyErr_Format(PyExc_AttributeError,
+      "Module '%s' has no attibute '%s'.",
+      PyModule_GetName(_module), attr
+    );
+    return -1;
+  }
+
+  sink->size = 0;
+  sink->fd = -1;
+  sink->object = NULL;
+  if (object == Py_None)
+    sink->kind = SINK_QUIET;
+  else if (PyLong_Check(object)) {
+    sink->fd = (int) PyLong_AsLong(object);
+    if (PyErr_Occurred()) return -1;
+    sink->kind = SINK_FD;
+  }
+  else {
+    sink->kind = PyByteArray_Check(object) ? SINK_MEMORY : SINK_PYTHON;
+    Py_INCREF(object);
+    sink->object = object;
+  }
+  return 0;
+}
+
+int __sink_close ( Sink *sink ) {
+ /*
+  * Drain and forget the sink, keeping its buffer for reuse.
+  * Return 0 on success. Return -1 and may set an error on failure.
+  */
+  int done = 0;
+  if (sink->kind == SINK_CLOSED)
+    return 0;
+  done = __sink_drain(sink);
+  sink->kind = SINK_CLOSED;
+  sink->size = 0;
+  sink->fd = -1;
+  Py_CLEAR(sink->object);
+  return done;
+}
+
+void __sinks_at_exit ( void ) {
+ /*
+  * The core may call exit(), make sure file descriptors get their data.
+  * Python objects are not safe to touch at this point.
+  */
+  for (int i = 0; i < 2; i++)
+    if (_sinks[i].kind == SINK_FD)
+      __sink_write_fd(&_sinks[i]);
+}
+
 PyObject *__file_from_stream ( FILE *stream ) {
  /*
   * Return the corresponding Python IO object.
@@ -97,8 +367,12 @@ int _vfprintf ( FILE *stream, const char *format, va_list args ) {
   */
 	int done;
   char * attr = __attr_from_stream(stream);
+  Sink *sink = __sink_from_stream(stream);
 
-  if ((_module) && (attr[0] != '\0')) {
+  if (sink) {
+    done = __sink_vprintf(sink, format, args);
+  }
+  else if ((_module) && (attr[0] != '\0')) {
 
   	PyObject *dict = NULL;
   	PyObject *file = NULL;
@@ -164,8 +438,14 @@ int _fputc ( int character, FILE * stream ) {
   PyObject *file = NULL;
   char array[2] = {'\0', '\0'};
   char * attr = __attr_from_stream(stream);
+  Sink *sink = __sink_from_stream(stream);
 
-  if ((_module) && (attr[0] != '\0')) {
+  if (sink) {
+    array[0] = (char) character;
+    if (__sink_append(sink, array, 1))
+      return EOF;
+  }
+  else if ((_module) && (attr[0] != '\0')) {
 
     if (!(file = __file_from_stream(stream)))
       return EOF;
@@ -197,8 +477,13 @@ int _fputs ( const char * str, FILE * stream ) {
 	int done = 0;
   PyObject *file = NULL;
   char * attr = __attr_from_stream(stream);
+  Sink *sink = __sink_from_stream(stream);
 
-  if ((_module) && (attr[0] != '\0')) {
+  if (sink) {
+    if (__sink_append(sink, str, strlen(str)))
+      return EOF;
+  }
+  else if ((_module) && (attr[0] != '\0')) {
 
     if (!(file = __file_from_stream(stream)))
       return EOF;
@@ -228,8 +513,15 @@ int _fflush ( FILE * stream ) {
   PyObject *file = NULL;
   PyObject *res = NULL;
   char * attr = __attr_from_stream(stream);
+  Sink *sink = __sink_from_stream(stream);
 
-  if ((_module) && (attr[0] != '\0')) {
+  if (sink) {
+    SINK_LOCK;
+    done = __sink_drain(sink);
+    SINK_UNLOCK;
+    if (done) return EOF;
+  }
+  else if ((_module) && (attr[0] != '\0')) {
 
     file = __file_from_stream(stream);
     if (!(res = PyObject_CallMethod(file, "flush", NULL)))
@@ -242,6 +534,110 @@ int _fflush ( FILE * stream ) {
   return done;
 }
 
+FILE *_stdin_stream ( void ) {
+ /*
+  * Return the memory stream opened by wrapio_open_stdin(),
+  * or the process stdin if there is none.
+  */
+  return (_stdin) ? _stdin : stdin;
+}
+
+int wrapio_open_stdin ( void ) {
+ /*
+  * If the module's stdin attribute is a bytes object,
+  * open it as a read-only stream for the next core call.
+  * The core owns the stream and may close it.
+  * Return 0 on success. Return -1 and sets an error on failure.
+  */
+
+  PyObject *dict = NULL;
+  PyObject *data = NULL;
+  char *bytes = NULL;
+  Py_ssize_t size = 0;
+
+  wrapio_close_stdin();
+
+  if (!_module)
+    return 0;
+
+  if (!(dict = PyModule_GetDict(_module)))
+    return -1;
+
+  data = PyDict_GetItemString(dict, "stdin");
+  if (!data || !PyBytes_Check(data))
+    return 0;
+
+  if (PyBytes_AsStringAndSize(data, &bytes, &size))
+    return -1;
+
+#ifdef _WIN32
+  _stdin = tmpfile();
+  if (_stdin) {
+    if (size && fwrite(bytes, 1, size, _stdin) != (size_t) size) {
+      fclose(_stdin);
+      _stdin = NULL;
+    }
+    else rewind(_stdin);
+  }
+#else
+  if (size) _stdin = fmemopen(bytes, size, "r");
+  else _stdin = tmpfile();
+#endif
+
+  if (!_stdin) {
+    PyErr_SetString(PyExc_RuntimeError,	"Failed to open input buffer.");
+    return -1;
+  }
+
+  Py_INCREF(data);
+  _stdin_data = data;
+  return 0;
+}
+
+int wrapio_open ( void ) {
+ /*
+  * Open the output sinks and the input buffer for the next core call.
+  * Return 0 on success. Return -1 and sets an error on failure.
+  */
+  if (!_module)
+    return 0;
+#ifdef enablemultithread
+  _sink_owner = pthread_self();
+#endif
+  if (__sink_open(&_sinks[0], "stdout"))
+    return -1;
+  if (__sink_open(&_sinks[1], "stderr")) {
+    __sink_close(&_sinks[0]);
+    return -1;
+  }
+  if (wrapio_open_stdin()) {
+    wrapio_close();
+    return -1;
+  }
+  return 0;
+}
+
+int wrapio_close ( void ) {
+ /*
+  * Drain and close the output sinks, forget the input buffer.
+  * Return 0 on success. Return -1 and may set an error on failure.
+  */
+  int done = 0;
+  wrapio_close_stdin();
+  if (__sink_close(&_sinks[0])) done = -1;
+  if (__sink_close(&_sinks[1])) done = -1;
+  return done;
+}
+
+void wrapio_close_stdin ( void ) {
+ /*
+  * Forget the stream opened by wrapio_open_stdin().
+  * The stream itself is not closed, as the core usually does that.
+  */
+  _stdin = NULL;
+  Py_CLEAR(_stdin_data);
+}
+
 int wrapio_init ( PyObject *m ) {
 /*
  * Add redirection attributes to module and allocate the buffer.
@@ -269,6 +665,7 @@ int wrapio_init ( PyObject *m ) {
 	if (!(dict = PyModule_GetDict(sys)))
 		goto except;
 
+  __add_attr_from_dict(m, dict, "stdin");
   __add_attr_from_dict(m, dict, "stdout");
   __add_attr_from_dict(m, dict, "stderr");
 
@@ -279,6 +676,7 @@ int wrapio_init ( PyObject *m ) {
 
   _module = m;
 	Py_INCREF(m);
+  atexit(__sinks_at_exit);
 	if (!(_buffer = malloc(sizeof(char) * _buffer_size))) {
 		PyErr_SetString(PyExc_RuntimeError,	"Failed to allocate memory.");
 		goto except;
@@ -22,6 +22,12 @@
   */
 
 int wrapio_init ( PyObject *m );
+int wrapio_open ( void );
+int wrapio_close ( void );
+
+int wrapio_open_stdin ( void );
+void wrapio_close_stdin ( void );
+FILE *_stdin_stream ( void );
 
 int _vfprintf ( FILE *stream, const char *format, va_list args );
 int _fprintf ( FILE *stream, const char *format, ... );
@@ -50,6 +56,10 @@ int _fflush ( FILE * stream );
 
 #define fflush _fflush
 
+// Reads from stdin are served from the module's stdin if it holds bytes
+#undef stdin
+#define stdin _stdin_stream()
+
 // FOR READ ONLY
 // void rewind ( FILE * stream );
 
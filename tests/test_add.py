@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from itaxotools.mafftpy import MultipleSequenceAlignment, align
+from itaxotools.mafftpy.core import records_from_text, records_to_bytes
+
+TEST_DATA_DIR = Path(__file__).parent
+
+
+def ungapped(records: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    return [(id, sequence.replace("-", "").upper()) for id, sequence in records]
+
+
+def original_columns(records: list[tuple[str, str]]) -> list[str]:
+    """Drop the columns that only contain gaps"""
+    columns = [
+        i for i in range(len(records[0][1])) if any(s[i] != "-" for _, s in records)
+    ]
+    return ["".join(sequence[i] for i in columns) for _, sequence in records]
+
+
+@pytest.fixture(scope="module")
+def existing() -> list[tuple[str, str]]:
+    records = records_from_text((TEST_DATA_DIR / "sample4/sample").read_text())
+    return align(records[:-3], "fftns1")
+
+
+@pytest.fixture
+def addition(tmp_path: Path) -> tuple[Path, list[tuple[str, str]]]:
+    records = records_from_text((TEST_DATA_DIR / "sample4/sample").read_text())
+    # An insertion that the existing alignment has no room for
+    records = [(id, s[:100] + "GGGGGCCCCC" + s[100:]) for id, s in records[-3:]]
+    path = tmp_path / "addition"
+    path.write_bytes(records_to_bytes(records))
+    return path, records
+
+
+@pytest.mark.parametrize("mode", ["add", "addfragments", "addfull"])
+@pytest.mark.parametrize("keeplength", [False, True])
+def test_add(existing, addition, mode: str, keeplength: bool) -> None:
+    path, records = addition
+    result = align(existing, "fftns1", **{mode: path}, keeplength=keeplength)
+    assert len({len(sequence) for _, sequence in result}) == 1
+    assert ungapped(result[: len(existing)]) == ungapped(existing)
+    assert original_columns(result[: len(existing)]) == original_columns(existing)
+    assert [id for id, _ in result[len(existing) :]] == [id for id, _ in records]
+    if keeplength:
+        assert len(result[0][1]) == len(existing[0][1])
+    else:
+        assert len(result[0][1]) > len(existing[0][1])
+        assert ungapped(result[len(existing) :]) == ungapped(records)
+
+
+def test_add_from_file(tmp_path: Path, existing, addition) -> None:
+    path, _ = addition
+    input = tmp_path / "existing"
+    input.write_bytes(records_to_bytes(existing))
+    a = MultipleSequenceAlignment(input, strategy="fftns1", addfragments=path)
+    a.start()
+    assert a.get_records() == align(existing, "fftns1", addfragments=path)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import NamedTuple
+
+import pytest
+
+from itaxotools.mafftpy import align
+from itaxotools.mafftpy.core import records_from_text, records_to_bytes
+
+TEST_DATA_DIR = Path(__file__).parent
+
+
+class AlignTest(NamedTuple):
+    input: str
+    output: str
+    strategy: str
+    kwargs: dict
+
+    def validate(self) -> None:
+        text = (TEST_DATA_DIR / self.input).read_text()
+        records = records_from_text(text)
+        fixed = records_from_text((TEST_DATA_DIR / self.output).read_text())
+        assert align(records, strategy=self.strategy, **self.kwargs) == fixed
+
+
+align_tests = [
+    AlignTest("sample2/sample", "sample2/sample.fftns1", "fftns1", {}),
+    AlignTest("sample2/sample", "sample2/sample.ginsi", "ginsi", {}),
+    AlignTest(
+        "sample3/sample",
+        "sample3/sample.fftns1.adjustdirection",
+        "fftns1",
+        dict(adjustdirection=True),
+    ),
+    AlignTest(
+        "sample3/sample",
+        "sample3/sample.ginsi.adjustdirectionaccurately",
+        "ginsi",
+        dict(adjustdirectionaccurately=True),
+    ),
+]
+
+
+@pytest.mark.parametrize("test", align_tests)
+def test_align_records(test: AlignTest) -> None:
+    test.validate()
+
+
+def test_align_bytes() -> None:
+    data = (TEST_DATA_DIR / "sample2/sample").read_bytes()
+    fixed = records_from_text((TEST_DATA_DIR / "sample2/sample.fftns1").read_text())
+    assert align(data.replace(b"\n", b"\r\n"), strategy="fftns1") == fixed
+
+
+def test_records_to_bytes() -> None:
+    records = [("a", "ACGT\r"), ("b", "AC-GT")]
+    assert records_to_bytes(records) == b">a\nACGT\n>b\nAC-GT\n"
+    assert records_from_text(records_to_bytes(records).decode()) == [
+        ("a", "ACGT"),
+        ("b", "AC-GT"),
+    ]
+
+
+@pytest.mark.parametrize("strategy", ["ginsi", "fftnsi"])
+def test_align_scalar(strategy: str, monkeypatch) -> None:
+    data = (TEST_DATA_DIR / "sample4/sample").read_bytes()
+    simd = align(data, strategy=strategy, threadit=0)
+    monkeypatch.setenv("MAFFTPY_SIMD", "0")
+    assert align(data, strategy=strategy, threadit=0) == simd
+
+
+def test_align_fft_backend() -> None:
+    data = (TEST_DATA_DIR / "sample1/sample").read_bytes()
+    records = records_from_text(data.decode())
+    aligned = align(data, strategy="fftns2", fftbackend="fast")
+    assert [id for id, _ in aligned] == [id for id, _ in records]
+    assert len({len(sequence) for _, sequence in aligned}) == 1
+    for (_, sequence), (_, original) in zip(aligned, records):
+        assert sequence.replace("-", "").upper() == original.upper()
+    with pytest.raises(ValueError):
+        align(data, strategy="fftns2", fftbackend="fftw")
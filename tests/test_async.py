@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from itaxotools.mafftpy import MultipleSequenceAlignment, align_async
+from itaxotools.mafftpy.core import records_from_text
+
+TEST_DATA_DIR = Path(__file__).parent
+
+
+def test_align_async() -> None:
+    async def main():
+        return await asyncio.gather(
+            *(
+                align_async((TEST_DATA_DIR / sample / "sample").read_bytes(), "fftns1")
+                for sample in ["sample2", "sample3"]
+            )
+        )
+
+    results = asyncio.run(main())
+    for sample, result in zip(["sample2", "sample3"], results):
+        fixed = (TEST_DATA_DIR / sample / "sample.fftns1").read_text()
+        assert result == records_from_text(fixed)
+
+
+def test_start_async_timeout() -> None:
+    data = (TEST_DATA_DIR / "sample4/sample").read_bytes()
+    a = MultipleSequenceAlignment.from_records(data, strategy="ginsi")
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(a.start_async(timeout=0.5))
+    assert a.target is None
+    assert not multiprocessing.active_children()
+
+
+def test_start_async_cancel() -> None:
+    data = (TEST_DATA_DIR / "sample4/sample").read_bytes()
+    a = MultipleSequenceAlignment.from_records(data, strategy="ginsi")
+
+    async def main():
+        task = asyncio.create_task(a.start_async())
+        await asyncio.sleep(0.5)
+        target = Path(a.target)
+        assert target.exists()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return target
+
+    target = asyncio.run(main())
+    assert not target.exists()
+    assert not multiprocessing.active_children()
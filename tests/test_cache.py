@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from itaxotools.mafftpy import (
+    MafftPool,
+    MultipleSequenceAlignment,
+    PairCache,
+    ResultCache,
+    align,
+    core,
+    set_cache,
+    threads,
+)
+from itaxotools.mafftpy.core import MafftVars, records_from_text
+
+TEST_DATA_DIR = Path(__file__).parent
+
+
+def test_cache_key() -> None:
+    fftns1 = MafftVars(strategy="fftns1")
+    ginsi = MafftVars(strategy="ginsi")
+    assert ResultCache.key(b"A", fftns1) == ResultCache.key(b"A", fftns1)
+    assert ResultCache.key(b"A", fftns1) != ResultCache.key(b"B", fftns1)
+    assert ResultCache.key(b"A", fftns1) != ResultCache.key(b"A", ginsi)
+
+
+def test_cache_hits(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path / "cache")
+    sample = TEST_DATA_DIR / "sample2/sample"
+    fixed = records_from_text((TEST_DATA_DIR / "sample2/sample.fftns1").read_text())
+    set_cache(cache)
+    try:
+        assert align(sample.read_bytes(), strategy="fftns1") == fixed
+        assert align(sample.read_bytes(), strategy="fftns1") == fixed
+        a = MultipleSequenceAlignment(sample, strategy="fftns1")
+        a.start()
+        assert a.get_records() == fixed
+        assert a.strategy == "FFT-NS-1"
+        with MafftPool(workers=1) as pool:
+            assert pool.align(sample.read_bytes(), "fftns1").result() == fixed
+    finally:
+        set_cache(None)
+    assert cache.stats() == dict(hits=3, misses=1, tree_hits=0, tree_misses=1)
+
+
+def test_tree_key_refinement() -> None:
+    fftnsi = MafftVars(strategy="fftnsi")
+    limited = MafftVars(strategy="fftnsi")
+    limited.set_refinement(budget=5.0, gain=0.01)
+    assert ResultCache.tree_key(b"A", fftnsi) == ResultCache.tree_key(b"A", limited)
+    assert ResultCache.key(b"A", fftnsi) != ResultCache.key(b"A", limited)
+
+
+def test_cache_key_resolved(tmp_path: Path, monkeypatch) -> None:
+    a = MultipleSequenceAlignment.from_records([("a", "ACGT"), ("b", "ACT")])
+    a.vars.set_threads(-1)
+    set_cache(ResultCache(tmp_path / "cache"))
+    try:
+        monkeypatch.setattr(threads, "available_cores", lambda: 2)
+        monkeypatch.setattr(core, "memory_limit", lambda: None)
+        key = a._cache_key()
+        monkeypatch.setattr(threads, "available_cores", lambda: 4)
+        assert a._cache_key() != key
+        monkeypatch.setattr(threads, "available_cores", lambda: 2)
+        monkeypatch.setattr(core, "memory_limit", lambda: 2**30)
+        assert a._cache_key() != key
+        # A given budget takes the place of the limit
+        a.vars.set_budget(memorybudget=2**29)
+        key = a._cache_key()
+        monkeypatch.setattr(core, "memory_limit", lambda: 2**31)
+        assert a._cache_key() == key
+    finally:
+        set_cache(None)
+
+
+def test_cache_no_results(tmp_path: Path) -> None:
+    sample = TEST_DATA_DIR / "sample2/sample"
+    a = MultipleSequenceAlignment(sample, strategy="fftns1", keeplength=True)
+    set_cache(ResultCache(tmp_path / "cache"))
+    try:
+        with pytest.raises(RuntimeError):
+            a.start()
+    finally:
+        set_cache(None)
+
+
+def test_cache_eviction(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path, max_size=300)
+    for index in range(5):
+        cache.put(f"{index:064x}", dict(output="x" * 100, strategy=None))
+    assert cache.size() <= 300
+    assert cache.get(f"{4:064x}") is not None
+    assert cache.get(f"{0:064x}") is None
+
+
+def test_pair_cache(tmp_path: Path) -> None:
+    records = records_from_text((TEST_DATA_DIR / "sample1/sample").read_text())
+    changed = records[1:] + [("new", records[0][1][::-1])]
+    for input, reused in [(records, 0), (records, 630), (changed, 595)]:
+        a = MultipleSequenceAlignment.from_records(
+            input, strategy="ginsi", paircache=tmp_path
+        )
+        a.start()
+        assert a.reused_pairs == reused
+        assert a.get_records() == align(input, strategy="ginsi")
+
+
+def test_pair_cache_eviction(tmp_path: Path) -> None:
+    cache = PairCache(tmp_path, max_size=60)
+    tile = b"d\n0 1 0.5 1\n0 9 0 9 10 1.5 h\n"
+    for index in range(5):
+        keys = [f"{index}a", f"{index}b"]
+        assert cache.store("test", keys, tile) == 1
+    assert cache.size() <= 60
+    assert cache.load("test", ["4a", "4b"], "d") == (tile, 1)
+    assert cache.load("test", ["0a", "0b"], "d") == (b"d\n", 0)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import pytest
+
+from itaxotools.mafftpy import MultipleSequenceAlignment, align, align_clusters
+from itaxotools.mafftpy.clusters import kmer_clusters
+
+
+def family(seed: int, count: int) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    ancestor = rng.choices("ACGT", k=200)
+    records = []
+    for index in range(count):
+        sequence = [rng.choice("ACGT") if rng.random() < 0.05 else c for c in ancestor]
+        records.append((f"f{seed}_{index}", "".join(sequence)))
+    return records
+
+
+def ungapped(records: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    return [(id, sequence.replace("-", "").upper()) for id, sequence in records]
+
+
+def test_kmer_clusters() -> None:
+    records = family(0, 6) + family(1, 4)
+    assert kmer_clusters(records) == [list(range(6)), list(range(6, 10))]
+    assert kmer_clusters(records, size=4) == [[0, 1, 2, 3], [4, 5], [6, 7, 8, 9]]
+
+
+def test_merge(tmp_path: Path) -> None:
+    first = align(family(0, 4), "fftns1")
+    second = align(family(1, 3), "fftns1")
+    table = tmp_path / "table"
+    table.write_text("1 2 3 4\n5 6 7\n")
+    a = MultipleSequenceAlignment.from_records(
+        first + second, strategy="fftns2", merge=table
+    )
+    a.start()
+    merged = a.get_records()
+    assert ungapped(merged) == ungapped(first + second)
+    for subalignment, rows in [(first, merged[:4]), (second, merged[4:])]:
+        # Columns of each subalignment stay together
+        columns = [
+            i for i in range(len(rows[0][1])) if any(s[i] != "-" for _, s in rows)
+        ]
+        kept = ["".join(s[i] for i in columns) for _, s in rows]
+        assert kept == [s for _, s in subalignment]
+    a = MultipleSequenceAlignment.from_records(
+        first + second, strategy="parttree", merge=table
+    )
+    with pytest.raises(ValueError):
+        a.start()
+
+
+def test_align_clusters() -> None:
+    records = family(0, 5) + family(1, 5) + [("single", family(2, 1)[0][1])]
+    random.Random(0).shuffle(records)
+    result = align_clusters(records, "fftns1", workers=2)
+    assert ungapped(result) == ungapped(records)
+    assert len({len(sequence) for _, sequence in result}) == 1
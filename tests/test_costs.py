@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from itaxotools.mafftpy import MultipleSequenceAlignment
+from itaxotools.mafftpy.core import records_from_text
+from itaxotools.mafftpy.costs import ACCURACY, DEFAULT_TIME_BUDGET, choose
+
+TEST_DATA_DIR = Path(__file__).parent
+
+
+def stats(nseq: int, length: int, dorp: str = "d") -> dict:
+    return dict(nseq=nseq, nlenmax=length, nlenmin=length, dorp=dorp)
+
+
+def test_choose() -> None:
+    small, _ = choose(stats(20, 300), DEFAULT_TIME_BUDGET)
+    assert small.strategy == "ginsi"
+    large, candidates = choose(stats(190, 20000), DEFAULT_TIME_BUDGET)
+    assert large.strategy == "fftns1"
+    assert [c.strategy for c in candidates] == ACCURACY
+    assert candidates[ACCURACY.index("fftns2")].time > DEFAULT_TIME_BUDGET
+    fast, _ = choose(stats(20, 300), accuracy="fftns1")
+    assert fast.strategy == "fftns1"
+    small_memory, _ = choose(stats(100, 3000, "p"), memory_budget=2**20)
+    assert small_memory.strategy == "fftns1"
+
+
+def test_choose_parttree() -> None:
+    many, candidates = choose(stats(12000, 200), DEFAULT_TIME_BUDGET)
+    assert many.strategy == "parttree"
+    assert candidates[ACCURACY.index("fftns1")].time > DEFAULT_TIME_BUDGET
+    # Nothing fits, but PartTree is still the fastest
+    more, _ = choose(stats(50000, 300, "p"), DEFAULT_TIME_BUDGET)
+    assert more.strategy == "parttree"
+    assert more.time > DEFAULT_TIME_BUDGET
+
+
+def test_auto_budget() -> None:
+    data = (TEST_DATA_DIR / "sample2/sample").read_bytes()
+    a = MultipleSequenceAlignment.from_records(data, strategy="auto")
+    a.start()
+    assert a.choice["strategy"] == "ginsi"
+    assert a.choice["stats"]["nseq"] > 1
+
+    b = MultipleSequenceAlignment.from_records(data, strategy="auto", timebudget=1e-9)
+    b.start()
+    assert b.choice["strategy"] == "fftns1"
+    assert b.choice["time"] > 0
+    fixed = (TEST_DATA_DIR / "sample2/sample.fftns1").read_text()
+    assert b.get_records() == records_from_text(fixed)
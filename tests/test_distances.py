@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from itaxotools.mafftpy import MultipleSequenceAlignment
+from itaxotools.mafftpy.core import records_from_text
+
+np = pytest.importorskip("numpy")
+
+TEST_DATA_DIR = Path(__file__).parent
+
+
+@pytest.mark.parametrize("strategy", ["fftns2", "ginsi"])
+def test_distances(strategy: str) -> None:
+    records = records_from_text((TEST_DATA_DIR / "sample4/sample").read_text())
+    a = MultipleSequenceAlignment.from_records(records, strategy=strategy)
+    distances = a.distances()
+    n = len(records)
+    assert distances.dtype == np.float32
+    assert distances.shape == (n * (n - 1) // 2,)
+    assert (distances >= 0).all()
+    assert [m["stage"] for m in a.metrics][-1] in ["disttbfast", "tbfast"]
+    assert a.vars.distout == 0
+    mapped = a.distances(mmap=True)
+    if os.name != "nt":
+        assert isinstance(mapped, np.memmap)
+    assert (mapped == distances).all()
+    a.start()
+    assert len(a.get_records()) == n
+    # The mapped file does not belong to the temporary directory of the runs
+    assert (mapped == distances).all()
+
+
+def test_distances_parttree() -> None:
+    records = records_from_text((TEST_DATA_DIR / "sample4/sample").read_text())
+    a = MultipleSequenceAlignment.from_records(records, strategy="parttree")
+    with pytest.raises(ValueError):
+        a.distances()
+
+
+def test_distances_sketch() -> None:
+    records = records_from_text((TEST_DATA_DIR / "sample4/sample").read_text())
+    exact = MultipleSequenceAlignment.from_records(records, strategy="fftns2")
+    exact = exact.distances()
+    a = MultipleSequenceAlignment.from_records(
+        records, strategy="fftns2", distance="sketch"
+    )
+    sketch = a.distances()
+    assert sketch.shape == exact.shape
+    assert np.corrcoef(exact, sketch)[0, 1] > 0.9
+    a.start()
+    assert len(a.get_records()) == len(records)
+    with pytest.raises(ValueError):
+        MultipleSequenceAlignment.from_records(records, distance="minhash")
+    a = MultipleSequenceAlignment.from_records(
+        records, strategy="ginsi", distance="sketch"
+    )
+    with pytest.raises(ValueError):
+        a.distances()
+    with pytest.raises(ValueError):
+        a.start()
+
+
+def test_distances_sketch_auto() -> None:
+    records = records_from_text((TEST_DATA_DIR / "sample4/sample").read_text())[:8]
+    a = MultipleSequenceAlignment.from_records(
+        records, strategy="auto", distance="sketch"
+    )
+    a.start()
+    assert a.choice["strategy"] in ("fftns1", "fftns2", "fftnsi")
+    assert len(a.get_records()) == len(records)
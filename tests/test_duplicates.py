@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from itaxotools.mafftpy import MultipleSequenceAlignment, align
+from itaxotools.mafftpy.core import records_from_text
+from itaxotools.mafftpy.duplicates import collapse, expand, expand_tree, prune_tree
+
+TEST_DATA_DIR = Path(__file__).parent
+
+
+def test_collapse() -> None:
+    text = ">a\nACGT\n>b\nacg-t\n>c\nAC\nGG\n>d\nACGG\n"
+    collapsed, duplicates = collapse(text)
+    assert collapsed == ">a\nACGT\n>c\nAC\nGG\n"
+    assert duplicates.representatives == [0, 0, 2, 2]
+    assert duplicates.count == 2
+    assert expand(">a\nAC-GT\n>_R_c\nACGG-\n", duplicates) == (
+        ">a\nAC-GT\n>b\nAC-GT\n>_R_c\nACGG-\n>_R_d\nACGG-\n"
+    )
+    assert (
+        expand_tree("(a:1,c:2);", duplicates)
+        == "((a:0.0,b:0.0):1.0,(c:0.0,d:0.0):2.0);"
+    )
+    assert (
+        prune_tree("((a:1,(b:1,d:1):1):1,c:2);", {"b", "d"}) == "((a:1.0):1.0,c:2.0);"
+    )
+    assert collapse(">a\nACGT\n>b\nACGA")[1] is None
+
+
+def test_dedup() -> None:
+    records = records_from_text((TEST_DATA_DIR / "sample4/sample").read_text())
+    first = {}
+    for id, sequence in records:
+        first.setdefault(sequence.upper(), (id, sequence))
+    unique = list(first.values())
+    assert align(unique, "fftns2", dedup=True) == align(unique, "fftns2")
+
+    a = MultipleSequenceAlignment.from_records(records, strategy="fftns2", dedup=True)
+    a.start()
+    assert a.collapsed == len(records) - len(unique)
+    aligned = dict(a.get_records())
+    assert [id for id, _ in a.get_records()] == [id for id, _ in records]
+    rows = {}
+    for id, sequence in records:
+        assert rows.setdefault(sequence.upper(), aligned[id]) == aligned[id]
+    assert len(rows) == len(unique)
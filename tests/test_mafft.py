@@ -22,6 +22,12 @@ mafft  --globalpair --maxiterate 16 --inputorder --adjustdirection "sample" > "s
 mafft  --globalpair --maxiterate 16 --inputorder --adjustdirectionaccurately "sample" > "sample.ginsi.adjustdirectionaccurately"
 
 These were repeated for each sample file.
+
+Targets for FFT-NS-2 and FFT-NS-i were generated the same way, with mafft
+v7.525 built from the vendored sources in src/mafft/core:
+
+mafft  --retree 2 --inputorder "sample" > "sample.fftns2"
+mafft  --retree 2 --maxiterate 1000 --inputorder "sample" > "sample.fftnsi"
 """
 
 
@@ -72,6 +78,8 @@ for sample in ["sample1", "sample2", "sample3", "sample4"]:
                 "fftns1",
                 2,
             ),
+            MafftTest(f"{sample}/sample", f"{sample}/sample.fftns2", "fftns2", 0),
+            MafftTest(f"{sample}/sample", f"{sample}/sample.fftnsi", "fftnsi", 0),
             MafftTest(f"{sample}/sample", f"{sample}/sample.ginsi", "ginsi", 0),
             MafftTest(
                 f"{sample}/sample", f"{sample}/sample.ginsi.adjustdirection", "ginsi", 1
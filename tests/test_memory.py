@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from itaxotools.mafftpy import MultipleSequenceAlignment
+from itaxotools.mafftpy.core import records_from_text
+from itaxotools.mafftpy.memory import memory_limit, peak_memory, plan_memory
+
+TEST_DATA_DIR = Path(__file__).parent
+
+MiB = 2**20
+
+
+def stats(nseq: int, length: int, dorp: str = "d") -> dict:
+    return dict(nseq=nseq, nlenmax=length, nlenmin=length, dorp=dorp)
+
+
+def test_plan_memory() -> None:
+    many = stats(4000, 300)
+    plan = plan_memory("fftns2", many)
+    assert not plan.memsavetree and not plan.memopt
+    assert plan.memory == peak_memory("fftns2", many)
+
+    partial = plan_memory("fftns2", many, 100 * MiB)
+    assert partial.memsavetree and partial.matrix > 0 and not partial.memopt
+    assert partial.memory <= 100 * MiB < plan.memory
+
+    compact = plan_memory("fftns2", many, 60 * MiB)
+    assert compact.memsavetree and compact.matrix == 0 and compact.memopt
+    assert not compact.fits()
+    assert compact.memory < peak_memory("fftns2", many, matrix=0)
+
+    long = plan_memory("fftns2", stats(100, 3000), 100 * MiB)
+    assert long.memopt and not long.memsavetree
+
+    ginsi = plan_memory("ginsi", stats(100, 300), 1)
+    assert not ginsi.memsavetree and not ginsi.fits()
+
+    limit = memory_limit()
+    assert limit is None or limit > 0
+
+
+def test_memory_budget() -> None:
+    data = (TEST_DATA_DIR / "sample4/sample").read_bytes()
+    n = len(records_from_text(data.decode()))
+    a = MultipleSequenceAlignment.from_records(data, strategy="fftns2")
+    estimate = a.estimate_memory()
+    assert estimate["strategy"] == "fftns2"
+    assert estimate["memory"] > 0
+    assert not estimate["memsavetree"]
+    assert a.metrics[-1]["stage"] == "countlen"
+
+    auto = MultipleSequenceAlignment.from_records(data, strategy="auto", memorybudget=1)
+    estimate = auto.estimate_memory()
+    assert auto.choice["memory"] == estimate["memory"]
+
+    a = MultipleSequenceAlignment.from_records(data, strategy="fftns2", memorybudget=1)
+    a.start()
+    assert a.memory["memsavetree"]
+    assert a.memory["budget"] == 1
+    assert a.memory["source"] == "budget"
+    assert len(a.get_records()) == n
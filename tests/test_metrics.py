@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from itaxotools.mafftpy import MultipleSequenceAlignment
+from itaxotools.mafftpy.core import quick
+
+TEST_DATA_DIR = Path(__file__).parent
+
+
+def test_stage_metrics() -> None:
+    data = (TEST_DATA_DIR / "sample2/sample").read_bytes()
+    a = MultipleSequenceAlignment.from_records(
+        data, strategy="fftns1", adjustdirection=True
+    )
+    a.start()
+    stages = [metric["stage"] for metric in a.metrics]
+    assert stages == ["countlen", "makedirectionlist", "setdirection", "disttbfast"]
+    for metric in a.metrics:
+        assert metric["wall"] >= 0
+        assert metric["cpu"] >= 0
+        assert metric["input"] > 0
+    assert a.metrics[0]["output"] is None
+    for metric in a.metrics[1:]:
+        assert metric["output"] > 0
+    assert a.metrics[-1]["output"] == len(a.output)
+
+
+def test_quick_metrics(tmp_path: Path) -> None:
+    metrics = tmp_path / "metrics.json"
+    output = tmp_path / "output.fas"
+    quick(TEST_DATA_DIR / "sample2/sample", output, "ginsi", metrics=metrics)
+    stages = [metric["stage"] for metric in json.loads(metrics.read_text())]
+    assert stages == ["countlen", "tbfast", "dvtditr"]
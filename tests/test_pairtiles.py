@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from itaxotools.mafftpy import MultipleSequenceAlignment, align, align_tiled
+
+TEST_DATA_DIR = Path(__file__).parent
+
+
+def test_align_tiled() -> None:
+    data = (TEST_DATA_DIR / "sample1" / "sample").read_bytes()
+    expected = align(data, "ginsi")
+    assert align_tiled(data, tiles=3, workers=2) == expected
+    with ProcessPoolExecutor(2) as executor:
+        assert align_tiled(data, tiles=4, executor=executor) == expected
+
+
+def test_pair_tile_bad_index() -> None:
+    a = MultipleSequenceAlignment.from_records([("a", "ACGT"), ("b", "ACT")])
+    with pytest.raises(ValueError):
+        a.vars.set_pair_tile(3, 3)
+
+
+def test_pair_tile_unsupported() -> None:
+    data = (TEST_DATA_DIR / "sample1" / "sample").read_bytes()
+    a = MultipleSequenceAlignment.from_records(data, strategy="fftns2")
+    a.vars.set_pair_tile(0, 2)
+    with pytest.raises(ValueError):
+        a.start()
+    addition = TEST_DATA_DIR / "sample1" / "sample"
+    with pytest.raises(ValueError):
+        align_tiled(data, tiles=2, workers=1, add=addition)
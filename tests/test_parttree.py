@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from itaxotools.mafftpy import MafftPool, align
+from itaxotools.mafftpy.core import records_from_text
+
+TEST_DATA_DIR = Path(__file__).parent
+
+
+def ungapped(records: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    return [(id, sequence.replace("-", "").upper()) for id, sequence in records]
+
+
+@pytest.mark.parametrize("strategy", ["parttree", "dpparttree"])
+def test_parttree(strategy: str) -> None:
+    data = (TEST_DATA_DIR / "sample3/sample").read_text()
+    result = align(data.encode(), strategy)
+    assert len({len(sequence) for _, sequence in result}) == 1
+    assert ungapped(result) == ungapped(records_from_text(data))
+
+
+def test_parttree_repeats_in_worker() -> None:
+    data = (TEST_DATA_DIR / "sample4/sample").read_bytes()
+    with MafftPool(workers=1) as pool:
+        first = pool.align(data, "parttree").result()
+        pool.align((TEST_DATA_DIR / "sample2/sample").read_bytes(), "dpparttree")
+        second = pool.align(data, "parttree").result()
+    assert first == second
+
+
+def test_parttree_groupsize() -> None:
+    records = records_from_text((TEST_DATA_DIR / "sample1/sample").read_text())
+    records = records[::2] + records[1::2]
+    result = align(records, "parttree", partsize=5, groupsize=8)
+    groups = [id.split(" ", 1)[0] for id, _ in result]
+    assert all(group.startswith("Group-") for group in groups)
+    assert len(set(groups)) > 1
+    # Names are prefixed by their group, rows keep the input order
+    names = [id.split(" ", 1)[1].strip() for id, _ in result]
+    assert names == [id for id, _ in records]
+    assert ungapped(list(zip(names, (s for _, s in result)))) == ungapped(records)
+    # Each group is aligned on its own
+    for group in set(groups) - {"Group-para"}:
+        lengths = {len(s) for other, (_, s) in zip(groups, result) if other == group}
+        assert len(lengths) == 1
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from itaxotools.mafftpy import MafftPool, MultipleSequenceAlignment
+from itaxotools.mafftpy.core import records_from_text
+
+TEST_DATA_DIR = Path(__file__).parent
+
+
+def test_pool_reuses_workers() -> None:
+    samples = ["sample2", "sample3", "sample4", "sample2", "sample3"]
+    with MafftPool(workers=2, max_jobs=2) as pool:
+        futures = [
+            pool.align((TEST_DATA_DIR / sample / "sample").read_bytes(), "fftns1")
+            for sample in samples
+        ]
+        for sample, future in zip(samples, futures):
+            fixed = (TEST_DATA_DIR / sample / "sample.fftns1").read_text()
+            assert future.result() == records_from_text(fixed)
+
+
+def test_pool_map_files() -> None:
+    jobs = []
+    for sample in ["sample2", "sample3"]:
+        job = MultipleSequenceAlignment(TEST_DATA_DIR / sample / "sample")
+        job.vars.set_strategy("fftns1")
+        jobs.append(job)
+    with MafftPool(workers=1) as pool:
+        for sample, job in zip(["sample2", "sample3"], pool.map(jobs)):
+            fixed = (TEST_DATA_DIR / sample / "sample.fftns1").read_text()
+            assert job.get_records() == records_from_text(fixed)
+
+
+def test_pool_recovers_from_crash() -> None:
+    with MafftPool(workers=1) as pool:
+        crash = pool.align(b">single\nACGT\n", "fftns1")
+        after = pool.align((TEST_DATA_DIR / "sample2/sample").read_bytes(), "fftns1")
+        with pytest.raises(RuntimeError):
+            crash.result()
+        fixed = (TEST_DATA_DIR / "sample2/sample.fftns1").read_text()
+        assert after.result() == records_from_text(fixed)
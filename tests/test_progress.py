@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from itaxotools.mafftpy import MafftPool, MultipleSequenceAlignment
+from itaxotools.mafftpy.progress import ProgressEvent, ProgressParser
+
+TEST_DATA_DIR = Path(__file__).parent
+
+
+def test_progress_parser() -> None:
+    events = []
+    parser = ProgressParser(events.append, interval=0)
+    parser.start("tbfast")
+    parser.write("All-to-all alignment.\n\r    0 / 3\r    1 / 3")
+    parser.write("\nConstructing a UPGMA tree ... \n    3 / 3\n")
+    parser.write("Progressive alignment ... \nSTEP     2 /2 \n")
+    parser.write("STEP 001-002-1  accepted. score = 12.5\r")
+    parser.end()
+    assert events == [
+        ProgressEvent("stage_start", "tbfast"),
+        ProgressEvent("pairs", "tbfast", done=0, total=3),
+        ProgressEvent("pairs", "tbfast", done=1, total=3),
+        ProgressEvent("tree", "tbfast", done=3, total=3),
+        ProgressEvent("progressive", "tbfast", done=2, total=2),
+        ProgressEvent("iteration", "tbfast", done=2, iteration=1, score=12.5),
+        ProgressEvent("stage_end", "tbfast"),
+    ]
+
+
+def test_progress_rate_limit() -> None:
+    events = []
+    parser = ProgressParser(events.append, interval=60)
+    parser.start("disttbfast")
+    parser.write("".join(f"\r{i} / 100" for i in range(101)) + "\n")
+    parser.end()
+    kinds = [(event.kind, event.done) for event in events]
+    assert kinds == [
+        ("stage_start", None),
+        ("pairs", 0),
+        ("pairs", 100),
+        ("stage_end", None),
+    ]
+
+
+def test_progress_callback(tmp_path: Path) -> None:
+    data = (TEST_DATA_DIR / "sample2/sample").read_bytes()
+    a = MultipleSequenceAlignment.from_records(data, strategy="ginsi")
+    a.log = str(tmp_path / "log")
+    events = []
+    a.progress = events.append
+    a.start()
+    stages = [(event.kind, event.stage) for event in events if "stage" in event.kind]
+    assert stages == [
+        ("stage_start", "countlen"),
+        ("stage_end", "countlen"),
+        ("stage_start", "tbfast"),
+        ("stage_end", "tbfast"),
+        ("stage_start", "dvtditr"),
+        ("stage_end", "dvtditr"),
+    ]
+    assert any(event.kind == "iteration" for event in events)
+    assert "Progressive alignment" in (tmp_path / "log").read_text()
+
+    events.clear()
+    with MafftPool(workers=1) as pool:
+        b = MultipleSequenceAlignment.from_records(data, strategy="fftns1")
+        b.progress = events.append
+        pool.submit(b).result()
+    assert events[0] == ProgressEvent("stage_start", "countlen")
+    assert events[-1] == ProgressEvent("stage_end", "disttbfast")
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import random
+
+from itaxotools.mafftpy import MultipleSequenceAlignment
+
+
+def mutated_records(count: int, length: int, rate: float) -> list[tuple[str, str]]:
+    rng = random.Random(1)
+    root = "".join(rng.choice("ACGT") for _ in range(length))
+    records = []
+    for i in range(count):
+        sequence = []
+        for c in root:
+            x = rng.random()
+            if x < rate:
+                sequence.append(rng.choice("ACGT"))
+            elif x < rate * 1.3:
+                pass
+            elif x < rate * 1.6:
+                sequence.append(c + rng.choice("ACGT"))
+            else:
+                sequence.append(c)
+        records.append((f"s{i}", "".join(sequence)))
+    return records
+
+
+def run(records, **kwargs) -> MultipleSequenceAlignment:
+    a = MultipleSequenceAlignment.from_records(
+        records, strategy="ginsi", threadit=0, **kwargs
+    )
+    a.start()
+    return a
+
+
+def test_refinement_scores() -> None:
+    records = mutated_records(20, 200, 0.25)
+    full = run(records)
+    assert len(full.scores) > 2
+    assert full.scores[-1] > full.scores[0]
+
+    gain = run(records, refinegain=0.1)
+    count = len(gain.scores)
+    assert 1 < count <= len(full.scores)
+    assert gain.scores == full.scores[:count]
+    last, previous = gain.scores[-1], gain.scores[-2]
+    assert count == len(full.scores) or last - previous < 0.1 * abs(previous)
+
+    budget = run(records, refinebudget=1e-9)
+    assert budget.scores == full.scores[:1]
+    ids = [id for id, _ in records]
+    assert [id for id, _ in budget.get_records()] == ids
+    assert len({len(sequence) for _, sequence in budget.get_records()}) == 1
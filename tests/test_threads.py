@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from itaxotools.mafftpy import align
+from itaxotools.mafftpy.core import MafftVars, records_from_text
+from itaxotools.mafftpy.threads import available_cores, resolve_threads
+
+TEST_DATA_DIR = Path(__file__).parent
+
+
+def test_available_cores() -> None:
+    assert available_cores() >= 1
+
+
+def test_resolve_threads() -> None:
+    assert resolve_threads(0, -1, -1) == (0, 0, 0)
+    assert resolve_threads(4, -1, -1) == (4, 4, 4)
+    assert resolve_threads(32, -1, -1) == (32, 16, 8)
+    assert resolve_threads(32, 2, 3) == (32, 2, 3)
+    assert resolve_threads(-1, -1, -1, limit=1) == (1, 1, 1)
+
+
+def test_thread_arguments() -> None:
+    v = MafftVars(thread=-1, threadtb=4, threadit=None, adjustdirection=False)
+    assert (v.numthreads, v.numthreadstb, v.numthreadsit) == (-1, 4, -1)
+    assert v.adjustdirection == 0
+
+
+def test_align_threads() -> None:
+    data = (TEST_DATA_DIR / "sample2/sample").read_bytes()
+    fixed = records_from_text((TEST_DATA_DIR / "sample2/sample.fftns1").read_text())
+    assert align(data, strategy="fftns1", thread=2) == fixed
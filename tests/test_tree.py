@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from itaxotools.mafftpy import MultipleSequenceAlignment, ResultCache, set_cache
+from itaxotools.mafftpy.core import records_from_text
+from itaxotools.mafftpy.tree import format_newick, parse_newick, to_core
+
+TEST_DATA_DIR = Path(__file__).parent
+
+
+def test_newick_to_core() -> None:
+    ids = ["a", "b c", "d", "e"]
+    text = "(('b c':0.1,e:0.2):0.3,a:0.4,d:0.5)[root];"
+    assert format_newick(parse_newick(text)) == "(('b c':0.1,e:0.2):0.3,a:0.4,d:0.5);"
+    assert to_core(text, ids) == (
+        "    2     4 0.1 0.2\n    1     2 0.4 0.3\n    1     3 0.0 0.5\n"
+    )
+    with pytest.raises(ValueError):
+        to_core("(a:1,b:1);", ids)
+    with pytest.raises(ValueError):
+        to_core("((a,'b c'),(d,e));", ids)
+
+
+@pytest.mark.parametrize(
+    "tree",
+    ["(a:1,b:1);", "((a:1,b:1):1,(a:1,c:1):1);", "((a,b),(c,d));"],
+)
+def test_tree_invalid(tree: str) -> None:
+    records = [("a", "ACGT"), ("b", "ACGA"), ("c", "ACTA"), ("d", "AGTA")]
+    a = MultipleSequenceAlignment.from_records(records, strategy="fftns2", tree=tree)
+    with pytest.raises(ValueError):
+        a.start()
+
+
+@pytest.mark.parametrize("strategy", ["fftns2", "fftnsi", "ginsi"])
+def test_tree_reuse(strategy: str) -> None:
+    records = records_from_text((TEST_DATA_DIR / "sample4/sample").read_text())
+    first = MultipleSequenceAlignment.from_records(
+        records, strategy=strategy, treeout=True
+    )
+    first.start()
+    assert first.tree.endswith(";")
+    assert first.skipped == []
+    second = MultipleSequenceAlignment.from_records(
+        records, strategy=strategy, tree=first.tree
+    )
+    second.start()
+    assert second.get_records() == first.get_records()
+    assert any(stage.endswith(":tree") for stage in second.skipped)
+
+
+def test_tree_cache(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path)
+    data = (TEST_DATA_DIR / "sample4/sample").read_bytes()
+    fresh = MultipleSequenceAlignment.from_records(data, strategy="fftnsi")
+    fresh.start()
+    set_cache(cache)
+    try:
+        MultipleSequenceAlignment.from_records(data, strategy="fftns2").start()
+        a = MultipleSequenceAlignment.from_records(data, strategy="fftnsi")
+        a.start()
+    finally:
+        set_cache(None)
+    assert a.get_records() == fresh.get_records()
+    assert a.skipped == ["disttbfast:distances", "disttbfast:tree"]
+    assert a.tree is not None
+    assert cache.stats() == dict(hits=0, misses=2, tree_hits=1, tree_misses=1)